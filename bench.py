@@ -0,0 +1,1163 @@
+"""Local benchmarks for the bot's hot paths.
+
+Runs against fake Discord objects only; no token or network access needed.
+Usage: python bench.py <name> [options]   (python bench.py -h for the list)
+"""
+import argparse
+import asyncio
+import datetime as dt
+import functools
+import gc
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+# Keep the bot module quiet and offline while it is imported for benchmarking
+os.environ.setdefault("QUIET_LOGS", "1")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import bot  # noqa: E402
+
+
+# --- FAKE DISCORD OBJECTS ---
+class FakeMember:
+    def __init__(self, uid: int):
+        self.id = uid
+        self.bot = False
+        self.display_name = f"Member{uid}"
+
+
+class FakeGuild:
+    def __init__(self, member_count: int = 2000):
+        self.id = 1
+        self._members = {uid: FakeMember(uid) for uid in range(1, member_count + 1)}
+
+    def get_member(self, uid: int):
+        return self._members.get(uid)
+
+
+class FakeMessage:
+    """Partial message stub that counts edits and simulates API round-trip latency."""
+    def __init__(self, msg_id: int, latency: float = 0.05):
+        self.id = msg_id
+        self.latency = latency
+        self.edits = 0
+        self.last_embeds = None
+
+    async def edit(self, embeds=None, **_kwargs):
+        await asyncio.sleep(self.latency)
+        self.edits += 1
+        self.last_embeds = embeds
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild, latency: float = 0.05):
+        self.id = channel_id
+        self.guild = guild
+        self.latency = latency
+        self.messages: dict[int, FakeMessage] = {}
+
+    def get_partial_message(self, msg_id: int) -> FakeMessage:
+        if msg_id not in self.messages:
+            self.messages[msg_id] = FakeMessage(msg_id, self.latency)
+        return self.messages[msg_id]
+
+
+class FakeSendChannel:
+    """Channel stub for sends: fixed latency and an injected 429 every N sends."""
+    def __init__(self, latency: float = 0.1, fail_every: int = 0):
+        self.id = 20
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.sent: list[str] = []
+
+    async def send(self, content=None, **_kwargs):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.latency)
+        if self.fail_every and call % self.fail_every == 0:
+            response = types.SimpleNamespace(status=429, reason="Too Many Requests", headers={"Retry-After": "0.2"})
+            raise bot.nextcord.HTTPException(response, "rate limited")
+        self.sent.append(content)
+        return types.SimpleNamespace(id=len(self.sent))
+
+
+def install_fakes(guild: FakeGuild, channel: FakeChannel) -> None:
+    """Point the bot's guild/channel lookups at the fakes."""
+    bot.bot.get_guild = lambda gid: guild if gid == guild.id else None
+    bot.bot.get_channel = lambda cid: channel if cid == channel.id else None
+
+
+def reaction_payload(msg_id: int, member: FakeMember, emoji: str, guild_id: int = 1):
+    return types.SimpleNamespace(message_id=msg_id, user_id=member.id, member=member, emoji=emoji, guild_id=guild_id, channel_id=10)
+
+
+# --- BENCHMARKS ---
+async def bench_coalesce(args) -> None:
+    """Edits sent per N lineup reactions arriving over a fixed duration."""
+    guild = FakeGuild(args.reactions)
+    channel = FakeChannel(10, guild, latency=args.latency)
+    install_fakes(guild, channel)
+    message = channel.get_partial_message(1000)
+    bot.lineups.clear()
+    bot.lineups[message.id] = bot.Lineup("Siege Line-Up", "", channel.id, guild.id)
+    coalescer = bot.LineupEditCoalescer(args.window)
+    bot.lineup_edits = coalescer
+
+    gap = args.duration / max(1, args.reactions)
+    started = time.perf_counter()
+    for uid in range(1, args.reactions + 1):
+        emoji = "✅" if uid % 4 else "❌"
+        await bot.on_raw_reaction_add(reaction_payload(message.id, guild.get_member(uid), emoji))
+        await asyncio.sleep(gap)
+    while coalescer._pending:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    lineup = bot.lineups[message.id]
+    final = message.last_embeds
+    consistent = bool(final) and final[0].fields[0].name.startswith(f"✅ Will Join ({lineup.count('join')})")
+    per_1k = message.edits * 1000 / max(1, args.reactions)
+    print(f"reactions:        {args.reactions} over {args.duration:.1f}s (window {args.window}s)")
+    print(f"edits sent:       {message.edits}")
+    print(f"edits saved:      {coalescer.saved}")
+    print(f"edits per 1,000:  {per_1k:.1f} (uncoalesced: 1000.0)")
+    print(f"final state:      {lineup.count('join')} join / {lineup.count('no')} no")
+    print(f"final edit fresh: {consistent}")
+    print(f"wall time:        {elapsed:.2f}s")
+
+
+async def bench_restore(args) -> None:
+    """Write N line-ups through the batched store, then time a cold restore."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        store = bot.StateStore(path)
+        store.start()
+        started = time.perf_counter()
+        uid = 0
+        for msg_id in range(1, args.lineups + 1):
+            store.put_lineup(msg_id, 10, 1, "Siege Line-Up", "")
+            for i in range(args.members):
+                uid += 1
+                store.set_member(msg_id, uid, "join" if i % 4 else "no")
+            if msg_id % 10 == 0:
+                store.put_announcement(msg_id, 10, int(time.time()) + 3600, "Guild Siege")
+        enqueued = time.perf_counter() - started
+        store.close()
+        written = time.perf_counter() - started
+
+        started = time.perf_counter()
+        restored, pending = bot.StateStore(path).load()
+        restore = time.perf_counter() - started
+
+        print(f"line-ups:         {args.lineups} x {args.members} members")
+        print(f"enqueue time:     {enqueued * 1000:.0f} ms (event-loop cost)")
+        print(f"write time:       {written * 1000:.0f} ms in {store.batches} batch(es), {store.writes} row op(s)")
+        print(f"restore time:     {restore * 1000:.0f} ms")
+        print(f"restored:         {len(restored)} line-up(s), {len(pending)} announcement(s)")
+        print(f"db size:          {os.path.getsize(path) / 1024:.0f} KiB")
+
+
+async def bench_lifecycle(args) -> None:
+    """Cold start after months of line-ups: how many stay in memory once old ones are archived."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        store = bot.StateStore(path)
+        store.start()
+        now = time.time()
+        span = args.days * 86400
+        uid = 0
+        for msg_id in range(1, args.lineups + 1):
+            # Evenly spread over the last `days`, the newest few still ahead
+            event_at = int(now - span + msg_id * span / args.lineups + args.ahead * 3600)
+            store.put_lineup(msg_id, 10, 1, "Siege Line-Up", "Saturday 8pm", event_at, event_at - 86400)
+            for i in range(args.members):
+                uid += 1
+                store.set_member(msg_id, uid, "join" if i % 4 else "no")
+        store.close()
+        live_size = os.path.getsize(path)
+
+        install_fakes(FakeGuild(10), FakeChannel(10, FakeGuild(10), latency=0))
+        bot.lineups.clear()
+        bot.store = bot.StateStore(path)
+        bot.store.start()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        await bot._restore_state()
+        restored = len(bot.lineups)
+        hot_before = tracemalloc.get_traced_memory()[0] - base
+        bot.scheduler.start()
+        while any(job.when <= time.time() for job in bot.scheduler.list("lineup")) or bot.scheduler._running:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        bot.store.close()  # let the writer drain so queued archive rows are not counted as resident
+        gc.collect()
+        hot_after = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        locked = sum(1 for lineup in bot.lineups.values() if lineup.locked())
+        conn = bot.sqlite3.connect(path)
+        archived = conn.execute("SELECT COUNT(*) FROM lineup_archive").fetchone()[0]
+        conn.execute("VACUUM")
+        conn.close()
+
+        print(f"line-ups:         {args.lineups} x {args.members} members over {args.days} days "
+              f"(archive {bot.LINEUP_ARCHIVE_AFTER / 3600:g}h after the event)")
+        print(f"restored:         {restored} line-up(s), {hot_before / 1024:,.0f} KiB in memory")
+        print(f"after lifecycle:  {len(bot.lineups)} in memory ({len(bot.lineups) - locked} open, {locked} locked), "
+              f"{hot_after / 1024:,.0f} KiB; {archived} archived in {elapsed * 1000:.0f} ms")
+        print(f"db size:          {live_size / 1024:,.0f} KiB live -> {os.path.getsize(path) / 1024:,.0f} KiB "
+              f"archived ({os.path.getsize(path) / max(1, archived):,.0f} B per line-up)")
+
+
+async def bench_scheduler(args) -> None:
+    """Memory per pending timer: one sleeping task each vs. scheduler jobs."""
+    async def noop(*_args):
+        return None
+
+    async def sleeper(delay):
+        await asyncio.sleep(delay)
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sched = bot.Scheduler()
+    now = time.time()
+    for i in range(args.timers):
+        sched.add(now + 3600 + i, noop, i, name="bench")
+    sched.start()
+    await asyncio.sleep(0)
+    job_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    base = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(sleeper(3600 + i)) for i in range(args.timers)]
+    await asyncio.sleep(0)
+    task_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    started = time.perf_counter()
+    for job in sched.list()[: args.timers // 2]:
+        sched.cancel(job.id)
+    cancel = time.perf_counter() - started
+
+    print(f"pending timers:   {args.timers}")
+    print(f"sleeping tasks:   {task_bytes / args.timers:.0f} B/timer")
+    print(f"scheduler jobs:   {job_bytes / args.timers:.0f} B/timer")
+    print(f"cancel half:      {cancel * 1000:.1f} ms")
+    print(f"scheduler tasks:  1 (remaining jobs: {len(sched)})")
+
+
+def legacy_next_ffa_local(now_local):
+    """The pre-engine _next_ffa_local, kept verbatim for comparison."""
+    candidates = [
+        now_local.replace(hour=h, minute=0, second=0, microsecond=0) for h in bot.FFA_TIMES
+    ]
+    for c in candidates:
+        if c > now_local:
+            return c
+    return candidates[0] + dt.timedelta(days=1)
+
+
+async def bench_recurring(args) -> None:
+    """next-occurrence lookups: legacy linear scan vs. compiled schedule."""
+    tz = bot.PH_TZ
+    event = bot.RecurringSchedule("FFA", "Asia/Manila", bot.FFA_TIMES, "", 0)
+    start = dt.datetime(2026, 1, 1, tzinfo=tz)
+    # Sweep the clock across a week so every slot (and day rollover) is hit
+    sweep = [start + dt.timedelta(seconds=i * 604800 / args.calls) for i in range(args.calls)]
+
+    t0 = time.perf_counter()
+    legacy = [legacy_next_ffa_local(now) for now in sweep]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compiled = [event.next_after(now) for now in sweep]
+    t_engine = time.perf_counter() - t0
+
+    fixed = bot.RecurringSchedule("FFA", "Asia/Manila", bot.FFA_TIMES, "", 0)
+    now = start + dt.timedelta(hours=9)
+    t0 = time.perf_counter()
+    for _ in range(args.calls):
+        fixed.next_after(now)
+    t_cached = time.perf_counter() - t0
+
+    disagree = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"lookups:          {args.calls}")
+    print(f"legacy scan:      {t_legacy / args.calls * 1e6:.2f} us/call")
+    print(f"compiled bisect:  {t_engine / args.calls * 1e6:.2f} us/call")
+    print(f"cached repeat:    {t_cached / args.calls * 1e6:.2f} us/call")
+    print(f"differs:          {disagree} lookup(s) (legacy misses 02/05/08h slots before 11h)")
+
+
+async def legacy_announce(channel, ids_list, event_name):
+    """The pre-fan-out announcement loop, kept for comparison."""
+    chunk_size = 50
+    for i in range(0, len(ids_list), chunk_size):
+        chunk = ids_list[i:i+chunk_size]
+        mentions = " ".join(f"<@{uid}>" for uid in chunk)
+        content = f"{mentions} prepare your gear — {event_name} has started!"
+        await channel.send(content)
+
+
+async def bench_fanout(args) -> None:
+    """Time to announce N participants: sequential 50-per-message vs. packed fan-out."""
+    ids = [10**17 + i for i in range(args.participants)]
+    suffix = "prepare your gear — Guild Siege has started!"
+
+    legacy = FakeSendChannel(args.latency)
+    t0 = time.perf_counter()
+    await legacy_announce(legacy, ids, "Guild Siege")
+    t_legacy = time.perf_counter() - t0
+
+    channel = FakeSendChannel(args.latency, args.fail_every)
+    report = await bot.fan_out_mentions(channel, ids, suffix, concurrency=args.concurrency)
+
+    print(f"participants:     {args.participants}")
+    print(f"legacy:           {len(legacy.sent)} message(s), {t_legacy:.2f}s, longest {max(map(len, legacy.sent))} chars")
+    print(f"fan-out:          {len(report.delivered)} message(s), {report.elapsed:.2f}s, longest {max(map(len, channel.sent))} chars")
+    print(f"report:           {report.summary()}")
+
+
+async def bench_render(args) -> None:
+    """Per-edit render cost as a line-up grows one reaction at a time."""
+    guild = FakeGuild(args.members)
+    renderer = bot.LineupRenderer()
+    lineup = bot.Lineup("Siege Line-Up", "Saturday 8pm")
+    t_total = 0.0
+    for uid in range(1, args.members + 1):
+        lineup.set(uid, "join" if uid % 5 else "no")
+        t0 = time.perf_counter()
+        embeds = renderer.render(1, guild, lineup)
+        t_total += time.perf_counter() - t0
+        chars = sum(len(e) for e in embeds)
+        assert chars <= bot.MESSAGE_CHAR_LIMIT, f"{chars} characters across {len(embeds)} embed(s)"
+    shown = sum(v.value.count("\n") + 1 for e in embeds for v in e.fields if v.value != "No one yet")
+    print(f"members:          {args.members} (one render per reaction)")
+    print(f"avg render:       {t_total / args.members * 1e6:.1f} us")
+    print(f"pages built:      {renderer.pages_built}, reused {renderer.pages_reused}")
+    print(f"names cache:      {bot.display_names.hits} hit(s), {bot.display_names.misses} miss(es)")
+    print(f"final message:    {len(embeds)} embed(s), {sum(len(e.fields) for e in embeds)} field(s), {shown} name(s) shown, {chars} chars")
+
+
+def legacy_member_has_creator_role(member) -> bool:
+    """The pre-resolver role check, kept for comparison."""
+    target = bot.CREATOR_ROLE_NAME.strip().lower()
+    names = [r.name.strip().lower() for r in getattr(member, 'roles', [])]
+    return target in names
+
+
+async def bench_perms(args) -> None:
+    """CREATOR checks per second on members holding many roles."""
+    roles = [types.SimpleNamespace(id=10**17 + i, name=f"Role {i}") for i in range(args.roles)]
+    roles[-1].name = bot.CREATOR_ROLE_NAME
+    guild = types.SimpleNamespace(id=1, roles=roles)
+    SnowflakeList = bot.nextcord.utils.SnowflakeList
+    allowed = types.SimpleNamespace(guild=guild, roles=roles, _roles=SnowflakeList([r.id for r in roles]))
+    denied = types.SimpleNamespace(guild=guild, roles=roles[:-1], _roles=SnowflakeList([r.id for r in roles[:-1]]))
+    perms = bot.RolePermissions([bot.CREATOR_ROLE_NAME])
+
+    def rate(check) -> float:
+        t0 = time.perf_counter()
+        for i in range(args.checks):
+            check(allowed if i % 2 else denied)
+        return args.checks / (time.perf_counter() - t0)
+
+    assert legacy_member_has_creator_role(allowed) and perms.allowed(allowed)
+    assert not legacy_member_has_creator_role(denied) and not perms.allowed(denied)
+    legacy = rate(legacy_member_has_creator_role)
+    cached = rate(perms.allowed)
+    print(f"roles per member: {args.roles}")
+    print(f"legacy names:     {legacy:,.0f} checks/s")
+    print(f"resolved IDs:     {cached:,.0f} checks/s ({cached / legacy:.0f}x)")
+
+
+class FakeHistoryChannel:
+    """Channel with a fixed history, timed bulk and single deletes."""
+    def __init__(self, count: int, old_every: int, latency: float):
+        now = dt.datetime.now(dt.timezone.utc)
+        self.id = 1
+        self.latency = latency
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.deleted_ids: list[int] = []
+        self.messages = []
+        for i in range(count):
+            # Newest first; every `old_every`-th stretch is older than 14 days
+            age = dt.timedelta(days=20) if old_every and i >= count - count // old_every else dt.timedelta(minutes=i)
+            msg = types.SimpleNamespace(id=count - i, pinned=(i % 97 == 0), attachments=[],
+                                        author=types.SimpleNamespace(id=i % 3), content=f"message {i}",
+                                        created_at=now - age)
+            msg.delete = functools.partial(self._single_delete, msg)
+            self.messages.append(msg)
+
+    async def history(self, limit=None, before=None, after=None, oldest_first=None):
+        # Same defaults as nextcord: oldest-first whenever `after` is given
+        if oldest_first is None:
+            oldest_first = after is not None
+        window = [m for m in self.messages
+                  if (before is None or m.created_at < before) and (after is None or m.created_at > after)]
+        if oldest_first:
+            window.reverse()
+        for msg in window[:limit]:
+            yield msg
+
+    async def delete_messages(self, batch):
+        self.bulk_calls += 1
+        self.deleted_ids.extend(m.id for m in batch)
+        await asyncio.sleep(self.latency)
+
+    async def _single_delete(self, msg):
+        self.single_calls += 1
+        self.deleted_ids.append(msg.id)
+        await asyncio.sleep(self.latency)
+
+    async def purge(self, limit, check):
+        """nextcord's purge(), approximated: bulk deletes of 100, old messages one by one."""
+        cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=14)
+        deleted = [m for m in self.messages[:limit] if check(m)]
+        young = [m for m in deleted if m.created_at >= cutoff]
+        for i in range(0, len(young), 100):
+            await self.delete_messages(young[i:i + 100])
+        for m in deleted:
+            if m.created_at < cutoff:
+                await m.delete()
+        return deleted
+
+
+async def bench_purge(args) -> None:
+    """Messages deleted per second: capped purge() runs vs. one streaming job."""
+    legacy = FakeHistoryChannel(args.messages, args.old_every, args.latency)
+    t0 = time.perf_counter()
+    legacy_deleted = 0
+    runs = 0
+    while legacy.messages:
+        # The old command: one capped run per invocation, re-issued until empty
+        legacy_deleted += len(await legacy.purge(limit=100, check=lambda m: not m.pinned))
+        legacy.messages = legacy.messages[100:]
+        runs += 1
+    t_legacy = time.perf_counter() - t0
+
+    channel = FakeHistoryChannel(args.messages, args.old_every, args.latency)
+    job = bot.PurgeJob(channel, bot.PurgeFilter(), args.messages, single_interval=args.single_interval)
+    await job.run()
+    print(f"messages:         {args.messages} ({args.messages // args.old_every if args.old_every else 0} older than 14 days)")
+    print(f"legacy purge:     {runs} command(s), {legacy_deleted} deleted, {t_legacy:.2f}s, {legacy.bulk_calls} bulk + {legacy.single_calls} single call(s)")
+    print(f"streaming job:    1 command, {job.summary()}")
+    print(f"api calls:        {job.bulk_calls} bulk, {job.single_calls} single")
+    print(f"throughput:       {job.deleted / job.elapsed:,.0f} msg/s")
+
+    # `newer:` bounds the history from below; the purge must still take the newest matches
+    channel = FakeHistoryChannel(args.messages, args.old_every, args.latency)
+    after = channel.messages[len(channel.messages) // 2].created_at
+    job = bot.PurgeJob(channel, bot.PurgeFilter(after=after), 100, single_interval=args.single_interval)
+    await job.run()
+    newest = [m.id for m in channel.messages if m.created_at > after and not m.pinned][:100]
+    assert sorted(channel.deleted_ids) == sorted(newest), "windowed purge did not delete the newest matches"
+    print(f"windowed purge:   {job.summary()}, newest {len(newest)} matches deleted")
+
+
+LEGACY_TIMESTAMP_RE = re.compile(r"<t:(\d+)(?::[dDtTfFR])?>")
+LEGACY_TIME_SIMPLE_RE = re.compile(r"\b(?:(?:at|@)\s*)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
+
+
+def legacy_time_from_text(text: str, now: dt.datetime) -> int | None:
+    """The pre-tokenizer pair (_extract_unix_timestamp, then _infer_local_time_unix), with `now` injected."""
+    m = LEGACY_TIMESTAMP_RE.search(text or "")
+    if m:
+        return int(m.group(1))
+    m = LEGACY_TIME_SIMPLE_RE.search(text or "")
+    if not m:
+        return None
+    hour = int(m.group(1))
+    minute = int(m.group(2) or "0")
+    ampm = (m.group(3) or "").lower()
+    if ampm:
+        hour = hour % 12
+        if ampm == "pm":
+            hour += 12
+    if hour > 23 or minute > 59:
+        return None
+    now_local = now.astimezone(bot.PH_TZ)
+    candidate = now_local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now_local:
+        candidate = candidate + dt.timedelta(days=1)
+    return int(candidate.astimezone(dt.timezone.utc).timestamp())
+
+
+def time_corpus(now_local: dt.datetime) -> list[tuple[str, int | None]]:
+    """(line-up text, expected unix time) pairs; `now_local` is a Saturday 10:00 in Asia/Manila."""
+    def at(days: int, hour: int, minute: int = 0) -> int:
+        return int((now_local + dt.timedelta(days=days)).replace(hour=hour, minute=minute).timestamp())
+    base = int(now_local.timestamp())
+    return [
+        ("Siege tonight 8pm, be on time", at(0, 20)),
+        ("Siege 5v5 at 8pm", at(0, 20)),
+        ("Secret room 20:00 sharp", at(0, 20)),
+        ("Line-up for <t:1800000000:F>", 1800000000),
+        ("Guild Siege <t:1800000000:R> @everyone", 1800000000),
+        ("at 9 pm", at(0, 21)),
+        ("8:30am tomorrow", at(1, 8, 30)),
+        ("tomorrow 9pm", at(1, 21)),
+        ("sunday 7:15pm", at(1, 19, 15)),
+        ("next saturday 9pm", at(7, 21)),
+        ("in 45m", base + 45 * 60),
+        ("starts in 1h 30m", base + 90 * 60),
+        ("in 2 hours", base + 7200),
+        ("Top 10 players only, 11pm", at(0, 23)),
+        ("bring 2 pots and food", None),
+        ("3v3 scrims, join below", None),
+        ("noon", at(0, 12)),
+        ("Siege at 8 PM sharp.", at(0, 20)),
+        ("11am", at(1, 11) if now_local.hour >= 11 else at(0, 11)),
+        ("friday 20:00", at(6, 20)),
+    ]
+
+
+async def bench_timeparse(args) -> None:
+    """Accuracy and parses per second on line-up texts: regex pair vs. tokenizer (cold and cached)."""
+    now_local = dt.datetime(2026, 10, 17, 10, 0, tzinfo=bot.PH_TZ)
+    now = now_local.astimezone(dt.timezone.utc)
+    corpus = time_corpus(now_local)
+
+    def score(parse) -> int:
+        return sum(parse(text) == expected for text, expected in corpus)
+
+    def rate(parse) -> float:
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            for text, _expected in corpus:
+                parse(text)
+        return args.rounds * len(corpus) / (time.perf_counter() - t0)
+
+    legacy = lambda text: legacy_time_from_text(text, now)
+    tokenizer = lambda text: bot._time_from_text(text, now)
+    uncached = lambda text: (lambda e: e.resolve(now) if e else None)(bot.parse_time_expression.__wrapped__(text))
+    misses = [text for text, expected in corpus if tokenizer(text) != expected]
+    print(f"corpus:           {len(corpus)} texts")
+    print(f"legacy accuracy:  {score(legacy)}/{len(corpus)}")
+    print(f"new accuracy:     {score(tokenizer)}/{len(corpus)}" + (f" (missed: {misses})" if misses else ""))
+    print(f"legacy:           {rate(legacy):,.0f} parses/s")
+    print(f"tokenizer, cold:  {rate(uncached):,.0f} parses/s")
+    bot.parse_time_expression.cache_clear()
+    print(f"tokenizer, LRU:   {rate(tokenizer):,.0f} parses/s ({bot.parse_time_expression.cache_info().hits:,} hits)")
+
+
+class FakeReaction:
+    """Reaction whose users() returns one page (at most 100) per call, with a fixed latency."""
+    def __init__(self, emoji: str, user_ids: list[int], latency: float):
+        self.emoji = emoji
+        self.count = len(user_ids) + 1  # plus the bot's own reaction
+        self._users = [types.SimpleNamespace(id=1, bot=True, name="bot")] + [FakeMember(uid) for uid in user_ids]
+        self.latency = latency
+        self.pages = 0
+
+    async def users(self, limit=100, after=None):
+        start = 0 if after is None else next(i for i, u in enumerate(self._users) if u.id == after.id) + 1
+        self.pages += 1
+        await asyncio.sleep(self.latency)
+        for user in self._users[start:start + min(limit or 100, 100)]:
+            yield user
+
+
+class FakeLineupChannel:
+    """History of `lineups` line-up messages from the bot, interleaved with chatter."""
+    def __init__(self, lineups: int, members: int, latency: float):
+        self.id = 30
+        self.guild = types.SimpleNamespace(id=1, get_member=lambda uid: None)
+        self.latency = latency
+        self.pages = 0
+        self.reactions: list[FakeReaction] = []
+        self.messages = []
+        for i in range(lineups):
+            joined = list(range(1000 + i, 1000 + i + members))
+            declined = list(range(5000 + i, 5000 + i + members // 4))
+            reactions = [FakeReaction("✅", joined, latency), FakeReaction("❌", declined, latency)]
+            self.reactions.extend(reactions)
+            embed = types.SimpleNamespace(title="⚔ Siege Line-Up ⚔", description=f"Siege #{i}")
+            self.messages.append(types.SimpleNamespace(
+                id=10**6 + i, author=types.SimpleNamespace(id=1), embeds=[embed], reactions=reactions,
+                channel=self, guild=self.guild,
+            ))
+            self.messages.append(types.SimpleNamespace(id=2 * 10**6 + i, author=types.SimpleNamespace(id=2), embeds=[], reactions=[]))
+
+    async def history(self, limit=100, before=None):
+        start = 0 if before is None else self.messages.index(before) + 1
+        self.pages += 1
+        await asyncio.sleep(self.latency)
+        for msg in self.messages[start:start + min(limit or 100, 100)]:
+            yield msg
+
+
+async def bench_recovery(args) -> None:
+    """Cold-start line-up recovery from channel history, sequential vs. bounded-parallel."""
+    bot.store.close()
+    bot.bot.get_guild = lambda gid: None  # recovered line-ups are not re-rendered here
+    for concurrency in (1, args.concurrency):
+        bot.lineups.clear()
+        channel = FakeLineupChannel(args.lineups, args.members, args.latency)
+        bot.bot.get_channel = lambda cid: channel if cid == channel.id else None
+        report = await bot.recover_lineups([channel.id], author_id=1, scan=len(channel.messages), concurrency=concurrency)
+        pages = sum(r.pages for r in channel.reactions)
+        assert report.api_calls == pages + channel.pages, f"{report.api_calls} counted, {pages + channel.pages} made"
+        print(f"concurrency {concurrency:>3}:  {report.summary()} ({pages} reaction page(s) fetched)")
+    members = sum(len(lineup) for lineup in bot.lineups.values())
+    print(f"restored:         {len(bot.lineups)} line-up(s), {members} member entries")
+
+
+class SlowStream:
+    """A console that takes `delay` seconds per write, like a congested pipe or slow terminal."""
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        self.writes += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+async def bench_logging(args) -> None:
+    """Time the event loop spends per log line: print(flush=True) vs. queued, sampled log_event()."""
+    bot.log.setLevel(bot.logging.INFO)
+    sink = SlowStream(args.write_delay)
+
+    t0 = time.perf_counter()
+    for i in range(args.events):
+        print(f"[REACTION] add message=1 user={i} emoji=✅", file=sink, flush=True)
+    t_print = time.perf_counter() - t0
+
+    bot._log_output.setStream(SlowStream(args.write_delay))
+    t0 = time.perf_counter()
+    for i in range(args.events):
+        bot.log_event("reaction", action="add", message_id=1, user_id=i, emoji="✅")
+    t_reaction = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(args.events):
+        bot.log_event("command", command="ping", kind="prefix", user_id=i)
+    t_command = time.perf_counter() - t0
+    bot.log.setLevel(bot.logging.NOTSET)
+
+    per = lambda t: t / args.events * 1e6
+    print(f"events:           {args.events} per run, sink {args.write_delay * 1000:.1f} ms/write")
+    print(f"print+flush:      {per(t_print):,.1f} us/event on the loop")
+    print(f"log_event:        {per(t_command):,.1f} us/event on the loop (unsampled; "
+          f"{bot.LOG_DROPPED.value():.0f} dropped at queue size {bot.LOG_QUEUE_SIZE})")
+    print(f"sampled reaction: {per(t_reaction):,.1f} us/event (rate {bot.LOG_SAMPLES['reaction']}, "
+          f"{bot.LOG_SAMPLED_OUT.value('reaction'):.0f} skipped)")
+
+
+def legacy_lineup(uids: list[int]) -> dict:
+    """The pre-model line-up layout: a dict holding one ordered dict per side."""
+    state = {"join": {}, "no": {}, "text": "Saturday 8pm", "title": "Siege Line-Up", "channel_id": 10, "guild_id": 1}
+    for i, uid in enumerate(uids):
+        state["join" if i % 5 else "no"][uid] = None
+    return state
+
+
+def model_lineup(uids: list[int]):
+    lineup = bot.Lineup("Siege Line-Up", "Saturday 8pm", 10, 1)
+    for i, uid in enumerate(uids):
+        lineup.set(uid, "join" if i % 5 else "no")
+    return lineup
+
+
+def _bytes_per_lineup(build, uids: list[int], copies: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(uids) for _ in range(copies)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / copies
+
+
+async def bench_lineupmem(args) -> None:
+    """Memory per line-up and toggle cost, dict of per-side dicts vs. the slotted Lineup model."""
+    print(f"{'participants':>12} {'dicts B':>10} {'Lineup B':>10} {'saved':>7} {'dict toggle':>12} {'Lineup toggle':>14}")
+    for size in args.sizes:
+        # Snowflake-sized IDs, created once: both layouts reference the same int objects
+        uids = [(1 << 60) + i * 4099 for i in range(size)]
+        copies = max(1, args.budget // max(1, size))
+        legacy = _bytes_per_lineup(legacy_lineup, uids, copies)
+        model = _bytes_per_lineup(model_lineup, uids, copies)
+
+        state, lineup = legacy_lineup(uids), model_lineup(uids)
+        rounds = args.toggles
+        t0 = time.perf_counter()
+        for i in range(rounds):
+            uid = uids[i % size]
+            side, other = ("join", "no") if i % 2 else ("no", "join")
+            state[other].pop(uid, None)
+            state[side][uid] = None
+        t_legacy = (time.perf_counter() - t0) / rounds
+        t0 = time.perf_counter()
+        for i in range(rounds):
+            lineup.set(uids[i % size], "join" if i % 2 else "no")
+        t_model = (time.perf_counter() - t0) / rounds
+        print(f"{size:>12,} {legacy:>10,.0f} {model:>10,.0f} {1 - model / legacy:>6.0%} "
+              f"{t_legacy * 1e9:>9,.0f} ns {t_model * 1e9:>11,.0f} ns")
+    print("(bytes exclude the member ID ints, which both layouts share)")
+
+
+class ResidentUser:
+    """Stand-in for nextcord's User with the same slotted fields, for memory comparisons."""
+    __slots__ = ("id", "name", "global_name", "discriminator", "_avatar", "_banner", "_accent_colour",
+                 "bot", "system", "_public_flags", "_state")
+
+    def __init__(self, uid: int):
+        self.id = uid
+        self.name = f"member{uid}"
+        self.global_name = f"Member {uid}"
+        self.discriminator = "0"
+        self._avatar = f"{uid:032x}"
+        self._banner = self._accent_colour = None
+        self.bot = self.system = False
+        self._public_flags = 0
+        self._state = None
+
+
+class ResidentMember:
+    """Stand-in for a cached nextcord Member: its own fields plus a User."""
+    __slots__ = ("_user", "guild", "joined_at", "premium_since", "_roles", "nick", "pending", "_avatar",
+                 "activities", "_client_status", "_state", "_flags", "_timeout")
+
+    def __init__(self, uid: int, guild):
+        self._user = ResidentUser(uid)
+        self.guild = guild
+        self.joined_at = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(seconds=uid)
+        self.premium_since = None
+        self._roles = [10**17 + uid % 7, 10**17 + 100 + uid % 3]
+        self.nick = f"Nick{uid}" if uid % 3 == 0 else None
+        self.pending = False
+        self._avatar = None
+        self.activities = ()
+        self._client_status = {None: "offline"}
+        self._state = None
+        self._flags = 0
+        self._timeout = None
+
+    @property
+    def id(self) -> int:
+        return self._user.id
+
+    @property
+    def bot(self) -> bool:
+        return False
+
+    @property
+    def display_name(self) -> str:
+        return self.nick or self._user.global_name
+
+
+class ProfileGuild:
+    """A guild of `members`: all resident (default profile) or none, fetched on demand (lean)."""
+    def __init__(self, members: int, resident: bool):
+        self.id = 1
+        self.member_count = members
+        self.fetches = 0
+        self._members = {uid: ResidentMember(uid, self) for uid in range(1, members + 1)} if resident else {}
+
+    def get_member(self, uid: int):
+        return self._members.get(uid)
+
+    async def fetch_member(self, uid: int):
+        self.fetches += 1
+        return ResidentMember(uid, self)
+
+
+def _rss_kib() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def _memory_child(args) -> None:
+    """One profile, one guild size: RSS after the member cache fills and a line-up is reacted to and rendered."""
+    bot.store.close()
+    bot.lineup_edits = bot.LineupEditCoalescer(0)
+    members = args.members[0]
+    baseline = _rss_kib()
+    guild = ProfileGuild(members, resident=not bot.LEAN_PROFILE)
+    channel = FakeChannel(10, guild, latency=0)
+    install_fakes(guild, channel)
+    bot.lineups.clear()
+    bot.lineups[1000] = bot.Lineup("Siege Line-Up", "", channel.id, guild.id)
+    active = min(args.active, members)
+    for uid in range(1, active + 1):
+        # Reaction payloads carry the member whether or not nextcord caches it
+        member = guild.get_member(uid) or ResidentMember(uid, guild)
+        await bot.on_raw_reaction_add(reaction_payload(1000, member, "✅" if uid % 4 else "❌"))
+    while bot.lineup_edits._pending:
+        await asyncio.sleep(0.01)
+    bot._render_lineup(1000)
+    print(f"{bot.RUNTIME_PROFILE} {members} {_rss_kib()} {_rss_kib() - baseline} {guild.fetches}")
+
+
+async def bench_memory(args) -> None:
+    """RSS against guild member count for the default and lean runtime profiles."""
+    if args.child:
+        return await _memory_child(args)
+    import subprocess
+    print(f"line-up:          {args.active} reacting member(s); each run is a fresh process")
+    print(f"{'profile':<8} {'members':>8} {'RSS MiB':>8} {'cache MiB':>10} {'fetches':>8}")
+    for members in args.members:
+        for profile in ("default", "lean"):
+            env = dict(os.environ, RUNTIME_PROFILE=profile)
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "memory", "--child", "--members", str(members),
+                 "--active", str(args.active)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout.split()
+            _, _, rss, delta, fetches = out[-5:]
+            print(f"{profile:<8} {members:>8} {int(rss) / 1024:>8.1f} {int(delta) / 1024:>10.1f} {fetches:>8}")
+
+
+class FakeGlobalLimitAPI:
+    """Discord's global budget as seen by a client: `rate` requests/s, granted first come, first served."""
+    def __init__(self, rate: float, latency: float):
+        self.rate = rate
+        self.latency = latency
+        self.calls = 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def call(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + 1 / self.rate
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+
+
+async def _outbound_workload(args, submit) -> dict:
+    """A burst of edits and cleanup deletes with announcements arriving in the middle of it."""
+    latencies = {"announce": [], "edit": [], "background": []}
+
+    async def one(lane: str, route: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        await submit(lane, route)
+        latencies[lane].append(time.perf_counter() - started)
+
+    tasks = [one("edit", f"edit:{i % args.channels}", 0) for i in range(args.edits)]
+    tasks += [one("background", f"delete:{i % args.channels}", 0) for i in range(args.deletes)]
+    spread = (args.edits + args.deletes) / args.rate
+    tasks += [one("announce", f"send:{i % args.channels}", spread * (i + 1) / (args.announces + 1)) for i in range(args.announces)]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return {"wall": time.perf_counter() - started, "latencies": latencies}
+
+
+async def bench_outbound(args) -> None:
+    """Announcement latency during an edit/delete burst: direct awaits vs. the prioritised outbound queue."""
+    print(f"workload:         {args.edits} edits + {args.deletes} deletes at once over {args.channels} channel(s), "
+          f"{args.announces} announcements during the burst; global budget {args.rate:g}/s, {args.latency * 1000:.0f} ms latency")
+    api = FakeGlobalLimitAPI(args.rate, args.latency)
+
+    async def direct(lane: str, route: str):
+        await api.call()
+
+    queue = bot.OutboundQueue(args.rate, args.workers, bot.OUTBOUND_ROUTE_CONCURRENCY)
+
+    async def queued(lane: str, route: str):
+        await queue.run(lane, route, api.call)
+
+    for name, submit in (("direct", direct), ("queued", queued)):
+        result = await _outbound_workload(args, submit)
+        for lane, samples in result["latencies"].items():
+            ms = lambda q: _percentile(samples, q) * 1000
+            print(f"{name:<7} {lane:<10} p50 {ms(0.50):8.0f} ms  p99 {ms(0.99):8.0f} ms  ({len(samples)} calls)")
+        print(f"{name:<7} wall {result['wall']:.1f}s")
+    waits = bot.OUTBOUND_WAIT
+    for lane in bot.OUTBOUND_LANES:
+        series = waits._series.get((lane,))
+        if series:
+            print(f"queue wait        {lane:<10} mean {series[1] / series[2] * 1000:.0f} ms over {series[2]} call(s)")
+
+
+class FakeDeleteChannel:
+    """Channel stub counting single and bulk deletes."""
+    def __init__(self, channel_id: int, latency: float):
+        self.id = channel_id
+        self.latency = latency
+        self.single = 0
+        self.bulk = 0
+        self.deleted = 0
+
+    def message(self, msg_id: int):
+        channel = self
+
+        async def delete(delay=None):
+            if delay:
+                await asyncio.sleep(delay)  # what nextcord's delete_after does
+            await asyncio.sleep(channel.latency)
+            channel.single += 1
+            channel.deleted += 1
+        return types.SimpleNamespace(id=msg_id, channel=self, delete=delete)
+
+    async def delete_messages(self, messages):
+        await asyncio.sleep(self.latency)
+        self.bulk += 1
+        self.deleted += len(messages)
+
+
+async def bench_deletions(args) -> None:
+    """Transient replies under command spam: one sleeping task per message vs. the deletion queue."""
+    bot.outbound = bot.OutboundQueue(1e6, 10**6, 10**6)  # count API calls, not the rate budget
+    gap = args.duration / args.messages
+    for mode in ("delete_after", "queue"):
+        channels = [FakeDeleteChannel(c, args.latency) for c in range(args.channels)]
+        tracemalloc.start()
+        peak_tasks = 0
+        started = time.perf_counter()
+        for i in range(args.messages):
+            channel = channels[i % args.channels]
+            message = channel.message(i)
+            if mode == "delete_after":
+                asyncio.create_task(message.delete(delay=args.ttl))
+            else:
+                bot.deletions.schedule(channel, message, args.ttl)
+            if i % 50 == 0:
+                peak_tasks = max(peak_tasks, len(asyncio.all_tasks()))
+            await asyncio.sleep(gap)
+        _, peak_mem = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        while sum(c.deleted for c in channels) < args.messages:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        single, bulk = sum(c.single for c in channels), sum(c.bulk for c in channels)
+        print(f"{mode:<13} {single + bulk:>5} API call(s) ({bulk} bulk, {single} single), "
+              f"peak {peak_tasks} task(s), {peak_mem / 1024:,.0f} KiB peak, done in {elapsed:.1f}s")
+
+
+class FakeCommandContext:
+    """Prefix-command context whose sends take `latency` seconds."""
+    def __init__(self, guild: FakeGuild, channel: FakeChannel, author: FakeMember, latency: float):
+        self.guild, self.channel, self.author = guild, channel, author
+        self.latency = latency
+
+    async def send(self, content=None, **_kwargs):
+        await asyncio.sleep(self.latency)
+        return types.SimpleNamespace(id=0, content=content)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def _loop_workload(args) -> dict:
+    """Fire reactions and commands at a fixed rate as tasks; time each from arrival to completion."""
+    guild = FakeGuild(args.members)
+    channel = FakeChannel(10, guild, latency=args.latency)
+    install_fakes(guild, channel)
+    bot.lineups.clear()
+    message_ids = [1000 + i for i in range(args.lineups)]
+    for msg_id in message_ids:
+        bot.lineups[msg_id] = bot.Lineup("Siege Line-Up", "", channel.id, guild.id)
+    bot.lineup_edits = bot.LineupEditCoalescer(args.window)
+    # Lift the outbound budget so the numbers measure the loop, not the rate limit
+    bot.outbound = bot.OutboundQueue(1e6, 10**6, 10**6)
+    monitor = bot.SlowCallbackMonitor(args.slow_ms / 1000)
+    monitored = monitor.install()
+    latencies = {"reaction": [], "command": []}
+
+    async def _timed(kind: str, arrived: float, coro) -> None:
+        await coro
+        latencies[kind].append(time.perf_counter() - arrived)
+
+    tasks = []
+    gap = 1 / args.rate
+    started = time.perf_counter()
+    try:
+        for i in range(args.events):
+            due = started + i * gap
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            member = guild.get_member(1 + i % args.members)
+            if i % args.command_every == 0:
+                ctx = FakeCommandContext(guild, channel, member, args.latency)
+                inv = bot.Invocation("nextffa", "prefix", guild, channel, member, ctx=ctx)
+                tasks.append(asyncio.create_task(_timed("command", due, bot.dispatch(inv))))
+            else:
+                payload = reaction_payload(message_ids[i % len(message_ids)], member, "✅" if i % 3 else "❌")
+                handler = bot.on_raw_reaction_remove if i % 7 == 0 else bot.on_raw_reaction_add
+                tasks.append(asyncio.create_task(_timed("reaction", due, handler(payload))))
+        await asyncio.gather(*tasks)
+        while bot.lineup_edits._pending:
+            await asyncio.sleep(0.01)
+    finally:
+        monitor.uninstall()
+    return {
+        "wall": time.perf_counter() - started,
+        "latencies": latencies,
+        "edits": bot.lineup_edits.sent,
+        "slow": monitor.slow if monitored else None,
+    }
+
+
+def _run_loop(factory, args) -> dict:
+    with asyncio.Runner(loop_factory=factory) as runner:
+        return runner.run(_loop_workload(args))
+
+
+async def bench_loop(args) -> None:
+    """p50/p99 handler latency for a reaction + command workload on each event loop implementation."""
+    bot.store.close()
+    bot.log.setLevel(bot.logging.ERROR)  # keep slow_callback lines out of the table
+    loops = [("asyncio", asyncio.new_event_loop)]
+    try:
+        import uvloop
+        loops.append(("uvloop", uvloop.new_event_loop))
+    except ImportError:
+        print("uvloop:           not installed (pip install uvloop), comparing asyncio only")
+    print(f"workload:         {args.events} events at {args.rate}/s, 1 in {args.command_every} a command, "
+          f"{args.lineups} line-up(s), {args.latency * 1000:.0f} ms API latency")
+    for name, factory in loops:
+        # A fresh thread per loop so each gets its own Runner outside this one
+        result = await asyncio.to_thread(_run_loop, factory, args)
+        for kind, samples in result["latencies"].items():
+            ms = lambda q: _percentile(samples, q) * 1000
+            print(f"{name:<8} {kind:<8} p50 {ms(0.50):7.2f} ms  p99 {ms(0.99):7.2f} ms  ({len(samples)} handled)")
+        slow = "n/a (uvloop handles are not instrumented)" if result["slow"] is None else result["slow"]
+        print(f"{name:<8} wall {result['wall']:.2f}s, {result['edits']} edits, slow callbacks over {args.slow_ms:g} ms: {slow}")
+    bot.log.setLevel(bot.logging.NOTSET)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="name", required=True)
+
+    p = sub.add_parser("coalesce", help="lineup edit coalescing under a reaction storm")
+    p.add_argument("--reactions", type=int, default=1000)
+    p.add_argument("--duration", type=float, default=5.0, help="seconds over which reactions arrive")
+    p.add_argument("--window", type=float, default=bot.LINEUP_EDIT_WINDOW)
+    p.add_argument("--latency", type=float, default=0.05, help="simulated edit round-trip")
+    p.set_defaults(func=bench_coalesce)
+
+    p = sub.add_parser("restore", help="state store write batching and cold restore time")
+    p.add_argument("--lineups", type=int, default=10000)
+    p.add_argument("--members", type=int, default=20)
+    p.set_defaults(func=bench_restore)
+
+    p = sub.add_parser("lifecycle", help="hot line-ups after a cold start with months of history")
+    p.add_argument("--lineups", type=int, default=2000)
+    p.add_argument("--members", type=int, default=40)
+    p.add_argument("--days", type=float, default=90)
+    p.add_argument("--ahead", type=float, default=24, help="hours the newest event is still ahead")
+    p.set_defaults(func=bench_lifecycle)
+
+    p = sub.add_parser("scheduler", help="memory per pending timer, tasks vs. scheduler")
+    p.add_argument("--timers", type=int, default=10000)
+    p.set_defaults(func=bench_scheduler)
+
+    p = sub.add_parser("recurring", help="next FFA lookup, legacy scan vs. compiled schedule")
+    p.add_argument("--calls", type=int, default=100000)
+    p.set_defaults(func=bench_recurring)
+
+    p = sub.add_parser("fanout", help="announce N participants to a stub channel")
+    p.add_argument("--participants", type=int, default=1000)
+    p.add_argument("--latency", type=float, default=0.1, help="simulated send round-trip")
+    p.add_argument("--concurrency", type=int, default=bot.FANOUT_CONCURRENCY)
+    p.add_argument("--fail-every", type=int, default=5, help="inject a 429 every N sends (0 = never)")
+    p.set_defaults(func=bench_fanout)
+
+    p = sub.add_parser("render", help="incremental line-up embed rendering")
+    p.add_argument("--members", type=int, default=500)
+    p.set_defaults(func=bench_render)
+
+    p = sub.add_parser("perms", help="CREATOR role checks per second")
+    p.add_argument("--roles", type=int, default=100)
+    p.add_argument("--checks", type=int, default=100000)
+    p.set_defaults(func=bench_perms)
+
+    p = sub.add_parser("purge", help="streaming purge vs. capped purge() calls")
+    p.add_argument("--messages", type=int, default=5000)
+    p.add_argument("--old-every", type=int, default=10, help="1/N of the history is older than 14 days (0 = none)")
+    p.add_argument("--latency", type=float, default=0.05, help="simulated delete round-trip")
+    p.add_argument("--single-interval", type=float, default=0.0, help="pause between single deletes")
+    p.set_defaults(func=bench_purge)
+
+    p = sub.add_parser("timeparse", help="time-expression accuracy and throughput")
+    p.add_argument("--rounds", type=int, default=2000)
+    p.set_defaults(func=bench_timeparse)
+
+    p = sub.add_parser("recovery", help="line-up recovery from Discord history on startup")
+    p.add_argument("--lineups", type=int, default=300)
+    p.add_argument("--members", type=int, default=40)
+    p.add_argument("--latency", type=float, default=0.05, help="simulated page round-trip")
+    p.add_argument("--concurrency", type=int, default=bot.LINEUP_RECOVERY_CONCURRENCY)
+    p.set_defaults(func=bench_recovery)
+
+    p = sub.add_parser("logging", help="event-loop time per log line under a slow console")
+    p.add_argument("--events", type=int, default=5000)
+    p.add_argument("--write-delay", type=float, default=0.0005, help="seconds per console write")
+    p.set_defaults(func=bench_logging)
+
+    p = sub.add_parser("lineupmem", help="memory per line-up, per-side dicts vs. the Lineup model")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    p.add_argument("--budget", type=int, default=200000, help="participants built per size (spread over copies)")
+    p.add_argument("--toggles", type=int, default=200000)
+    p.set_defaults(func=bench_lineupmem)
+
+    p = sub.add_parser("memory", help="RSS against member count, default vs. lean runtime profile")
+    p.add_argument("--members", type=int, nargs="+", default=[1000, 10000, 50000, 100000])
+    p.add_argument("--active", type=int, default=500, help="members who react to the line-up")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.set_defaults(func=bench_memory)
+
+    p = sub.add_parser("outbound", help="announcement latency under an edit burst, direct vs. priority queue")
+    p.add_argument("--edits", type=int, default=300)
+    p.add_argument("--deletes", type=int, default=100)
+    p.add_argument("--announces", type=int, default=10)
+    p.add_argument("--channels", type=int, default=10)
+    p.add_argument("--rate", type=float, default=50, help="global requests per second")
+    p.add_argument("--workers", type=int, default=bot.OUTBOUND_WORKERS)
+    p.add_argument("--latency", type=float, default=0.05, help="simulated API round-trip")
+    p.set_defaults(func=bench_outbound)
+
+    p = sub.add_parser("deletions", help="transient reply cleanup, per-message sleeps vs. the deletion queue")
+    p.add_argument("--messages", type=int, default=2000)
+    p.add_argument("--channels", type=int, default=5)
+    p.add_argument("--duration", type=float, default=4.0, help="seconds over which replies are sent")
+    p.add_argument("--ttl", type=float, default=bot.REPLY_DELETE_AFTER)
+    p.add_argument("--latency", type=float, default=0.05, help="simulated delete round-trip")
+    p.set_defaults(func=bench_deletions)
+
+    p = sub.add_parser("loop", help="handler latency under a reaction + command workload, asyncio vs. uvloop")
+    p.add_argument("--events", type=int, default=20000)
+    p.add_argument("--rate", type=float, default=4000, help="events per second")
+    p.add_argument("--command-every", type=int, default=20, help="1 in N events is a command")
+    p.add_argument("--lineups", type=int, default=20)
+    p.add_argument("--members", type=int, default=2000)
+    p.add_argument("--window", type=float, default=bot.LINEUP_EDIT_WINDOW)
+    p.add_argument("--latency", type=float, default=0.02, help="simulated API round-trip")
+    p.add_argument("--slow-ms", type=float, default=bot.SLOW_CALLBACK_MS, help="slow callback threshold")
+    p.set_defaults(func=bench_loop)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.func(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,25 @@ import io
 import os
 import atexit
 import logging
+import logging.handlers
 from aiohttp import web
 from zoneinfo import ZoneInfo
-import asyncio
 import datetime as dt
 import re
+import sqlite3
+import threading
+import queue
+import time
+import heapq
+import itertools
+import bisect
+import json
+import hashlib
+import struct
+import contextlib
+import random
+from collections import OrderedDict, deque
+from functools import lru_cache, partial
 
 try:
     # Optional .env loader if available
@@ -31,13 +45,98 @@ if sys.platform == "win32":
         # Safely ignore if the environment doesn't support reconfigure
         pass
 
-logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+# --- LOGGING ---
+# Records go onto a bounded queue and are formatted and written by a
+# QueueListener thread, so a slow stdout never stalls the event loop; when
+# the queue is full records are dropped and counted. Bot events are logged as
+# one JSON object per line (LOG_FORMAT=text for a readable console) and hot
+# events such as reactions are sampled (LOG_SAMPLE).
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+def _load_log_samples() -> dict[str, float]:
+    samples = {"reaction": 0.01, "lineup_edit": 0.05}
+    raw = (os.getenv("LOG_SAMPLE") or "").strip()
+    if raw:
+        try:
+            samples.update({str(k): float(v) for k, v in json.loads(raw).items()})
+        except Exception as e:
+            sys.stderr.write(f"Ignoring invalid LOG_SAMPLE: {e}\n")
+    return samples
+
+LOG_SAMPLES = _load_log_samples()
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower()}
+        event = getattr(record, "event", None)
+        if event is None:
+            entry["event"] = "log"
+            entry["logger"] = record.name
+            entry["msg"] = record.getMessage()
+        else:
+            entry["event"] = event
+            entry.update(record.fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"[{record.levelname}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread, not the caller's
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+_log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output)
+logging.root.handlers[:] = [_DroppingQueueHandler(_log_queue)]
+logging.root.setLevel(LOG_LEVEL)
 logging.getLogger('nextcord').setLevel(logging.ERROR)
 logging.getLogger('nextcord.http').setLevel(logging.ERROR)
 logging.getLogger('nextcord.gateway').setLevel(logging.ERROR)
 logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
 if (os.getenv("QUIET_LOGS", "1").strip().lower() in {"1", "true", "yes"}):
-    logging.disable(logging.WARNING)
+    # Library chatter only; the bot's own events follow LOG_LEVEL
+    logging.getLogger('aiohttp').setLevel(logging.ERROR)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+log = logging.getLogger("bot")
+
+def log_event(event: str, level: int = logging.INFO, *, exc_info=None, **fields) -> None:
+    """Log one structured event; events listed in LOG_SAMPLE are kept at that rate."""
+    if not log.isEnabledFor(level):
+        return
+    rate = LOG_SAMPLES.get(event, 1.0)
+    if rate < 1.0:
+        if random.random() >= rate:
+            LOG_SAMPLED_OUT.inc(event)
+            return
+        fields["sample_rate"] = rate
+    log.log(level, event, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+def swallowed(site: str, error: BaseException) -> None:
+    """Count an exception a handler deliberately ignores, and log it (with traceback at DEBUG)."""
+    SWALLOWED_ERRORS.inc(site)
+    log_event("swallowed", logging.WARNING, site=site, error=repr(error),
+              exc_info=error if log.isEnabledFor(logging.DEBUG) else None)
 
 # (Timezone removed; siege/secret room features deleted)
 
@@ -66,378 +165,2757 @@ BOT_NICKNAME = os.getenv("BOT_NICKNAME", "").strip()  # Optional: set per-server
 # Guild-specific registration for instant slash command availability
 GUILD_ID = int(os.getenv("GUILD_ID", "1156881904394567751"))
 ANNOUNCE_CHANNEL_ID = int(os.getenv("ANNOUNCE_CHANNEL_ID", "1438432294992871475"))
+# Where slash commands are registered: comma-separated guild IDs, or "global"
+_slash_guilds_env = (os.getenv("SLASH_GUILD_IDS") or "").strip()
+SLASH_GUILD_IDS: list[int] | None = (
+    None if _slash_guilds_env.lower() == "global"
+    else ([int(g) for g in _slash_guilds_env.split(",") if g.strip()] or [GUILD_ID])
+)
+
+# Sharding: SHARD_COUNT > 0 switches to AutoShardedBot. SHARD_PROCESSES > 1
+# makes `python bot.py` a launcher that spreads the shards over worker
+# processes; each worker gets its SHARD_IDS and WORKER_INDEX from the launcher.
+SHARD_PROCESSES = max(1, int(os.getenv("SHARD_PROCESSES", "1")))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or (SHARD_PROCESSES if SHARD_PROCESSES > 1 else 0)
+SHARD_IDS: list[int] | None = [int(x) for x in (os.getenv("SHARD_IDS") or "").split(",") if x.strip()] or None
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
 
 # (Removed siege/secret room schedules)
 
 # --- BOT SETUP ---
-intents = nextcord.Intents.default()
-intents.message_content = True
-intents.guilds = True
-intents.members = True
-intents.reactions = True
-
-bot = commands.Bot(command_prefix="!", intents=intents)
+# RUNTIME_PROFILE=lean subscribes only to the guild, message and reaction
+# events the bot reads and drops the privileged member list, so nextcord keeps
+# no members resident. Names for line-ups come from reaction payloads and are
+# fetched one member at a time on a miss (see MemberFetcher).
+RUNTIME_PROFILE = os.getenv("RUNTIME_PROFILE", "default").strip().lower()
+LEAN_PROFILE = RUNTIME_PROFILE == "lean"
+
+if LEAN_PROFILE:
+    intents = nextcord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.guild_reactions = True
+    intents.message_content = True
+else:
+    intents = nextcord.Intents.default()
+    intents.message_content = True
+    intents.guilds = True
+    intents.members = True
+    intents.reactions = True
+
+# Line-ups track reactions via raw events, so the message cache only serves
+# nextcord internals and can stay small. 0 disables it entirely (the lean default).
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "0" if LEAN_PROFILE else "100")) or None
+
+_bot_options = dict(command_prefix="!", intents=intents, max_messages=MAX_MESSAGES)
+if LEAN_PROFILE:
+    _bot_options.update(member_cache_flags=nextcord.MemberCacheFlags.none(), chunk_guilds_at_startup=False)
+
+if SHARD_COUNT > 0:
+    bot = commands.AutoShardedBot(shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **_bot_options)
+else:
+    bot = commands.Bot(**_bot_options)
+
+def _owns_guild(guild_id: int | None) -> bool:
+    """True if this process's shards serve `guild_id` (always true unsharded)."""
+    if SHARD_COUNT <= 0 or SHARD_IDS is None or not guild_id:
+        return True
+    return ((guild_id >> 22) % SHARD_COUNT) in SHARD_IDS
 START_TIME: dt.datetime | None = None
-ANNOUNCE_TASK: asyncio.Task | None = None
 PH_TZ = ZoneInfo("Asia/Manila")
 FFA_TIMES = [11, 14, 17, 20, 23, 2, 5, 8]
 FFA_MESSAGE = "REGISTER FFA NOW, FFA START SOON"
 WORLD_BOSS_MESSAGE = "World Boss Started! Prepare your gear."
+
+# --- METRICS ---
+# Minimal Prometheus-style instruments, cheap enough to leave on in hot
+# paths: a counter bump is one dict update, a histogram observation one
+# bisect. Gauges are read from callbacks at scrape time only.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_label_value(v)}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    __slots__ = ("name", "help", "labels", "_values")
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, v in self._values.items():
+            out.append(f"{self.name}{_label_str(self.labels, labels)} {v:g}")
+        return out
+
+class Gauge:
+    __slots__ = ("name", "help", "labels", "_values", "_fn")
+
+    def __init__(self, name: str, help: str, fn=None, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels, self._fn = name, help, labels, fn
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self._fn is not None:
+            try:
+                out.append(f"{self.name} {float(self._fn()):g}")
+            except Exception as e:
+                swallowed("metrics_gauge", e)
+        for labels, v in self._values.items():
+            out.append(f"{self.name}{_label_str(self.labels, labels)} {v:g}")
+        return out
+
+class Histogram:
+    __slots__ = ("name", "help", "labels", "buckets", "_series")
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            running = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                running += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                out.append(f"{self.name}_bucket{_label_str(self.labels + ('le',), labels + (le,))} {running}")
+            out.append(f"{self.name}_sum{_label_str(self.labels, labels)} {total:g}")
+            out.append(f"{self.name}_count{_label_str(self.labels, labels)} {count}")
+        return out
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+COMMAND_LATENCY = metrics.register(Histogram("bot_command_duration_seconds", "Command handler latency", ("command", "kind")))
+COMMAND_ERRORS = metrics.register(Counter("bot_command_errors_total", "Commands that raised", ("command", "kind")))
+SWALLOWED_ERRORS = metrics.register(Counter("bot_swallowed_exceptions_total", "Exceptions caught and ignored by handlers", ("site",)))
+LOG_DROPPED = metrics.register(Counter("bot_log_records_dropped_total", "Log records dropped because the log queue was full"))
+STATE_OPS_DROPPED = metrics.register(Counter("bot_state_ops_dropped_total", "State store writes given up after retries"))
+LOG_SAMPLED_OUT = metrics.register(Counter("bot_log_records_sampled_out_total", "Log records skipped by sampling", ("event",)))
+COMMAND_CALLS = metrics.register(Counter("bot_commands_total", "Command invocations by outcome", ("command", "kind", "outcome")))
+REACTION_TO_EDIT = metrics.register(Histogram("bot_lineup_reaction_to_edit_seconds", "Time from a lineup reaction to the edit showing it"))
+LINEUP_EDITS = metrics.register(Counter("bot_lineup_edits_total", "Lineup embed edits by result", ("result",)))
+HTTP_429 = metrics.register(Counter("bot_http_429_total", "Rate-limited Discord responses seen by the bot", ("route",)))
+LOOP_LAG = metrics.register(Histogram("bot_event_loop_lag_seconds", "Event-loop scheduling delay from the sampling probe",
+                                      buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)))
+LOOP_LAG_LAST = metrics.register(Gauge("bot_event_loop_lag_last_seconds", "Most recent event-loop lag sample"))
+metrics.register(Gauge("bot_gateway_latency_seconds", "Gateway heartbeat latency", lambda: bot.latency))
+metrics.register(Gauge("bot_uptime_seconds", "Seconds since on_ready", lambda: (dt.datetime.now(dt.timezone.utc) - START_TIME).total_seconds() if START_TIME else 0))
+
+LOOP_LAG_INTERVAL = 0.5
+
+async def _loop_lag_probe() -> None:
+    """Sample how late the loop wakes us up; lateness is time other callbacks held it."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LOOP_LAG_INTERVAL
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - expected)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+
+# --- EVENT LOOP ---
+# FAST_LOOP=1 runs the bot on uvloop when it is installed. Independently, a
+# monitor wraps asyncio's Handle._run to time every callback the loop runs
+# and records the ones over SLOW_CALLBACK_MS with the coroutine responsible.
+# uvloop's handles are not Python objects, so there only the lag probe runs.
+FAST_LOOP = os.getenv("FAST_LOOP", "0").strip().lower() in {"1", "true", "yes"}
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "100"))
+SLOW_CALLBACKS = metrics.register(Counter("bot_slow_callbacks_total", "Event-loop callbacks over SLOW_CALLBACK_MS", ("coro",)))
+SLOW_CALLBACK_SECONDS = metrics.register(Histogram("bot_slow_callback_seconds", "Duration of slow event-loop callbacks",
+                                                   buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)))
+
+def _install_fast_loop() -> str:
+    """Make new event loops uvloop ones if FAST_LOOP is set and uvloop is installed; returns the loop in use."""
+    if not FAST_LOOP:
+        return "asyncio"
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        log_event("fast_loop_unavailable", logging.WARNING, hint="pip install uvloop")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+def _describe_callback(handle) -> str:
+    """Name the task's coroutine (and where it paused) behind a loop callback, or the plain callback."""
+    callback = getattr(handle, "_callback", None)
+    task = getattr(callback, "__self__", None)
+    get_coro = getattr(task, "get_coro", None)
+    if get_coro is not None:
+        coro = get_coro()
+        name = getattr(coro, "__qualname__", None) or repr(coro)
+        # Follow the await chain to the innermost coroutine of ours, where the task is paused now
+        inner, nxt = coro, getattr(coro, "cr_await", None)
+        while getattr(nxt, "cr_frame", None) is not None and not nxt.cr_frame.f_code.co_filename.startswith(_ASYNCIO_DIR):
+            inner, nxt = nxt, getattr(nxt, "cr_await", None)
+        if inner is not coro:
+            name = f"{name} > {inner.__qualname__}"
+        frame = getattr(inner, "cr_frame", None)
+        if frame is not None:
+            return f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+        return name
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+class SlowCallbackMonitor:
+    """Times every asyncio callback; ones over the threshold are counted, kept and logged."""
+    def __init__(self, threshold: float, keep: int = 20):
+        self.threshold = threshold
+        self.recent: deque = deque(maxlen=keep)
+        self.slow = 0
+        self._original = None
+
+    @property
+    def installed(self) -> bool:
+        return self._original is not None
+
+    def install(self) -> bool:
+        if self._original is not None or self.threshold <= 0:
+            return self.installed
+        loop = asyncio.get_running_loop()
+        if not isinstance(loop, asyncio.BaseEventLoop):
+            return False
+        original = asyncio.events.Handle._run
+        monitor = self
+        perf = time.perf_counter
+
+        def _run(handle):
+            started = perf()
+            original(handle)
+            elapsed = perf() - started
+            if elapsed >= monitor.threshold:
+                monitor.record(handle, elapsed)
+
+        self._original = original
+        asyncio.events.Handle._run = _run
+        return True
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            asyncio.events.Handle._run = self._original
+            self._original = None
+
+    def record(self, handle, elapsed: float) -> None:
+        name = _describe_callback(handle)
+        self.slow += 1
+        self.recent.append((time.time(), elapsed, name))
+        SLOW_CALLBACKS.inc(name.split(" ", 1)[0])
+        SLOW_CALLBACK_SECONDS.observe(elapsed)
+        log_event("slow_callback", logging.WARNING, ms=round(elapsed * 1000, 1), callback=name)
+
+loop_monitor = SlowCallbackMonitor(SLOW_CALLBACK_MS / 1000)
+
+
+# --- SCHEDULER ---
+# One task owns every timer in the process. Jobs are small records on a heap
+# (wall-clock due time + callback + args) instead of one sleeping coroutine
+# per timer, so they can be listed and cancelled by ID.
+class ScheduledJob:
+    __slots__ = ("id", "when", "name", "callback", "args", "cancelled")
+
+    def __init__(self, job_id: str, when: float, name: str, callback, args: tuple):
+        self.id = job_id
+        self.when = when
+        self.name = name
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+class Scheduler:
+    """Heap-backed timer service with add/cancel/list and a single wakeup point."""
+    # Re-check the clock at least this often so wall-clock jumps are noticed
+    MAX_SLEEP = 60.0
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, ScheduledJob]] = []
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._seq = itertools.count(1)
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self.fired = 0
+        self.paused = False
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, when_unix: float, callback, *args, name: str = "job", job_id: str | None = None) -> str:
+        """Run `await callback(*args)` at `when_unix`. Reusing a job ID replaces that job."""
+        seq = next(self._seq)
+        job_id = job_id or f"{name}-{seq}"
+        self.cancel(job_id)
+        job = ScheduledJob(job_id, float(when_unix), name, callback, args)
+        self._jobs[job_id] = job
+        heapq.heappush(self._heap, (job.when, seq, job))
+        if self._wakeup is not None and self._heap[0][2] is job:
+            self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        # Lazy deletion: the heap entry is skipped when it reaches the top
+        job.cancelled = True
+        return True
+
+    def get(self, job_id: str) -> ScheduledJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self, name: str | None = None) -> list[ScheduledJob]:
+        jobs = [j for j in self._jobs.values() if name is None or j.name == name]
+        return sorted(jobs, key=lambda j: j.when)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def pause(self) -> None:
+        """Stop firing jobs (they stay queued), e.g. while this replica is a standby."""
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            heap = self._heap
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap)
+            now = time.time()
+            if heap and heap[0][0] <= now and not self.paused:
+                _, _, job = heapq.heappop(heap)
+                self._jobs.pop(job.id, None)
+                self._fire(job)
+                continue
+            timeout = min(heap[0][0] - now, self.MAX_SLEEP) if heap and not self.paused else self.MAX_SLEEP
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, job: ScheduledJob) -> None:
+        self.fired += 1
+        try:
+            task = asyncio.create_task(job.callback(*job.args), name=job.id)
+        except Exception as e:
+            swallowed("scheduler_fire", e)
+            return
+        self._running.add(task)
+        task.add_done_callback(self._job_done)
+
+    def _job_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log_event("job_failed", logging.ERROR, job_id=task.get_name(), exc_info=task.exception())
+
+scheduler = Scheduler()
+metrics.register(Gauge("bot_scheduler_jobs", "Pending scheduled jobs", lambda: len(scheduler)))
+metrics.register(Gauge("bot_scheduler_running_jobs", "Scheduled jobs currently executing", lambda: len(scheduler._running)))
+
+async def _resolve_channel(channel_id: int):
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        try:
+            channel = await bot.fetch_channel(channel_id)
+        except Exception as e:
+            swallowed("resolve_channel", e)
+            channel = None
+    return channel
+
+# --- OUTBOUND QUEUE ---
+# Discord calls that can wait go through one queue instead of being awaited
+# straight from their handlers. Lanes are served in strict priority order, so
+# a mention fan-out never waits behind cosmetic edits or cleanup deletes. A
+# token bucket keeps the total rate under Discord's global limit, and a route
+# (e.g. edits in one channel) that gets a 429 pauses alone for its Retry-After
+# while other routes keep going. Interaction responses are not queued: they
+# have their own 3-second deadline and do not count against the global limit.
+OUTBOUND_LANES = ("announce", "reply", "edit", "background")
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "40"))
+OUTBOUND_WORKERS = max(1, int(os.getenv("OUTBOUND_WORKERS", "8")))
+OUTBOUND_ROUTE_CONCURRENCY = max(1, int(os.getenv("OUTBOUND_ROUTE_CONCURRENCY", "3")))
+OUTBOUND_WAIT = metrics.register(Histogram("bot_outbound_wait_seconds", "Time outbound calls spent queued", ("lane",)))
+OUTBOUND_DEPTH = metrics.register(Gauge("bot_outbound_queue_depth", "Outbound calls waiting per lane", labels=("lane",)))
+OUTBOUND_CALLS = metrics.register(Counter("bot_outbound_calls_total", "Outbound calls by lane and outcome", ("lane", "outcome")))
+
+class OutboundCall:
+    __slots__ = ("lane", "route", "call", "future", "enqueued")
+
+    def __init__(self, lane: str, route: str, call, future: asyncio.Future | None):
+        self.lane = lane
+        self.route = route
+        self.call = call
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+class OutboundQueue:
+    """Priority lanes of pending Discord calls, drained under a global and a per-route budget."""
+    def __init__(self, rate: float, workers: int, route_concurrency: int):
+        self.rate = max(0.1, rate)
+        self.workers = workers
+        self.route_concurrency = route_concurrency
+        # lane -> route -> calls; routes take turns within a lane
+        self._lanes: dict[str, OrderedDict[str, deque]] = {lane: OrderedDict() for lane in OUTBOUND_LANES}
+        self._depth = dict.fromkeys(OUTBOUND_LANES, 0)
+        self._route_busy: dict[str, int] = {}
+        self._route_blocked: dict[str, float] = {}
+        self._tokens = self.rate
+        self._refilled = time.monotonic()
+        self._inflight = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        for lane in OUTBOUND_LANES:
+            OUTBOUND_DEPTH.set(0, lane)
+
+    def depth(self, lane: str | None = None) -> int:
+        return self._depth[lane] if lane else sum(self._depth.values())
+
+    async def run(self, lane: str, route: str, call):
+        """Queue `call()` (a coroutine function) in `lane` and return its result once it has been sent."""
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(OutboundCall(lane, route, call, future))
+        return await future
+
+    def post(self, lane: str, route: str, call) -> None:
+        """Queue `call()` without waiting for it; failures are logged and dropped."""
+        self._enqueue(OutboundCall(lane, route, call, None))
+
+    def _enqueue(self, item: OutboundCall) -> None:
+        routes = self._lanes[item.lane]
+        pending = routes.get(item.route)
+        if pending is None:
+            pending = routes[item.route] = deque()
+        pending.append(item)
+        self._depth[item.lane] += 1
+        OUTBOUND_DEPTH.set(self._depth[item.lane], item.lane)
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _next(self, now: float) -> tuple[OutboundCall | None, float | None]:
+        """Highest-priority call whose route is free, or (None, seconds until a blocked route frees up)."""
+        soonest = None
+        for lane in OUTBOUND_LANES:
+            routes = self._lanes[lane]
+            for route, pending in routes.items():
+                blocked = self._route_blocked.get(route, 0.0)
+                if blocked > now:
+                    soonest = blocked - now if soonest is None else min(soonest, blocked - now)
+                    continue
+                if self._route_busy.get(route, 0) >= self.route_concurrency:
+                    continue
+                item = pending.popleft()
+                if pending:
+                    routes.move_to_end(route)
+                else:
+                    del routes[route]
+                self._depth[lane] -= 1
+                OUTBOUND_DEPTH.set(self._depth[lane], lane)
+                return item, None
+        return None, soonest
+
+    async def _pump(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            self._refill(now)
+            timeout = None
+            if self._inflight < self.workers and self._tokens >= 1:
+                item, timeout = self._next(now)
+                if item is not None:
+                    if item.future is not None and item.future.done():
+                        continue  # the caller gave up (e.g. a stopped purge)
+                    self._tokens -= 1
+                    self._start(item)
+                    continue
+            elif self._tokens < 1:
+                timeout = (1 - self._tokens) / self.rate
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start(self, item: OutboundCall) -> None:
+        self._inflight += 1
+        self._route_busy[item.route] = self._route_busy.get(item.route, 0) + 1
+        OUTBOUND_WAIT.observe(time.perf_counter() - item.enqueued, item.lane)
+        asyncio.create_task(self._execute(item))
+
+    async def _execute(self, item: OutboundCall) -> None:
+        try:
+            result = await item.call()
+        except Exception as e:
+            OUTBOUND_CALLS.inc(item.lane, "error")
+            if getattr(e, "status", 0) == 429:
+                self._route_blocked[item.route] = time.monotonic() + (_retry_after(e) or 1.0)
+            if item.future is None:
+                swallowed(f"outbound_{item.lane}", e)
+            elif not item.future.done():
+                item.future.set_exception(e)
+        else:
+            OUTBOUND_CALLS.inc(item.lane, "ok")
+            if item.future is not None and not item.future.done():
+                item.future.set_result(result)
+        finally:
+            self._inflight -= 1
+            busy = self._route_busy.get(item.route, 1) - 1
+            if busy:
+                self._route_busy[item.route] = busy
+            else:
+                self._route_busy.pop(item.route, None)
+            blocked = self._route_blocked.get(item.route)
+            if blocked is not None and blocked <= time.monotonic():
+                del self._route_blocked[item.route]
+            self._wakeup.set()
+
+def _retry_after(error: Exception) -> float | None:
+    """Retry-After seconds from a rate-limited response, if it carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+outbound = OutboundQueue(OUTBOUND_RATE, OUTBOUND_WORKERS, OUTBOUND_ROUTE_CONCURRENCY)
+
+# --- DEFERRED DELETION ---
+# Short-lived messages (transient replies, error notices, invoking commands)
+# are deleted from one expiry heap by one task instead of a sleeping
+# coroutine each; nextcord's delete_after is the same per-message sleep, so
+# it is not used. Entries due within DELETE_BATCH_WINDOW of each other go out
+# together, as one bulk delete per channel, on the outbound background lane.
+DELETE_BATCH_WINDOW = float(os.getenv("DELETE_BATCH_WINDOW", "0.5"))
+BULK_DELETE_MAX = 100  # Discord's limit per bulk delete
+DEFERRED_DELETES = metrics.register(Counter("bot_deferred_deletes_total", "Messages removed by the deletion queue", ("mode",)))
+
+class DeletionQueue:
+    """Deletes messages once their TTL runs out, batching same-channel deletes."""
+    def __init__(self, window: float):
+        self.window = window
+        self._heap: list[tuple[float, int, object, object]] = []
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, channel, message, ttl: float) -> None:
+        """Delete `message` from `channel` in `ttl` seconds (possibly up to one batch window early)."""
+        if message is None:
+            return
+        heapq.heappush(self._heap, (time.monotonic() + max(0.0, ttl), next(self._seq), channel, message))
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        elif self._heap[0][3] is message:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        heap = self._heap
+        while True:
+            now = time.monotonic()
+            if heap and heap[0][0] <= now:
+                due: dict[int, tuple[object, list]] = {}
+                while heap and heap[0][0] <= now + self.window:
+                    _, _, channel, message = heapq.heappop(heap)
+                    due.setdefault(channel.id, (channel, []))[1].append(message)
+                for channel, messages in due.values():
+                    self._delete(channel, messages)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), heap[0][0] - now if heap else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def _delete(self, channel, messages: list) -> None:
+        for start in range(0, len(messages), BULK_DELETE_MAX):
+            chunk = messages[start:start + BULK_DELETE_MAX]
+            if len(chunk) > 1 and hasattr(channel, "delete_messages"):
+                outbound.post("background", f"bulk:{channel.id}", partial(self._bulk, channel, chunk))
+            else:
+                for message in chunk:
+                    outbound.post("background", f"delete:{channel.id}", partial(self._single, message))
+
+    async def _bulk(self, channel, messages: list) -> None:
+        try:
+            await channel.delete_messages(messages)
+            DEFERRED_DELETES.inc("bulk", amount=len(messages))
+        except Exception as e:
+            # e.g. one of them is already gone or too old; fall back to one by one
+            swallowed("deferred_bulk_delete", e)
+            for message in messages:
+                outbound.post("background", f"delete:{channel.id}", partial(self._single, message))
+
+    async def _single(self, message) -> None:
+        try:
+            await message.delete()
+            DEFERRED_DELETES.inc("single")
+        except nextcord.NotFound:
+            DEFERRED_DELETES.inc("gone")
+
+deletions = DeletionQueue(DELETE_BATCH_WINDOW)
+
+def send_transient(channel, content: str, ttl: float) -> None:
+    """Post `content` to `channel` and delete it `ttl` seconds later, without waiting for either."""
+    async def _send():
+        deletions.schedule(channel, await channel.send(content), ttl)
+    outbound.post("reply", f"send:{channel.id}", _send)
+metrics.register(Gauge("bot_deferred_deletes_pending", "Messages waiting in the deletion queue", lambda: len(deletions)))
+
+# --- RECURRING EVENTS ---
+# Daily events (FFA by default) are compiled once into a sorted table of
+# seconds-after-local-midnight per timezone; lookups are a bisect plus a
+# cached answer that stays valid until the next occurrence passes.
+class RecurringSchedule:
+    """A named daily event at fixed local times in one timezone."""
+    __slots__ = ("name", "tz", "offsets", "message", "channel_id", "_cached", "_cached_from")
+
+    def __init__(self, name: str, tz: str, times: list, message: str, channel_id: int):
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.offsets = sorted({self._parse_offset(t) for t in times})
+        if not self.offsets:
+            raise ValueError(f"recurring event {name!r} has no times")
+        self.message = message
+        self.channel_id = channel_id
+        self._cached: dt.datetime | None = None
+        self._cached_from = 0.0
+
+    @staticmethod
+    def _parse_offset(value) -> int:
+        # Accepts an hour (20) or "HH:MM" ("20:30")
+        if isinstance(value, int):
+            hour, minute = value, 0
+        else:
+            hour_s, _, minute_s = str(value).strip().partition(":")
+            hour, minute = int(hour_s), int(minute_s or "0")
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            raise ValueError(f"invalid time of day: {value!r}")
+        return hour * 3600 + minute * 60
+
+    def _occurrence(self, day: dt.date, offset: int) -> dt.datetime | None:
+        h, rem = divmod(offset, 3600)
+        wall = dt.datetime.combine(day, dt.time(h, rem // 60), tzinfo=self.tz)
+        # Skip wall times that do not exist (spring-forward gap); for repeated
+        # times (fall-back) the first occurrence (fold=0) is used.
+        roundtrip = wall.astimezone(dt.timezone.utc).astimezone(self.tz)
+        if roundtrip.replace(tzinfo=None) != wall.replace(tzinfo=None):
+            return None
+        return wall
+
+    def _iter_from(self, now: dt.datetime):
+        local = now.astimezone(self.tz)
+        day = local.date()
+        sod = local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+        idx = bisect.bisect_right(self.offsets, sod)
+        now_ts = now.timestamp()
+        # A DST shift can move a wall time either side of `now`, so compare instants
+        misses = 0
+        while misses <= len(self.offsets) * 3:
+            if idx >= len(self.offsets):
+                idx = 0
+                day += dt.timedelta(days=1)
+            occ = self._occurrence(day, self.offsets[idx])
+            idx += 1
+            if occ is not None and occ.timestamp() > now_ts:
+                misses = 0
+                yield occ
+            else:
+                misses += 1
+
+    def next_after(self, now: dt.datetime | None = None) -> dt.datetime:
+        """Next occurrence strictly after `now` (default: current time)."""
+        now = now or dt.datetime.now(dt.timezone.utc)
+        now_ts = now.timestamp()
+        cached = self._cached
+        if cached is not None and self._cached_from <= now_ts < cached.timestamp():
+            return cached
+        nxt = next(self._iter_from(now))
+        self._cached, self._cached_from = nxt, now_ts
+        return nxt
+
+    def next_n(self, n: int, now: dt.datetime | None = None) -> list[dt.datetime]:
+        it = self._iter_from(now or dt.datetime.now(dt.timezone.utc))
+        return [occ for occ, _ in zip(it, range(n))]
+
+def _load_recurring_events() -> dict[str, RecurringSchedule]:
+    """Build schedules from RECURRING_EVENTS (JSON list) or the FFA defaults.
+
+    Each entry: {"name": "FFA", "tz": "Asia/Manila", "times": ["11:00", ...],
+    "message": "...", "channel_id": 123}. tz, message and channel_id are optional.
+    """
+    raw = (os.getenv("RECURRING_EVENTS") or "").strip()
+    entries = [{"name": "FFA", "times": FFA_TIMES, "message": FFA_MESSAGE}]
+    if raw:
+        try:
+            entries = json.loads(raw)
+        except Exception as e:
+            log_event("config_invalid", logging.WARNING, setting="RECURRING_EVENTS", error=str(e))
+    events: dict[str, RecurringSchedule] = {}
+    for entry in entries:
+        try:
+            ev = RecurringSchedule(
+                str(entry["name"]),
+                entry.get("tz") or "Asia/Manila",
+                entry["times"],
+                entry.get("message") or f"{entry['name']} starting soon",
+                int(entry.get("channel_id") or ANNOUNCE_CHANNEL_ID),
+            )
+            events[ev.name.lower()] = ev
+        except Exception as e:
+            log_event("config_invalid", logging.WARNING, setting="RECURRING_EVENTS", entry=entry, error=str(e))
+    return events
+
+recurring_events = _load_recurring_events()
+
 def _next_ffa_local() -> dt.datetime:
-    now_local = dt.datetime.now(PH_TZ)
-    candidates = [
-        now_local.replace(hour=h, minute=0, second=0, microsecond=0) for h in FFA_TIMES
-    ]
-    for c in candidates:
-        if c > now_local:
-            return c
-    return candidates[0] + dt.timedelta(days=1)
+    return recurring_events["ffa"].next_after()
+
+def _schedule_recurring(event: RecurringSchedule) -> None:
+    nt = event.next_after()
+    scheduler.add(nt.timestamp(), _recurring_announce, event.name.lower(), name="recurring", job_id=f"recurring:{event.name.lower()}")
+
+async def _recurring_announce(key: str) -> None:
+    event = recurring_events.get(key)
+    if event is None:
+        return
+    # Queue the next occurrence first so a failed send never stops the cycle
+    _schedule_recurring(event)
+    channel = await _resolve_channel(event.channel_id)
+    if channel:
+        try:
+            allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
+            await outbound.run("announce", f"send:{channel.id}", lambda: channel.send(event.message, allowed_mentions=allowed))
+        except Exception as e:
+            swallowed("recurring_announce", e)
+
+# --- WORLD BOSS TIMERS ---
+# One timer per channel. The alert itself is a scheduler job; the countdown
+# embeds of all channels are refreshed by a single ticking task that edits
+# each message once a minute, then every second during the final stretch.
+WORLD_BOSS_DEFAULT = os.getenv("WORLD_BOSS_DEFAULT", "2h")
+WORLD_BOSS_MAX_SECONDS = 24 * 3600
+WORLD_BOSS_PING_EVERYONE = os.getenv("WORLD_BOSS_PING_EVERYONE", "0").strip().lower() in ("1", "true", "yes", "on")
+WORLD_BOSS_FAST_WINDOW = 600  # switch to per-second refreshes for the last 10 minutes
+
+class BossTimer:
+    __slots__ = ("channel_id", "ends_at", "message", "next_refresh")
+
+    def __init__(self, channel_id: int, ends_at: float, message):
+        self.channel_id = channel_id
+        self.ends_at = ends_at
+        self.message = message
+        self.next_refresh = 0.0
+
+class BossTimerBoard:
+    """Per-channel world boss timers sharing one countdown editor task."""
+    MAX_SLEEP = 60.0
+
+    def __init__(self, slow_interval: float = 60.0, fast_window: float = WORLD_BOSS_FAST_WINDOW):
+        self.slow_interval = slow_interval
+        self.fast_window = fast_window
+        self.timers: dict[int, BossTimer] = {}
+        self.edits = 0
+        self.failed_edits = 0
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    @staticmethod
+    def job_id(channel_id: int) -> str:
+        return f"worldboss:{channel_id}"
+
+    def start(self, channel_id: int, seconds: int, message=None) -> BossTimer:
+        """Start (or restart) the channel's timer; the previous one is replaced."""
+        timer = BossTimer(channel_id, time.time() + seconds, message)
+        timer.next_refresh = self.next_refresh(timer, time.time())
+        self.timers[channel_id] = timer
+        scheduler.add(timer.ends_at, _world_boss_announce, channel_id, name="worldboss", job_id=self.job_id(channel_id))
+        self._kick()
+        return timer
+
+    def attach(self, channel_id: int, message) -> None:
+        timer = self.timers.get(channel_id)
+        if timer is not None:
+            timer.message = message
+
+    def stop(self, channel_id: int) -> BossTimer | None:
+        scheduler.cancel(self.job_id(channel_id))
+        timer = self.timers.pop(channel_id, None)
+        self._kick()
+        return timer
+
+    def pop(self, channel_id: int) -> BossTimer | None:
+        """Remove a timer that has ended; its alert job already fired."""
+        timer = self.timers.pop(channel_id, None)
+        self._kick()
+        return timer
+
+    def next_refresh(self, timer: BossTimer, now: float) -> float:
+        remaining = timer.ends_at - now
+        if remaining <= 0:
+            return float("inf")
+        if remaining <= self.fast_window:
+            # Land on whole seconds of remaining time
+            return now + (remaining % 1.0 or 1.0)
+        # Land on whole minutes, but no later than the switch to per-second refreshes
+        step = remaining % self.slow_interval or self.slow_interval
+        return min(now + step, timer.ends_at - self.fast_window)
+
+    def _kick(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _refresh(self, timer: BossTimer, now: float) -> None:
+        if timer.message is None:
+            return
+        try:
+            embed = _world_boss_embed(timer.ends_at, now)
+            await outbound.run("edit", f"edit:{timer.channel_id}", lambda: timer.message.edit(embed=embed))
+            self.edits += 1
+        except Exception as e:
+            self.failed_edits += 1
+            if getattr(e, "status", 0) == 429:
+                HTTP_429.inc("wb_countdown")
+            elif getattr(e, "status", 0) == 404:
+                timer.message = None  # countdown deleted; the alert still fires
+
+    async def _run(self) -> None:
+        while self.timers:
+            now = time.time()
+            # A timer past its end is left to the alert job, which shows the final state
+            due = [t for t in self.timers.values() if t.next_refresh <= now < t.ends_at]
+            if due:
+                await asyncio.gather(*(self._refresh(t, now) for t in due))
+                now = time.time()
+                for t in due:
+                    t.next_refresh = self.next_refresh(t, now)
+            upcoming = min((t.next_refresh for t in self.timers.values() if t.ends_at > now), default=now + self.MAX_SLEEP)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(max(0.0, upcoming - time.time()), self.MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
+
+boss_timers = BossTimerBoard()
+metrics.register(Gauge("bot_world_boss_timers", "World boss timers running", lambda: len(boss_timers)))
+
+def _format_countdown(seconds: float) -> str:
+    seconds = max(0, int(-(-seconds // 1)))  # round up so 0:00 only shows at the end
+    h, r = divmod(seconds, 3600)
+    m, s = divmod(r, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+def _world_boss_embed(ends_at: float, now: float | None = None, stopped: bool = False) -> nextcord.Embed:
+    now = time.time() if now is None else now
+    remaining = ends_at - now
+    if stopped:
+        embed = nextcord.Embed(title="⏹ World Boss Timer", description="Timer stopped.", color=0x95a5a6)
+    elif remaining <= 0:
+        embed = nextcord.Embed(title="⚔️ World Boss", description=WORLD_BOSS_MESSAGE, color=0x2ecc71)
+    else:
+        color = 0xe74c3c if remaining <= WORLD_BOSS_FAST_WINDOW else 0x3498db
+        embed = nextcord.Embed(title="⏱ World Boss Timer", description=f"Starts in **{_format_countdown(remaining)}**", color=color)
+    embed.add_field(name="Starts at", value=f"<t:{int(ends_at)}:F>", inline=True)
+    return embed
+
+async def _world_boss_announce(channel_id: int) -> None:
+    timer = boss_timers.pop(channel_id)
+    if timer is not None and timer.message is not None:
+        outbound.post("edit", f"edit:{channel_id}", lambda: timer.message.edit(embed=_world_boss_embed(timer.ends_at)))
+    channel = await _resolve_channel(channel_id)
+    if channel:
+        try:
+            content = f"@everyone {WORLD_BOSS_MESSAGE}" if WORLD_BOSS_PING_EVERYONE else WORLD_BOSS_MESSAGE
+            allowed = nextcord.AllowedMentions(everyone=WORLD_BOSS_PING_EVERYONE, roles=False, users=False)
+            await outbound.run("announce", f"send:{channel_id}", lambda: channel.send(content, allowed_mentions=allowed))
+        except Exception as e:
+            swallowed("worldboss_alert", e)
 
 # (Music feature removed)
 
+# --- HEALTH ---
+# /livez and /readyz serve a JSON snapshot refreshed by a background task,
+# so orchestrator probes never compute anything beyond a freshness check.
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "2.0"))
+LIVENESS_MAX_LAG = float(os.getenv("LIVENESS_MAX_LAG", "5.0"))
+READINESS_MAX_HEARTBEAT_AGE = float(os.getenv("READINESS_MAX_HEARTBEAT_AGE", "90.0"))
+
+class HealthMonitor:
+    """Background-maintained liveness/readiness snapshot."""
+    def __init__(self):
+        self.gateway_connected = False
+        self.last_connect: float | None = None
+        self.last_disconnect: float | None = None
+        self.start_failures = 0
+        self.last_start_error = ""
+        self.live_ok = True
+        self.ready_ok = False
+        self.live_body = b"{}"
+        self.ready_body = b"{}"
+        self._updated = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    @staticmethod
+    def _ack_age(ws) -> float | None:
+        last_ack = getattr(getattr(ws, "_keep_alive", None), "_last_ack", None)
+        if last_ack is None:
+            return None
+        return max(0.0, time.perf_counter() - last_ack)
+
+    def _heartbeat_age(self) -> float | None:
+        """Seconds since the last heartbeat ACK; when sharded, the stalest shard's."""
+        if SHARD_COUNT <= 0:
+            return self._ack_age(getattr(bot, "ws", None))
+        # AutoShardedBot keeps one gateway socket per shard; bot.ws is only shard 0's
+        ages = [self._ack_age(getattr(getattr(info, "_parent", None), "ws", None)) for info in bot.shards.values()]
+        if not ages or None in ages:
+            return None
+        return max(ages)
+
+    def refresh(self) -> None:
+        now = time.time()
+        latency = bot.latency
+        latency = latency if latency == latency and latency != float("inf") else None  # NaN/inf before first heartbeat
+        heartbeat_age = self._heartbeat_age()
+        lag = LOOP_LAG_LAST.get()
+        scheduler_ok = scheduler._task is not None and not scheduler._task.done()
+        gateway_ready = self.gateway_connected and not bot.is_closed() and bot.is_ready()
+        heartbeat_ok = heartbeat_age is not None and heartbeat_age < READINESS_MAX_HEARTBEAT_AGE
+        self.live_ok = lag < LIVENESS_MAX_LAG
+        self.ready_ok = self.live_ok and gateway_ready and heartbeat_ok and latency is not None and scheduler_ok
+        snapshot = {
+            "ts": round(now, 3),
+            "uptime_s": round((dt.datetime.now(dt.timezone.utc) - START_TIME).total_seconds(), 1) if START_TIME else None,
+            "gateway": {
+                "connected": self.gateway_connected,
+                "ready": gateway_ready,
+                "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+                "heartbeat_age_s": round(heartbeat_age, 2) if heartbeat_age is not None else None,
+                "last_connect": self.last_connect,
+                "last_disconnect": self.last_disconnect,
+                "start_failures": self.start_failures,
+                "last_start_error": self.last_start_error,
+            },
+            "loop_lag_s": round(lag, 4),
+            "scheduler": {"running": scheduler_ok, "paused": scheduler.paused, "jobs": len(scheduler)},
+            "leader": leader.is_leader,
+            "lineups": len(lineups),
+        }
+        self.live_body = json.dumps({"ok": self.live_ok, "loop_lag_s": snapshot["loop_lag_s"], "ts": snapshot["ts"]}).encode()
+        self.ready_body = json.dumps(dict(snapshot, ok=self.ready_ok)).encode()
+        self._updated = time.monotonic()
+
+    def fresh(self) -> bool:
+        return time.monotonic() - self._updated < HEALTH_INTERVAL * 3
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                swallowed("health_refresh", e)
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+health = HealthMonitor()
+
+# Listeners (not @bot.event) so nextcord's own on_connect handling stays intact
+@bot.listen("on_connect")
+async def _health_on_connect():
+    health.gateway_connected = True
+    health.last_connect = time.time()
+
+@bot.listen("on_resumed")
+async def _health_on_resumed():
+    health.gateway_connected = True
+    health.last_connect = time.time()
+
+@bot.listen("on_disconnect")
+async def _health_on_disconnect():
+    health.gateway_connected = False
+    health.last_disconnect = time.time()
+
 # --- PERMISSION HELPERS ---
-def has_creator_role():
-    """Command check: ONLY members with the CREATOR role may use commands.
-    Owner/Admin bypass is disabled per server policy.
-    """
-    def predicate(ctx: commands.Context):
-        # Restrict to guild contexts only
-        if not getattr(ctx, 'guild', None):
+# Role names are resolved to role IDs once per guild and cached, so a check
+# is a lookup of a few IDs in the member's (sorted) role list instead of
+# lower-casing every role name on every invocation. COMMAND_ROLES can grant
+# extra roles per command, e.g. {"delete": ["CREATOR", "Moderator"]}.
+class RolePermissions:
+    """Resolves configured role names to per-guild role ID sets."""
+    DEFAULT = "*"
+
+    def __init__(self, default_roles: list[str], per_command: dict[str, list[str]] | None = None):
+        self._names: dict[str, frozenset[str]] = {self.DEFAULT: frozenset(n.strip().lower() for n in default_roles)}
+        for command, names in (per_command or {}).items():
+            self._names[command.lower()] = frozenset(n.strip().lower() for n in names)
+        self._resolved: dict[tuple[int, str], frozenset[int]] = {}
+
+    def _key(self, command: str | None) -> str:
+        command = (command or self.DEFAULT).lower()
+        return command if command in self._names else self.DEFAULT
+
+    def role_ids(self, guild: nextcord.Guild, command: str | None = None) -> frozenset[int]:
+        key = (guild.id, self._key(command))
+        ids = self._resolved.get(key)
+        if ids is None:
+            names = self._names[key[1]]
+            ids = frozenset(r.id for r in guild.roles if r.name.strip().lower() in names)
+            self._resolved[key] = ids
+        return ids
+
+    def command_key(self, invoked: str, canonical: str) -> str:
+        """Aliases share the canonical command's roles unless configured themselves."""
+        return invoked if invoked.lower() in self._names else canonical
+
+    def invalidate(self, guild_id: int) -> None:
+        for key in [k for k in self._resolved if k[0] == guild_id]:
+            del self._resolved[key]
+
+    def allowed(self, member, command: str | None = None) -> bool:
+        guild = getattr(member, "guild", None)
+        if guild is None:
             return False
+        ids = self.role_ids(guild, command)
+        if not ids:
+            return False
+        # Member._roles is a sorted SnowflakeList with O(log n) membership
+        member_roles = getattr(member, "_roles", None)
+        if member_roles is None:
+            return any(r.id in ids for r in getattr(member, "roles", []))
+        has = getattr(member_roles, "has", None)
+        if has is not None:
+            return any(has(rid) for rid in ids)
+        return any(rid in member_roles for rid in ids)
+
+def _load_command_roles() -> dict[str, list[str]]:
+    raw = (os.getenv("COMMAND_ROLES") or "").strip()
+    if not raw:
+        return {}
+    try:
+        return {str(k): [str(n) for n in v] for k, v in json.loads(raw).items()}
+    except Exception as e:
+        log_event("config_invalid", logging.WARNING, setting="COMMAND_ROLES", error=str(e))
+        return {}
 
-        # Strict role check: require the configured CREATOR role (case-insensitive)
-        target = CREATOR_ROLE_NAME.strip().lower()
-        user_roles = [r.name.strip().lower() for r in getattr(ctx.author, 'roles', [])]
-        return target in user_roles
-    return commands.check(predicate)
+permissions = RolePermissions([CREATOR_ROLE_NAME], _load_command_roles())
 
-def _member_has_creator_role(member: nextcord.Member) -> bool:
-    """Helper for slash commands: strictly require CREATOR role."""
-    target = CREATOR_ROLE_NAME.strip().lower()
+@bot.event
+async def on_guild_role_create(role: nextcord.Role):
+    permissions.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: nextcord.Role):
+    permissions.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_role_update(before: nextcord.Role, after: nextcord.Role):
+    if before.name != after.name:
+        permissions.invalidate(after.guild.id)
+
+# --- COMMAND CORE ---
+# Prefix commands, slash commands and panel buttons are thin adapters: they
+# turn their input into plain arguments and call dispatch(), which runs the
+# role check, the one shared implementation, and the timing/counting.
+REPLY_DELETE_AFTER = 5
+FINISH_DELETE_AFTER = 3
+
+class UsageError(Exception):
+    """Raised by a command implementation for bad input; shown to the caller, not counted as an error."""
+
+class Invocation:
+    """One command call, whether it came from a prefix message, a slash command or a button."""
+    __slots__ = ("name", "kind", "guild", "channel", "author", "ctx", "interaction", "_status")
+
+    def __init__(self, name: str, kind: str, guild, channel, author, ctx=None, interaction=None):
+        self.name = name
+        self.kind = kind
+        self.guild = guild
+        self.channel = channel
+        self.author = author
+        self.ctx = ctx
+        self.interaction = interaction
+        self._status = None
+
+    @classmethod
+    def from_context(cls, ctx: commands.Context) -> "Invocation":
+        name = (ctx.invoked_with or ctx.command.name).lower()
+        return cls(name, "prefix", ctx.guild, ctx.channel, ctx.author, ctx=ctx)
+
+    @classmethod
+    def from_interaction(cls, interaction: nextcord.Interaction, name: str, kind: str = "slash") -> "Invocation":
+        author = interaction.user
+        if not isinstance(author, nextcord.Member) and interaction.guild is not None:
+            author = interaction.guild.get_member(author.id) or author
+        return cls(name, kind, interaction.guild, interaction.channel, author, interaction=interaction)
+
+    async def defer(self) -> None:
+        """Acknowledge a slow interaction; no-op for prefix commands."""
+        if self.interaction is not None and not self.interaction.response.is_done():
+            await self.interaction.response.defer(ephemeral=True)
+
+    async def reply(self, content: str | None = None, *, embed: nextcord.Embed | None = None, ephemeral: bool = True,
+                    transient: bool = False, allowed_mentions: nextcord.AllowedMentions | None = None):
+        """Answer the caller. Interaction replies are ephemeral by default; transient prefix replies delete themselves."""
+        kwargs = {}
+        if embed is not None:
+            kwargs["embed"] = embed
+        if allowed_mentions is not None:
+            kwargs["allowed_mentions"] = allowed_mentions
+        if self.interaction is None:
+            message = await outbound.run("reply", f"send:{self.channel.id}", lambda: self.ctx.send(content, **kwargs))
+            if transient:
+                deletions.schedule(self.channel, message, REPLY_DELETE_AFTER)
+            return message
+        if self.interaction.response.is_done():
+            return await self.interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
+        return await self.interaction.response.send_message(content, ephemeral=ephemeral, **kwargs)
+
+    async def progress(self, content: str) -> None:
+        """Show or update a running status line."""
+        if self.interaction is not None:
+            await self.interaction.edit_original_message(content=content)
+        elif self._status is None:
+            self._status = await outbound.run("reply", f"send:{self.channel.id}", lambda: self.ctx.send(content))
+        else:
+            await outbound.run("reply", f"edit:{self.channel.id}", lambda: self._status.edit(content=content))
+
+    async def finish(self, content: str) -> None:
+        """Final result of a long-running command; replaces the status line for prefix commands."""
+        if self.interaction is not None:
+            await self.reply(content)
+        elif self._status is not None:
+            await outbound.run("reply", f"edit:{self.channel.id}", lambda: self._status.edit(content=content))
+            deletions.schedule(self.channel, self._status, FINISH_DELETE_AFTER)
+        else:
+            message = await outbound.run("reply", f"send:{self.channel.id}", lambda: self.ctx.send(content))
+            deletions.schedule(self.channel, message, FINISH_DELETE_AFTER)
+
+    async def cleanup(self) -> None:
+        """Remove the invoking message or the deferred interaction placeholder."""
+        try:
+            if self.interaction is None:
+                deletions.schedule(self.channel, self.ctx.message, 0)
+            elif self.interaction.response.is_done():
+                await self.interaction.delete_original_message()
+        except Exception as e:
+            swallowed("command_cleanup", e)
+
+class CommandSpec:
+    __slots__ = ("name", "handler", "creator_only")
+
+    def __init__(self, name: str, handler, creator_only: bool):
+        self.name = name
+        self.handler = handler
+        self.creator_only = creator_only
+
+core_commands: dict[str, CommandSpec] = {}
+
+def core_command(name: str, *, aliases: tuple[str, ...] = (), creator_only: bool = True):
+    """Register the shared implementation of a command under its name and aliases."""
+    def register(handler):
+        spec = CommandSpec(name, handler, creator_only)
+        for key in (name, *aliases):
+            core_commands[key] = spec
+        return handler
+    return register
+
+async def dispatch(inv: Invocation, **kwargs) -> None:
+    """Check permissions, run the command, and record its latency and outcome."""
+    spec = core_commands[inv.name]
+    started = time.perf_counter()
+    outcome = "ok"
     try:
-        names = [r.name.strip().lower() for r in getattr(member, 'roles', [])]
-        return target in names
-    except Exception:
-        return False
+        if not leader.is_leader:
+            # Standbys share the token and see every command; the leader answers
+            outcome = "standby"
+            return
+        if inv.guild is None:
+            outcome = "denied"
+            return
+        if spec.creator_only and getattr(inv.author, "roles", None) is None:
+            # Lean profile: a bare User carries no roles, so look the member up
+            inv.author = await member_fetcher.member(inv.guild, inv.author.id) or inv.author
+        if spec.creator_only and not permissions.allowed(inv.author, permissions.command_key(inv.name, spec.name)):
+            outcome = "denied"
+            await inv.reply("❌ You don't have permission to use this command.", transient=True)
+            return
+        await spec.handler(inv, **kwargs)
+    except UsageError as e:
+        outcome = "invalid"
+        try:
+            await inv.reply(f"❌ {e}", transient=True)
+        except Exception as e:
+            swallowed("command_reply", e)
+    except Exception as e:
+        outcome = "error"
+        COMMAND_ERRORS.inc(spec.name, inv.kind)
+        log_event("command_failed", logging.ERROR, command=spec.name, kind=inv.kind, exc_info=e)
+        try:
+            await inv.reply(f"❌ Error while executing command: {type(e).__name__}", transient=True)
+        except Exception as e:
+            swallowed("command_reply", e)
+    finally:
+        COMMAND_LATENCY.observe(time.perf_counter() - started, spec.name, inv.kind)
+        COMMAND_CALLS.inc(spec.name, inv.kind, outcome)
+
+# --- STARTUP ---
+# Slash commands are only pushed to a guild when the hash of their local
+# definitions differs from the hash recorded after that guild's last
+# successful sync, and changed guilds are synced concurrently.
+SYNC_CONCURRENCY = max(1, int(os.getenv("SYNC_CONCURRENCY", "4")))
+_synced_hashes: dict[int, str] = {}
+_startup_phases: dict[str, float] = {}
+
+@contextlib.contextmanager
+def _phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup_phases[name] = _startup_phases.get(name, 0.0) + (time.perf_counter() - started)
+
+def _command_hash(guild_id: int) -> str:
+    """Stable digest of the slash command payloads registered for a guild."""
+    payloads = []
+    for cmd in bot.get_all_application_commands():
+        guild_ids = getattr(cmd, "guild_ids", None) or ()
+        if guild_ids and guild_id not in guild_ids:
+            continue
+        try:
+            payloads.append(cmd.get_payload(guild_id if guild_ids else None))
+        except Exception as e:
+            swallowed("command_payload", e)
+            payloads.append({"name": getattr(cmd, "name", "?")})
+    payloads.sort(key=lambda p: (str(p.get("type", "")), str(p.get("name", ""))))
+    blob = json.dumps(payloads, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+async def _sync_guild_commands(guild: nextcord.Guild, force: bool = False) -> int | None:
+    """Sync slash commands to a guild if changed. Returns the count synced, or None if skipped."""
+    digest = _command_hash(guild.id)
+    if not force and _synced_hashes.get(guild.id) == digest:
+        return None
+    synced = await outbound.run("background", f"sync:{guild.id}", lambda: bot.sync_application_commands(guild_id=guild.id))
+    _synced_hashes[guild.id] = digest
+    store.put_sync_hash(guild.id, digest)
+    return len(synced) if hasattr(synced, "__len__") else 0
+
+async def _setup_guilds() -> dict[str, int]:
+    """Nickname + command sync for every guild, bounded by SYNC_CONCURRENCY."""
+    gate = asyncio.Semaphore(SYNC_CONCURRENCY)
+    tally = {"synced": 0, "unchanged": 0, "failed": 0}
+
+    async def _one(guild: nextcord.Guild) -> None:
+        async with gate:
+            # Optionally set a per-server nickname if BOT_NICKNAME is provided
+            if BOT_NICKNAME and guild.me and guild.me.nick != BOT_NICKNAME:
+                try:
+                    await outbound.run("background", f"nick:{guild.id}", lambda: guild.me.edit(nick=BOT_NICKNAME))
+                    log_event("nickname_set", guild_id=guild.id, nickname=BOT_NICKNAME)
+                except Exception as e:
+                    # Ignore if lacking permissions or API denies
+                    log_event("nickname_failed", logging.WARNING, guild_id=guild.id, error=repr(e))
+            try:
+                count = await _sync_guild_commands(guild)
+                if count is None:
+                    tally["unchanged"] += 1
+                else:
+                    tally["synced"] += 1
+                    log_event("commands_synced", guild_id=guild.id, commands=count)
+            except Exception as e:
+                tally["failed"] += 1
+                log_event("commands_sync_failed", logging.WARNING, guild_id=guild.id, error=repr(e))
+
+    await asyncio.gather(*(_one(g) for g in bot.guilds))
+    return tally
 
 # --- BOT EVENTS ---
+_lineups_recovered = False
+
 @bot.event
 async def on_ready():
-    global START_TIME
+    global START_TIME, _lineups_recovered
     START_TIME = dt.datetime.now(dt.timezone.utc)
-    print("\n" + "="*50, flush=True)
-    print(f"[OK] Logged in as {bot.user}", flush=True)
-    print(f"[OK] Bot ID: {bot.user.id}", flush=True)
-    print(f"[INFO] Connected to {len(bot.guilds)} server(s):", flush=True)
-    
+    log_event("logged_in", user=str(bot.user), user_id=bot.user.id, guilds=len(bot.guilds))
     for guild in bot.guilds:
-        print(f"  - {guild.name} (ID: {guild.id})", flush=True)
-        print(f"    Members: {guild.member_count}", flush=True)
-        print(f"    Channels: {len(guild.channels)}", flush=True)
-        # Optionally set a per-server nickname if BOT_NICKNAME is provided
-        if BOT_NICKNAME:
+        log_event("guild", guild_id=guild.id, name=guild.name, members=guild.member_count, channels=len(guild.channels))
+    with _phase("guilds"):
+        tally = await _setup_guilds()
+    with _phase("schedules"):
+        # A standby leaves restored announcements to _on_promoted
+        if leader.is_leader:
             try:
-                await guild.me.edit(nick=BOT_NICKNAME)
-                print(f"    ✓ Nickname set to '{BOT_NICKNAME}'", flush=True)
-            except Exception:
-                # Ignore if lacking permissions or API denies
-                print("    ⚠ Could not set nickname (missing permission?)", flush=True)
+                await _reschedule_restored_announcements()
+            except Exception as e:
+                swallowed("restore_announcements", e)
         try:
-            synced = await bot.sync_application_commands(guild_id=guild.id)
-            print(f"    ✓ Synced {len(synced) if hasattr(synced,'__len__') else '?'} slash command(s) to this guild", flush=True)
-        except Exception:
-            print("    ⚠ Could not sync slash commands to this guild", flush=True)
-    print("[INFO] Bot ready; siege/secret-room features removed.", flush=True)
-    print("="*50 + "\n", flush=True)
-    try:
-        global ANNOUNCE_TASK
-        if not ANNOUNCE_TASK or ANNOUNCE_TASK.done():
-            async def _run():
-                while True:
-                    try:
-                        now_local = dt.datetime.now(PH_TZ)
-                        candidates = []
-                        for h in FFA_TIMES:
-                            candidates.append(now_local.replace(hour=h, minute=0, second=0, microsecond=0))
-                        next_time = None
-                        for c in candidates:
-                            if c > now_local:
-                                next_time = c
-                                break
-                        if not next_time:
-                            next_time = candidates[0] + dt.timedelta(days=1)
-                        delay = (next_time - now_local).total_seconds()
-                        if delay < 1:
-                            delay = 1
-                        await asyncio.sleep(delay)
-                        channel = bot.get_channel(ANNOUNCE_CHANNEL_ID)
-                        if channel is None:
-                            try:
-                                channel = await bot.fetch_channel(ANNOUNCE_CHANNEL_ID)
-                            except Exception:
-                                channel = None
-                        if channel:
-                            try:
-                                allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
-                                await channel.send(FFA_MESSAGE, allowed_mentions=allowed)
-                            except Exception:
-                                pass
-                    except Exception:
-                        await asyncio.sleep(5)
-            ANNOUNCE_TASK = asyncio.create_task(_run())
-    except Exception:
-        pass
+            scheduler.start()
+            if not leader.is_leader:
+                scheduler.pause()
+            leader.start()
+            for key, event in recurring_events.items():
+                # Sharded: only the worker whose shards include the channel's guild announces
+                if SHARD_COUNT > 0 and bot.get_channel(event.channel_id) is None:
+                    continue
+                if scheduler.get(f"recurring:{key}") is None:
+                    _schedule_recurring(event)
+        except Exception as e:
+            swallowed("schedule_recurring", e)
+    if LINEUP_CHANNEL_IDS and not _lineups_recovered:
+        _lineups_recovered = True
+        with _phase("recover"):
+            try:
+                recovery = await recover_lineups()
+                log_event("lineup_recovery", recovered=recovery.recovered, reconciled=recovery.reconciled,
+                          changed=recovery.changed, failed=recovery.failed, scanned=recovery.scanned,
+                          api_calls=recovery.api_calls, ms=round(recovery.elapsed * 1000))
+            except Exception as e:
+                log_event("lineup_recovery_failed", logging.ERROR, exc_info=e)
+    log_event(
+        "startup",
+        phases_ms={name: round(secs * 1000) for name, secs in _startup_phases.items()},
+        commands_synced=tally["synced"], commands_unchanged=tally["unchanged"], commands_failed=tally["failed"],
+    )
+    _startup_phases.clear()
 
 
 @bot.event
 async def on_command_error(ctx: commands.Context, error: Exception):
     # Provide concise, auto-deleting feedback; log details to stderr
-    try:
+    # Failures inside a command are handled by dispatch(); these happen before it runs
+    if ctx.command and not isinstance(error, commands.CommandNotFound):
+        spec = core_commands.get(ctx.command.qualified_name)
+        name = spec.name if spec else ctx.command.qualified_name
         if isinstance(error, commands.CheckFailure):
-            msg = await ctx.send("❌ You don't have permission to use this command.")
-            await asyncio.sleep(5)
-            await msg.delete()
-            return
-        if isinstance(error, commands.BadArgument):
-            msg = await ctx.send("❌ Invalid arguments for this command.")
-            await asyncio.sleep(5)
-            await msg.delete()
-            return
-        if isinstance(error, commands.CommandNotFound):
-            # Quietly ignore unknown commands
-            return
-
-        msg = await ctx.send(f"❌ Error while executing command: {type(error).__name__}")
-        await asyncio.sleep(8)
-        await msg.delete()
-    except Exception:
-        pass
+            COMMAND_CALLS.inc(name, "prefix", "denied")
+        elif isinstance(error, commands.UserInputError):
+            COMMAND_CALLS.inc(name, "prefix", "invalid")
+        else:
+            COMMAND_ERRORS.inc(name, "prefix")
+    # Replies are queued and expire on their own; nothing here waits on Discord
+    if isinstance(error, commands.CheckFailure):
+        send_transient(ctx.channel, "❌ You don't have permission to use this command.", 5)
+        return
+    if isinstance(error, commands.BadArgument):
+        send_transient(ctx.channel, "❌ Invalid arguments for this command.", 5)
+        return
+    if isinstance(error, commands.CommandNotFound):
+        # Quietly ignore unknown commands
+        return
+    log_event("command_error", logging.ERROR, command=ctx.command.qualified_name if ctx.command else None,
+              kind="prefix", exc_info=error)
+    send_transient(ctx.channel, f"❌ Error while executing command: {type(error).__name__}", 8)
 
-    import traceback
-    traceback.print_exception(type(error), error, error.__traceback__)
+@bot.event
+async def on_application_command_error(interaction: nextcord.Interaction, error: Exception):
+    cmd = getattr(interaction, "application_command", None)
+    COMMAND_ERRORS.inc(getattr(cmd, "name", "?"), "slash")
+    log_event("command_error", logging.ERROR, command=getattr(cmd, "name", "?"), kind="slash", exc_info=error)
 
 # --- ANNOUNCEMENT COMMANDS ---
 
-# New: Post a custom message to the announcement channel
+@core_command("postmessage")
+async def postmessage_core(inv: Invocation, text: str, ping_everyone: bool = False):
+    """Post text in the current channel; @everyone is pinged if asked for or the text starts with it."""
+    text = (text or "").replace("\\n", "\n")
+    if not text.strip():
+        raise UsageError("Provide text after `!postmessage` or use `/postmessage`.")
+    await inv.defer()
+    written = text.lstrip().startswith("@everyone")
+    allowed = nextcord.AllowedMentions(everyone=ping_everyone or written, roles=True, users=True)
+    content = ("@everyone " + text) if (ping_everyone and not written) else text
+    # A failed send (e.g. missing permissions) is a command error, not bad input
+    await outbound.run("announce", f"send:{inv.channel.id}", lambda: inv.channel.send(content, allowed_mentions=allowed))
+    await inv.cleanup()
+
+# Deprecated prefix form of /postmessage; posts to the current channel
 @bot.command(name="postmessage")
-@has_creator_role()
 @commands.guild_only()
 async def post_message(ctx, *, message: str = None):
-    """Deprecated: use /postmessage instead. Still posts to current channel."""
-    try:
-        if not message or not message.strip():
-            await ctx.send("❌ Provide text after `!postmessage` or use `/postmessage`.")
-            return
-        allow_everyone = "@everyone" in message
-        allowed = nextcord.AllowedMentions(everyone=allow_everyone, roles=True, users=True)
-        await ctx.send(message, allowed_mentions=allowed)
-        try:
-            await ctx.message.delete()
-        except Exception:
-            pass
-    except Exception as e:
-        await ctx.send(f"❌ Failed to post message: {str(e)}")
+    await dispatch(Invocation.from_context(ctx), text=message or "")
 
 # (Music commands removed)
 
-@bot.command(name="deletemessage")
-@has_creator_role()
-@commands.guild_only()
-async def deletemessage(ctx, count: int):
-    """Delete the last <count> messages in this channel (CREATOR only)."""
-    if count < 1:
+# --- PURGE ENGINE ---
+# Streams channel history instead of one capped purge() call: matching
+# messages younger than 14 days are bulk-deleted 100 at a time, older ones
+# one by one at a throttled pace. Jobs report progress and can be stopped.
+PURGE_MAX = int(os.getenv("PURGE_MAX", "5000"))
+PURGE_SCAN_MAX = int(os.getenv("PURGE_SCAN_MAX", "20000"))
+BULK_DELETE_MAX_AGE = dt.timedelta(days=14) - dt.timedelta(minutes=5)
+SINGLE_DELETE_INTERVAL = 1.2  # old messages cannot be bulk-deleted; stay under the delete limit
+DURATION_RE = re.compile(r"(\d+)\s*(d|h|m|s)", re.IGNORECASE)
+
+def _parse_duration(text: str) -> int | None:
+    """'1h30m' -> 5400 seconds; None if nothing parseable."""
+    parts = DURATION_RE.findall(text or "")
+    if not parts:
+        return None
+    unit = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+    return sum(int(n) * unit[u.lower()] for n, u in parts)
+
+class PurgeFilter:
+    """Which messages a purge may delete. Pinned messages are always kept."""
+    __slots__ = ("author_ids", "pattern", "after", "before", "attachments_only")
+
+    def __init__(self, author_ids=None, pattern: str | None = None, after: dt.datetime | None = None,
+                 before: dt.datetime | None = None, attachments_only: bool = False):
+        self.author_ids = frozenset(author_ids or ())
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.after = after
+        self.before = before
+        self.attachments_only = attachments_only
+
+    def matches(self, message: nextcord.Message) -> bool:
+        if message.pinned:
+            return False
+        if self.author_ids and message.author.id not in self.author_ids:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content or ""):
+            return False
+        return True
+
+def _parse_purge_filters(text: str, mentions=()) -> dict:
+    """Prefix syntax -> delete command options: `user:@x` (or any mention), `match:<regex>`, `older:2h`, `newer:1d`, `files`."""
+    opts = {"author_ids": [m.id for m in mentions], "pattern": None, "older": None, "newer": None, "files": False}
+    for token in (text or "").split():
+        key, _, value = token.partition(":")
+        key = key.lower()
+        if key == "match" and value:
+            opts["pattern"] = value
+        elif key in ("older", "newer") and value:
+            opts[key] = value
+        elif key in ("files", "attachments"):
+            opts["files"] = True
+    return opts
+
+class PurgeJob:
+    """A single streaming purge of one channel."""
+    def __init__(self, channel, filt: PurgeFilter, limit: int, scan_limit: int = PURGE_SCAN_MAX,
+                 single_interval: float = SINGLE_DELETE_INTERVAL):
+        self.channel = channel
+        self.filter = filt
+        self.limit = limit
+        self.scan_limit = scan_limit
+        self.single_interval = single_interval
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.cancelled = False
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def summary(self) -> str:
+        state = "stopped" if self.cancelled else "done"
+        return f"{self.deleted} deleted, {self.scanned} scanned, {self.failed} failed in {self.elapsed:.1f}s ({state})"
+
+    async def candidates(self):
+        """Yield matching messages newest-first until the limit or scan cap is hit."""
+        matched = 0
+        # nextcord walks oldest-first when `after` is set unless told otherwise
+        async for message in self.channel.history(limit=self.scan_limit, before=self.filter.before,
+                                                  after=self.filter.after, oldest_first=False):
+            if self.cancelled:
+                return
+            self.scanned += 1
+            if not self.filter.matches(message):
+                continue
+            yield message
+            matched += 1
+            if matched >= self.limit:
+                return
+
+    async def _bulk(self, batch: list) -> None:
         try:
-            warn = await ctx.send("❌ Provide a positive number (e.g., !deletemessage 100).")
-            await asyncio.sleep(5)
-            await warn.delete()
-        except Exception:
-            pass
+            route = f"delete:{self.channel.id}"
+            if len(batch) == 1:
+                await outbound.run("background", route, batch[0].delete)
+                self.single_calls += 1
+            else:
+                await outbound.run("background", f"bulk:{self.channel.id}", lambda: self.channel.delete_messages(batch))
+                self.bulk_calls += 1
+            self.deleted += len(batch)
+        except Exception as e:
+            swallowed("purge_bulk", e)
+            self.failed += len(batch)
+
+    async def _single(self, message) -> None:
+        try:
+            await outbound.run("background", f"delete:{self.channel.id}", message.delete)
+            self.deleted += 1
+        except Exception as e:
+            swallowed("purge_single", e)
+            self.failed += 1
+        self.single_calls += 1
+        await asyncio.sleep(self.single_interval)
+
+    async def run(self, progress=None, progress_every: float = 3.0) -> "PurgeJob":
+        """Delete everything `candidates()` yields; `progress(job)` is awaited periodically."""
+        cutoff = dt.datetime.now(dt.timezone.utc) - BULK_DELETE_MAX_AGE
+        batch: list = []
+        last_report = time.monotonic()
+        async for message in self.candidates():
+            if message.created_at >= cutoff:
+                batch.append(message)
+                if len(batch) == 100:
+                    await self._bulk(batch)
+                    batch = []
+            else:
+                # History is newest-first, so the bulk-eligible part is over
+                if batch:
+                    await self._bulk(batch)
+                    batch = []
+                await self._single(message)
+            if progress is not None and time.monotonic() - last_report >= progress_every:
+                last_report = time.monotonic()
+                try:
+                    await progress(self)
+                except Exception as e:
+                    swallowed("purge_progress", e)
+        if batch and not self.cancelled:
+            await self._bulk(batch)
+        return self
+
+purge_jobs: dict[int, PurgeJob] = {}
+
+async def _run_purge(channel, filt: PurgeFilter, limit: int, progress=None) -> PurgeJob:
+    """Run a purge, registered per channel so it can be stopped with !purgestop."""
+    existing = purge_jobs.get(channel.id)
+    if existing is not None:
+        existing.cancel()
+    job = PurgeJob(channel, filt, limit)
+    purge_jobs[channel.id] = job
+    try:
+        return await job.run(progress)
+    finally:
+        if purge_jobs.get(channel.id) is job:
+            del purge_jobs[channel.id]
+
+@core_command("delete", aliases=("del", "deletemessage"))
+async def delete_core(inv: Invocation, count: int, author_ids=(), pattern: str | None = None,
+                      older: str | None = None, newer: str | None = None, files: bool = False):
+    """Delete up to <count> matching messages in the current channel."""
+    if count < 1:
+        raise UsageError("Provide a positive number (e.g., !deletemessage 100).")
+    count = min(count, PURGE_MAX)  # cap per run for safety
+    now = dt.datetime.now(dt.timezone.utc)
+    bounds = {}
+    for key, text in (("before", older), ("after", newer)):
+        if text:
+            seconds = _parse_duration(text)
+            if not seconds:
+                raise UsageError(f"Invalid duration `{text}` (e.g., 2h, 1d, 30m).")
+            bounds[key] = now - dt.timedelta(seconds=seconds)
+    try:
+        filt = PurgeFilter(author_ids, pattern, attachments_only=files, **bounds)
+    except re.error as e:
+        raise UsageError(f"Invalid pattern: {e}")
+    bot_member = inv.guild.me
+    perms = inv.channel.permissions_for(bot_member) if bot_member else None
+    if not perms or not perms.manage_messages or not perms.read_message_history:
+        raise UsageError("I need 'Manage Messages' and 'Read Message History' here.")
+    await inv.defer()
+    if inv.interaction is None:
+        await inv.cleanup()
+
+    async def _progress(job: PurgeJob):
+        await inv.progress(f"🧹 Purging… {job.deleted} deleted, {job.scanned} scanned")
+    try:
+        job = await _run_purge(inv.channel, filt, count, _progress)
+    except Exception as e:
+        raise UsageError(f"Failed to delete messages: {e}")
+    try:
+        await inv.finish(f"🧹 Deleted {job.deleted} messages in this channel ({job.summary()}).")
+    except Exception as e:
+        swallowed("purge_report", e)
+
+@core_command("purgestop")
+async def purgestop_core(inv: Invocation):
+    """Stop a running purge in the current channel."""
+    job = purge_jobs.get(inv.channel.id)
+    if job is None:
+        await inv.reply("No purge is running here.", transient=True)
         return
+    job.cancel()
+    await inv.reply(f"⏹ Stopping purge ({job.deleted} deleted so far).", transient=True)
 
-    # Cap to 100 messages per run for safety
-    if count > 100:
-        count = 100
+@bot.command(name="deletemessage")
+@commands.guild_only()
+async def deletemessage(ctx, count: int, *, filters: str = ""):
+    """Delete up to <count> matching messages in this channel (CREATOR only).
 
-    # Delete the invoking command message, if possible
-    try:
-        await ctx.message.delete()
-    except Exception:
-        pass
+    Optional filters: user:@member, match:<regex>, older:2h, newer:1d, files.
+    """
+    await dispatch(Invocation.from_context(ctx), count=count, **_parse_purge_filters(filters, ctx.message.mentions))
 
-    # Check bot permissions
-    try:
-        bot_member = ctx.guild.me if ctx.guild else None
-        perms = ctx.channel.permissions_for(bot_member) if bot_member else None
-        if not perms or not perms.manage_messages or not perms.read_message_history:
-            warn = await ctx.send("❌ I need 'Manage Messages' and 'Read Message History' here.")
-            await asyncio.sleep(5)
+@bot.command(name="purgestop")
+@commands.guild_only()
+async def purgestop_cmd(ctx: commands.Context):
+    """Stop a running purge in this channel."""
+    await dispatch(Invocation.from_context(ctx))
+
+# --- PERSISTENCE ---
+# Line-ups and pending announcements survive restarts via a local SQLite
+# database in WAL mode. Handlers only enqueue writes; a background thread
+# applies them in batches so reaction bursts never wait on fsync.
+STATE_DB = os.getenv("STATE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_state.db")).strip()
+
+class StateStore:
+    """Batched, crash-safe store for line-ups and scheduled announcements."""
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS lineups ("
+        " message_id INTEGER PRIMARY KEY, channel_id INTEGER, guild_id INTEGER,"
+        " title TEXT, text TEXT, created_at REAL)",
+        "CREATE TABLE IF NOT EXISTS lineup_members ("
+        " message_id INTEGER, user_id INTEGER, status TEXT, updated_at REAL,"
+        " PRIMARY KEY (message_id, user_id)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS announcements ("
+        " message_id INTEGER PRIMARY KEY, channel_id INTEGER, when_unix INTEGER, event_name TEXT)",
+        "CREATE TABLE IF NOT EXISTS command_sync ("
+        " guild_id INTEGER PRIMARY KEY, hash TEXT, synced_at REAL)",
+        # Member IDs are packed little-endian uint64s, join side then no side
+        "CREATE TABLE IF NOT EXISTS lineup_archive ("
+        " message_id INTEGER PRIMARY KEY, channel_id INTEGER, guild_id INTEGER, title TEXT, text TEXT,"
+        " event_at INTEGER, archived_at REAL, joined INTEGER, declined INTEGER, members BLOB)",
+    )
+    # Columns added after the first release; re-running them on a migrated file is a no-op
+    MIGRATIONS = (
+        "ALTER TABLE lineups ADD COLUMN event_at INTEGER",
+    )
+
+    def __init__(self, path: str, flush_interval: float = 0.25, batch_size: int = 1000, retries: int = 3):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retries = retries
+        self.writes = 0
+        self.batches = 0
+        self.dropped = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.path.lower() != "off"
+
+    def _connect(self) -> sqlite3.Connection:
+        # Sharded workers share the file; wait on each other's write locks
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for stmt in self.SCHEMA:
+            conn.execute(stmt)
+        for stmt in self.MIGRATIONS:
             try:
-                await warn.delete()
-            except Exception:
-                pass
+                conn.execute(stmt)
+            except sqlite3.OperationalError:
+                pass  # already applied
+        conn.commit()
+        return conn
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
             return
-    except Exception:
-        pass
+        self._connect().close()
+        self._thread = threading.Thread(target=self._writer, name="state-store", daemon=True)
+        self._thread.start()
 
-    # Purge messages in this channel (skips pinned)
-    try:
-        deleted = await ctx.channel.purge(limit=count, check=lambda m: not m.pinned)
+    def close(self) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _writer(self) -> None:
+        conn = self._connect()
         try:
-            confirm = await ctx.send(f"🧹 Deleted {len(deleted)} messages in this channel.")
-            await asyncio.sleep(3)
-            await confirm.delete()
-        except Exception:
-            pass
-    except Exception as e:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                # Give a burst a moment to accumulate, then drain it in one transaction
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    running = False
+                    batch = [op for op in batch if op is not None]
+                    # Drain anything enqueued before the shutdown marker
+                    while True:
+                        try:
+                            op = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if op is not None:
+                            batch.append(op)
+                if batch:
+                    self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list) -> None:
+        """Write a batch in one transaction, retrying lock errors; fall back to one op at a time."""
+        for attempt in range(self.retries + 1):
+            try:
+                with conn:
+                    for sql, params in batch:
+                        conn.execute(sql, params)
+                self.writes += len(batch)
+                self.batches += 1
+                return
+            except sqlite3.OperationalError as e:
+                # Usually SQLITE_BUSY from another worker sharing the file
+                if attempt == self.retries:
+                    log_event("state_batch_failed", logging.WARNING, ops=len(batch), error=repr(e))
+                    break
+                time.sleep(0.1 * 2 ** attempt)
+            except Exception as e:
+                log_event("state_batch_failed", logging.WARNING, ops=len(batch), error=repr(e))
+                break
+        # One bad row must not take the rest of the batch with it
+        for sql, params in batch:
+            try:
+                with conn:
+                    conn.execute(sql, params)
+                self.writes += 1
+            except Exception as e:
+                self.dropped += 1
+                STATE_OPS_DROPPED.inc()
+                log_event("state_write_failed", logging.ERROR, sql=sql.split("(", 1)[0].strip(), exc_info=e)
+
+    def _put(self, sql: str, params: tuple) -> None:
+        if self._thread is not None:
+            self._queue.put((sql, params))
+
+    # Line-ups
+    def put_lineup(self, message_id: int, channel_id: int, guild_id: int, title: str, text: str,
+                   event_at: int | None = None, created_at: float | None = None) -> None:
+        self._put(
+            "INSERT OR REPLACE INTO lineups (message_id, channel_id, guild_id, title, text, created_at, event_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (message_id, channel_id, guild_id, title, text, time.time() if created_at is None else created_at, event_at),
+        )
+
+    def archive_lineup(self, message_id: int, lineup: "Lineup") -> None:
+        """Replace a line-up's live rows with one summary row."""
+        join_ids, no_ids = lineup.ids("join"), lineup.ids("no")
+        members = struct.pack(f"<{len(join_ids) + len(no_ids)}Q", *join_ids, *no_ids)
+        self._put(
+            "INSERT OR REPLACE INTO lineup_archive VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (message_id, lineup.channel_id, lineup.guild_id, lineup.title, lineup.text, lineup.event_at,
+             time.time(), len(join_ids), len(no_ids), members),
+        )
+        self._put("DELETE FROM lineup_members WHERE message_id = ?", (message_id,))
+        self._put("DELETE FROM lineups WHERE message_id = ?", (message_id,))
+        self._put("DELETE FROM announcements WHERE message_id = ?", (message_id,))
+
+    def set_member(self, message_id: int, user_id: int, status: str) -> None:
+        self._put(
+            "INSERT OR REPLACE INTO lineup_members VALUES (?, ?, ?, ?)",
+            (message_id, user_id, status, time.time()),
+        )
+
+    def remove_member(self, message_id: int, user_id: int, status: str) -> None:
+        # Only drop the row if it still holds the status being removed
+        self._put(
+            "DELETE FROM lineup_members WHERE message_id = ? AND user_id = ? AND status = ?",
+            (message_id, user_id, status),
+        )
+
+    # Announcements
+    def put_announcement(self, message_id: int, channel_id: int, when_unix: int, event_name: str) -> None:
+        self._put(
+            "INSERT OR REPLACE INTO announcements VALUES (?, ?, ?, ?)",
+            (message_id, channel_id, int(when_unix), event_name),
+        )
+
+    def delete_announcement(self, message_id: int) -> None:
+        self._put("DELETE FROM announcements WHERE message_id = ?", (message_id,))
+
+    # Slash command sync
+    def put_sync_hash(self, guild_id: int, digest: str) -> None:
+        self._put("INSERT OR REPLACE INTO command_sync VALUES (?, ?, ?)", (guild_id, digest, time.time()))
+
+    def load_sync_hashes(self, owns=None) -> dict[int, str]:
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        conn = self._connect()
         try:
-            err = await ctx.send(f"❌ Failed to delete messages: {e}")
-            await asyncio.sleep(5)
-            await err.delete()
-        except Exception:
-            pass
+            rows = conn.execute("SELECT guild_id, hash FROM command_sync")
+            return {gid: digest for gid, digest in rows if owns is None or owns(gid)}
+        finally:
+            conn.close()
+
+    def load(self, owns=None) -> tuple[dict[int, "Lineup"], list[tuple[int, int, int, str]]]:
+        """Read back line-ups and pending announcements.
+
+        `owns(guild_id)` limits the result to one partition (e.g. a shard worker's guilds).
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return {}, []
+        conn = self._connect()
+        try:
+            restored: dict[int, Lineup] = {}
+            rows = conn.execute("SELECT message_id, channel_id, guild_id, title, text, created_at, event_at FROM lineups")
+            for message_id, channel_id, guild_id, title, text, created_at, event_at in rows:
+                if owns is not None and not owns(guild_id):
+                    continue
+                restored[message_id] = Lineup(title or "Line-Up", text or "", channel_id, guild_id, event_at, created_at)
+            rows = conn.execute(
+                "SELECT message_id, user_id, status FROM lineup_members ORDER BY message_id, updated_at"
+            )
+            for message_id, user_id, status in rows:
+                lineup = restored.get(message_id)
+                if lineup is not None and status in ("join", "no"):
+                    lineup.set(user_id, status)
+            # Every announcement belongs to a line-up, so it follows that line-up's partition
+            announcements = [
+                row for row in conn.execute("SELECT message_id, channel_id, when_unix, event_name FROM announcements")
+                if row[0] in restored
+            ]
+            return restored, announcements
+        finally:
+            conn.close()
+
+store = StateStore(STATE_DB)
+atexit.register(store.close)
+
+# --- LEADER ELECTION ---
+# With hot-standby replicas, only the holder of a time-limited lease runs
+# scheduled jobs; the others keep their scheduler paused. A standby takes
+# over at most LEADER_LEASE_TTL + one renewal interval after the leader dies.
+LEADER_ELECTION = (os.getenv("LEADER_ELECTION") or "off").strip().lower()  # off | file | sqlite
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "15"))
+LEADER_LEASE_FILE = os.getenv("LEADER_LEASE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "leader.lease"))
+
+class LeaseBackend:
+    """Storage for a named lease. acquire() must be atomic across processes."""
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def release(self, name: str, holder: str) -> None:
+        raise NotImplementedError
+
+class FileLeaseBackend(LeaseBackend):
+    """JSON lease file guarded by an advisory lock (single host)."""
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(self.path + ".lock", "a+") as fh:
+            try:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            except ImportError:
+                pass  # no fcntl (Windows): best effort
+            yield
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            swallowed("lease_file_read", e)
+            return {}
+
+    def _write(self, data: dict) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        with self._locked():
+            leases = self._read()
+            current = leases.get(name) or {}
+            now = time.time()
+            if current.get("holder") not in (None, holder) and current.get("expires", 0) > now:
+                return False
+            leases[name] = {"holder": holder, "expires": now + ttl}
+            self._write(leases)
+            return True
+
+    def release(self, name: str, holder: str) -> None:
+        with self._locked():
+            leases = self._read()
+            if (leases.get(name) or {}).get("holder") == holder:
+                leases.pop(name, None)
+                self._write(leases)
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Lease row in a SQLite file; BEGIN IMMEDIATE serialises competing replicas."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT, expires REAL)")
+        return conn
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT holder, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            if row and row[0] != holder and row[1] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (name, holder, now + ttl))
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def release(self, name: str, holder: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+        finally:
+            conn.close()
+
+class LeaderElector:
+    """Renews a lease in the background and reports leadership changes."""
+    def __init__(self, backend: LeaseBackend | None, name: str = "scheduler", ttl: float = 15.0):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{os.uname().nodename if hasattr(os, 'uname') else 'host'}:{os.getpid()}:{random.getrandbits(32):08x}"
+        self.is_leader = backend is None  # no backend: always the leader
+        self.on_elected = None
+        self.on_demoted = None
+        self.on_standby = None  # called on every renewal tick while not the leader
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.backend is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        interval = max(1.0, self.ttl / 3)
+        while True:
+            started = time.monotonic()
+            try:
+                held = await asyncio.to_thread(self.backend.acquire, self.name, self.holder, self.ttl)
+            except Exception as e:
+                swallowed("leader_acquire", e)
+                held = False
+            # A renewal that took longer than the lease may already have lapsed
+            if held and time.monotonic() - started >= self.ttl:
+                held = False
+            if held != self.is_leader:
+                self.is_leader = held
+                callback = self.on_elected if held else self.on_demoted
+                log_event("leader_acquired" if held else "leader_lost", lease=self.name, holder=self.holder)
+                if callback is not None:
+                    try:
+                        await callback()
+                    except Exception as e:
+                        swallowed("leader_callback", e)
+            if not held and self.on_standby is not None:
+                try:
+                    self.on_standby()
+                except Exception as e:
+                    swallowed("leader_standby", e)
+            await asyncio.sleep(interval)
+
+    def release(self) -> None:
+        if self.backend is not None and self.is_leader:
+            try:
+                self.backend.release(self.name, self.holder)
+            except Exception as e:
+                swallowed("leader_release", e)
+
+def _make_lease_backend() -> LeaseBackend | None:
+    if LEADER_ELECTION == "file":
+        return FileLeaseBackend(LEADER_LEASE_FILE)
+    if LEADER_ELECTION == "sqlite":
+        return SQLiteLeaseBackend(STATE_DB if store.enabled else LEADER_LEASE_FILE + ".db")
+    return None
+
+# Each shard partition runs its own scheduler, so each elects its own leader
+LEADER_LEASE_NAME = "scheduler" if SHARD_IDS is None else f"scheduler:{','.join(map(str, SHARD_IDS))}"
+leader = LeaderElector(_make_lease_backend(), name=LEADER_LEASE_NAME, ttl=LEADER_LEASE_TTL)
+atexit.register(leader.release)
+metrics.register(Gauge("bot_is_leader", "1 if this replica holds the scheduler lease", lambda: 1 if leader.is_leader else 0))
 
 # --- LINEUP SYSTEM ---
-# Track active line-ups by message ID
-lineups: dict[int, dict] = {}
+# Line-ups are open until LINEUP_LOCK_AFTER seconds past their event time (or
+# LINEUP_MAX_OPEN after posting when the text names no time), then locked:
+# reactions are ignored and the embed says so. LINEUP_ARCHIVE_AFTER later they
+# are archived: a summary row goes to STATE_DB and the line-up leaves memory.
+LINEUP_LOCK_AFTER = float(os.getenv("LINEUP_LOCK_AFTER", "0"))
+LINEUP_MAX_OPEN = float(os.getenv("LINEUP_MAX_OPEN", str(7 * 86400)))
+LINEUP_ARCHIVE_AFTER = float(os.getenv("LINEUP_ARCHIVE_AFTER", str(6 * 3600)))
+
+class Lineup:
+    """One line-up: its message details and a single member ID -> status byte roster.
+
+    The roster is insertion-ordered and a member switching sides is moved to
+    the end, so each side lists members in the order they picked it. Toggling
+    and removal are O(1); listing one side walks the roster once.
+    """
+    __slots__ = ("title", "text", "channel_id", "guild_id", "event_at", "closes_at", "_roster", "_joined")
+
+    JOIN, NO = 1, 2
+    _CODES = {"join": JOIN, "no": NO}
+
+    def __init__(self, title: str = "Line-Up", text: str = "", channel_id: int = 0, guild_id: int = 0,
+                 event_at: int | None = None, created_at: float | None = None):
+        self.title = title
+        self.text = text
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.event_at = event_at
+        if event_at is not None:
+            self.closes_at = event_at + LINEUP_LOCK_AFTER
+        else:
+            self.closes_at = (time.time() if created_at is None else created_at) + LINEUP_MAX_OPEN
+        self._roster: dict[int, int] = {}
+        self._joined = 0
 
-def _format_lineup_embed(title: str, guild: nextcord.Guild, join_ids: set[int], no_ids: set[int], extra_text: str = "") -> nextcord.Embed:
-    title = title or "Siege Line-Up"
-    embed = nextcord.Embed(title=f"⚔ {title} ⚔", color=0x2ecc71)
-    if extra_text:
-        embed.description = extra_text
+    def locked(self, now: float | None = None) -> bool:
+        return (time.time() if now is None else now) >= self.closes_at
 
-    def names_from(ids: set[int]) -> str:
-        if not ids:
-            return "No one yet"
-        names = []
-        for uid in list(ids)[:30]:
-            m = guild.get_member(uid)
-            names.append(f"• {m.display_name if m else f'<@{uid}>'}")
-        return "\n".join(names)
-
-    embed.add_field(name=f"✅ Will Join ({len(join_ids)})", value=names_from(join_ids), inline=True)
-    embed.add_field(name=f"❌ Not Joining ({len(no_ids)})", value=names_from(no_ids), inline=True)
-    embed.set_footer(text="React to update your participation")
-    return embed
+    def __len__(self) -> int:
+        return len(self._roster)
 
-async def _create_lineup_message(channel: nextcord.abc.Messageable, guild: nextcord.Guild, title: str, text: str = "", ping_everyone: bool = False) -> nextcord.Message:
-    join_ids: set[int] = set()
-    no_ids: set[int] = set()
-    embed = _format_lineup_embed(title, guild, join_ids, no_ids, text)
+    def __contains__(self, uid: int) -> bool:
+        return uid in self._roster
+
+    def status(self, uid: int) -> str | None:
+        code = self._roster.get(uid)
+        return None if code is None else ("join" if code == self.JOIN else "no")
+
+    def set(self, uid: int, status: str) -> bool:
+        """Put `uid` on the `status` side ("join" or "no"); returns False if they were already there."""
+        code = self._CODES[status]
+        old = self._roster.get(uid)
+        if old == code:
+            return False
+        if old is not None:
+            del self._roster[uid]  # re-inserted below, at the end of their new side
+        self._roster[uid] = code
+        self._joined += (code == self.JOIN) - (old == self.JOIN)
+        return True
+
+    def remove(self, uid: int, status: str) -> bool:
+        """Drop `uid` if they are on the `status` side; a reaction removed from the other side is ignored."""
+        if self._roster.get(uid) != self._CODES[status]:
+            return False
+        del self._roster[uid]
+        if status == "join":
+            self._joined -= 1
+        return True
+
+    def count(self, status: str) -> int:
+        return self._joined if status == "join" else len(self._roster) - self._joined
+
+    def ids(self, status: str) -> list[int]:
+        code = self._CODES[status]
+        return [uid for uid, c in self._roster.items() if c == code]
+
+# Track active line-ups by message ID
+lineups: dict[int, Lineup] = {}
+
+# Each side is listed in the order members picked it, so names keep a
+# stable order between edits. Names come from a small LRU rather than a
+# guild.get_member() call per name, and each page of 30 names is cached and
+# only rebuilt when its members (or a cached display name) change.
+LINEUP_PAGE_SIZE = 30
+LINEUP_NAME_MAX = 30  # keeps a full page under the 1,024-char field limit
+EMBED_FIELD_LIMIT = 25
+MESSAGE_CHAR_LIMIT = 6000  # Discord's cap on all embeds of one message combined
+MESSAGE_EMBED_LIMIT = 10
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", "5000"))
+
+class DisplayNameCache:
+    """LRU of (guild ID, member ID) -> display name."""
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.epoch = 0  # bumped whenever a cached name is invalidated
+        self.hits = 0
+        self.misses = 0
+        self._names: OrderedDict[tuple[int, int], str] = OrderedDict()
+
+    def put(self, guild_id: int, uid: int, name: str) -> None:
+        key = (guild_id, uid)
+        old = self._names.get(key)
+        if old is not None and old != name:
+            self.epoch += 1
+        self._names[key] = name
+        self._names.move_to_end(key)
+        if len(self._names) > self.capacity:
+            self._names.popitem(last=False)
+
+    def get(self, guild: nextcord.Guild, uid: int) -> str:
+        key = (guild.id, uid)
+        name = self._names.get(key)
+        if name is not None:
+            self.hits += 1
+            self._names.move_to_end(key)
+            return name
+        self.misses += 1
+        m = guild.get_member(uid)
+        if m is None:
+            if LEAN_PROFILE:
+                member_fetcher.request(guild, uid)
+            return f"<@{uid}>"
+        self.put(guild.id, uid, m.display_name)
+        return m.display_name
+
+    def invalidate(self, guild_id: int, uid: int) -> None:
+        if self._names.pop((guild_id, uid), None) is not None:
+            self.epoch += 1
+
+    def invalidate_user(self, uid: int) -> None:
+        stale = [key for key in self._names if key[1] == uid]
+        for key in stale:
+            del self._names[key]
+        if stale:
+            self.epoch += 1
+
+display_names = DisplayNameCache(NAME_CACHE_SIZE)
+
+MEMBER_FETCH_CONCURRENCY = max(1, int(os.getenv("MEMBER_FETCH_CONCURRENCY", "2")))
+
+class MemberFetcher:
+    """On-demand member lookups for the lean profile, where nextcord caches no members.
+
+    Names a render could not resolve are queued and fetched over REST a few at
+    a time; line-ups listing them are then re-rendered. Members who left the
+    guild are remembered so they are not fetched again.
+    """
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.fetched = 0
+        self.failed = 0
+        self._queue: dict[tuple[int, int], nextcord.Guild] = {}
+        self._queued: set[tuple[int, int]] = set()
+        self._gone: set[tuple[int, int]] = set()
+        self._task: asyncio.Task | None = None
+
+    def request(self, guild: nextcord.Guild, uid: int) -> None:
+        key = (guild.id, uid)
+        if key in self._queued or key in self._gone:
+            return
+        self._queued.add(key)
+        self._queue[key] = guild
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._drain())
+            except RuntimeError:
+                pass  # rendered outside the loop; the next render asks again
+
+    async def member(self, guild: nextcord.Guild, uid: int):
+        """The guild member, from nextcord's cache or the API; None if they are not in the guild."""
+        m = guild.get_member(uid)
+        if m is not None:
+            return m
+        try:
+            m = await guild.fetch_member(uid)
+        except nextcord.NotFound:
+            self._gone.add((guild.id, uid))
+            return None
+        self.fetched += 1
+        display_names.put(guild.id, uid, m.display_name)
+        return m
+
+    async def _drain(self) -> None:
+        gate = asyncio.Semaphore(self.concurrency)
+        while self._queue:
+            batch, self._queue = self._queue, {}
+            found: dict[int, set[int]] = {}
+
+            async def _one(key, guild) -> None:
+                async with gate:
+                    try:
+                        if await self.member(guild, key[1]) is not None:
+                            found.setdefault(key[0], set()).add(key[1])
+                    except Exception as e:
+                        self.failed += 1
+                        swallowed("member_fetch", e)
+                    finally:
+                        self._queued.discard(key)
+
+            await asyncio.gather(*(_one(key, guild) for key, guild in batch.items()))
+            if found:
+                display_names.epoch += 1  # pages rendered with placeholder mentions are stale now
+            for message_id, lineup in list(lineups.items()):
+                uids = found.get(lineup.guild_id)
+                if uids and any(u in lineup for u in uids):
+                    lineup_edits.mark_dirty(message_id)
+
+member_fetcher = MemberFetcher(MEMBER_FETCH_CONCURRENCY)
+metrics.register(Gauge("bot_member_fetches", "Members fetched on demand (lean profile)", lambda: member_fetcher.fetched))
+
+class LineupRenderer:
+    """Builds line-up embeds, reusing cached page strings that have not changed."""
+    def __init__(self):
+        # (message id, status) -> per page: (member ids, name epoch, rendered text)
+        self._pages: dict[tuple[int, str], list[tuple[tuple[int, ...], int, str]]] = {}
+        self.pages_built = 0
+        self.pages_reused = 0
+
+    def forget(self, message_id: int) -> None:
+        self._pages.pop((message_id, "join"), None)
+        self._pages.pop((message_id, "no"), None)
+
+    def _page_text(self, guild: nextcord.Guild, ids: tuple[int, ...]) -> str:
+        lines = []
+        for uid in ids:
+            name = display_names.get(guild, uid)
+            if len(name) > LINEUP_NAME_MAX:
+                name = name[:LINEUP_NAME_MAX - 1] + "…"
+            lines.append(f"• {name}")
+        return "\n".join(lines)
+
+    def pages(self, message_id: int | None, status: str, guild: nextcord.Guild, ids: list[int]) -> list[str]:
+        if not ids:
+            return ["No one yet"]
+        cache = self._pages.setdefault((message_id, status), []) if message_id is not None else []
+        epoch = display_names.epoch
+        out = []
+        for page, start in enumerate(range(0, len(ids), LINEUP_PAGE_SIZE)):
+            chunk = tuple(ids[start:start + LINEUP_PAGE_SIZE])
+            if page < len(cache) and cache[page][1] == epoch and cache[page][0] == chunk:
+                self.pages_reused += 1
+                out.append(cache[page][2])
+                continue
+            self.pages_built += 1
+            text = self._page_text(guild, chunk)
+            if page < len(cache):
+                cache[page] = (chunk, epoch, text)
+            else:
+                cache.append((chunk, epoch, text))
+            out.append(text)
+        del cache[len(out):]
+        return out
+
+    def render(self, message_id: int | None, guild: nextcord.Guild, lineup: Lineup) -> list[nextcord.Embed]:
+        title = lineup.title or "Siege Line-Up"
+        join_pages = self.pages(message_id, "join", guild, lineup.ids("join"))
+        no_pages = self.pages(message_id, "no", guild, lineup.ids("no"))
+
+        def field_names(label: str, count: int, total: int) -> list[str]:
+            if total == 1:
+                return [f"{label} ({count})"]
+            return [f"{label} ({count}) · {i}/{total}" for i in range(1, total + 1)]
+
+        join_names = field_names("✅ Will Join", lineup.count("join"), len(join_pages))
+        no_names = field_names("❌ Not Joining", lineup.count("no"), len(no_pages))
+        # First pages sit side by side as before; overflow pages follow in order
+        fields = [(join_names[0], join_pages[0]), (no_names[0], no_pages[0])]
+        fields += list(zip(join_names[1:], join_pages[1:]))
+        fields += list(zip(no_names[1:], no_pages[1:]))
+
+        first = nextcord.Embed(title=f"⚔ {title} ⚔", color=0x2ecc71)
+        if lineup.text:
+            first.description = lineup.text
+        embeds = [first]
+        footer = "Line-up closed" if lineup.locked() else "React to update your participation"
+        # One budget for the whole message, keeping room for the longest footer
+        budget = MESSAGE_CHAR_LIMIT - len(f"…and {10 ** 7} more not shown · {footer}")
+        used = len(first.title) + len(first.description or "")
+        count = 0
+        for i, (name, value) in enumerate(fields):
+            full = count >= EMBED_FIELD_LIMIT
+            if used + len(name) + len(value) > budget or (full and len(embeds) >= MESSAGE_EMBED_LIMIT):
+                hidden = sum(v.count("\n") + 1 for _, v in fields[i:])
+                embeds[-1].set_footer(text=f"…and {hidden} more not shown · {footer}")
+                return embeds
+            if full:
+                embeds.append(nextcord.Embed(color=0x2ecc71))
+                count = 0
+            embeds[-1].add_field(name=name, value=value, inline=True)
+            used += len(name) + len(value)
+            count += 1
+        embeds[-1].set_footer(text=footer)
+        return embeds
+
+lineup_renderer = LineupRenderer()
+
+async def _create_lineup_message(channel: nextcord.abc.Messageable, guild: nextcord.Guild, title: str, text: str = "",
+                                 ping_everyone: bool = False, event_at: int | None = None) -> nextcord.Message:
+    lineup = Lineup(title, text, guild_id=guild.id, event_at=event_at)
+    embeds = lineup_renderer.render(None, guild, lineup)
     allowed = nextcord.AllowedMentions(everyone=ping_everyone, roles=True, users=True)
     content = "@everyone" if ping_everyone else None
-    msg = await channel.send(content=content, embed=embed, allowed_mentions=allowed)
+    msg = await outbound.run("reply", f"send:{channel.id}", lambda: channel.send(content=content, embeds=embeds, allowed_mentions=allowed))
     try:
-        await msg.add_reaction("✅")
-        await msg.add_reaction("❌")
-    except Exception:
-        pass
-    lineups[msg.id] = {"join": join_ids, "no": no_ids, "text": text}
+        await outbound.run("reply", f"react:{channel.id}", lambda: msg.add_reaction("✅"))
+        await outbound.run("reply", f"react:{channel.id}", lambda: msg.add_reaction("❌"))
+    except Exception as e:
+        swallowed("lineup_add_reaction", e)
+    lineup.channel_id = msg.channel.id
+    lineups[msg.id] = lineup
+    store.put_lineup(msg.id, msg.channel.id, guild.id, title, text, event_at)
+    _schedule_lifecycle(msg.id, lineup)
     return msg
 
+def _schedule_lifecycle(message_id: int, lineup: Lineup) -> None:
+    """Queue the line-up's next step: lock at closes_at, archive LINEUP_ARCHIVE_AFTER later."""
+    if lineup.locked():
+        scheduler.add(lineup.closes_at + LINEUP_ARCHIVE_AFTER, _archive_lineup, message_id, name="lineup", job_id=f"lineup:{message_id}")
+    else:
+        scheduler.add(lineup.closes_at, _lock_lineup, message_id, name="lineup", job_id=f"lineup:{message_id}")
+
+async def _lock_lineup(message_id: int) -> None:
+    # Reactions already stop at closes_at; this re-renders the footer and queues archiving
+    lineup = lineups.get(message_id)
+    if lineup is None:
+        return
+    lineup_edits.mark_dirty(message_id)
+    _schedule_lifecycle(message_id, lineup)
+    log_event("lineup_locked", message_id=message_id, joined=lineup.count("join"), declined=lineup.count("no"))
+
+async def _archive_lineup(message_id: int) -> None:
+    lineup = lineups.pop(message_id, None)
+    if lineup is None:
+        return
+    lineup_renderer.forget(message_id)
+    lineup_edits.forget(message_id)
+    store.archive_lineup(message_id, lineup)
+    log_event("lineup_archived", message_id=message_id, joined=lineup.count("join"), declined=lineup.count("no"))
+
+# Reaction storms on a fresh line-up would otherwise trigger one embed edit per
+# reaction and run straight into the per-channel edit rate limit. State is
+# mutated immediately; the edit itself is coalesced to at most one per window.
+LINEUP_EDIT_WINDOW = float(os.getenv("LINEUP_EDIT_WINDOW", "2.0"))
+LINEUP_EDIT_RETRIES = int(os.getenv("LINEUP_EDIT_RETRIES", "5"))
+
+def _render_lineup(message_id: int) -> list[nextcord.Embed] | None:
+    """Render a line-up purely from stored state (no message cache needed)."""
+    lineup = lineups.get(message_id)
+    if lineup is None:
+        return None
+    guild = bot.get_guild(lineup.guild_id)
+    if guild is None:
+        return None
+    return lineup_renderer.render(message_id, guild, lineup)
+
+class LineupEditCoalescer:
+    """Per-message edit coalescer for lineup embeds.
+
+    The first change after an idle period is edited right away; further changes
+    inside the window only mark the message dirty and are folded into a single
+    trailing edit that renders the latest state.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        self.requested = 0
+        self.sent = 0
+        self._dirty: set[int] = set()
+        self._pending: dict[int, asyncio.Task] = {}
+        self._first_change: dict[int, float] = {}
+        self._held: dict[int, float] = {}  # standby: message ID -> last change
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.requested - self.sent)
+
+    def mark_dirty(self, message_id: int) -> None:
+        self.requested += 1
+        if not leader.is_leader:
+            # A standby keeps the state current but leaves the message to the leader
+            self._held[message_id] = time.time()
+            return
+        self._dirty.add(message_id)
+        self._first_change.setdefault(message_id, time.perf_counter())
+        if message_id not in self._pending:
+            self._pending[message_id] = asyncio.create_task(self._flush(message_id))
+
+    def forget(self, message_id: int) -> None:
+        self._held.pop(message_id, None)
+
+    def release_held(self, since: float) -> None:
+        """After promotion, edit the messages that changed in standby since `since`."""
+        held, self._held = self._held, {}
+        for message_id, changed in held.items():
+            if changed >= since and message_id in lineups:
+                self.mark_dirty(message_id)
+
+    async def _flush(self, message_id: int) -> None:
+        failures = 0
+        try:
+            while message_id in self._dirty:
+                self._dirty.discard(message_id)
+                first_change = self._first_change.pop(message_id, None)
+                lineup = lineups.get(message_id)
+                embeds = _render_lineup(message_id)
+                channel = bot.get_channel(lineup.channel_id) if lineup is not None else None
+                if embeds is None or channel is None:
+                    return
+                try:
+                    await outbound.run("edit", f"edit:{channel.id}", lambda: channel.get_partial_message(message_id).edit(embeds=embeds))
+                    self.sent += 1
+                    failures = 0
+                    LINEUP_EDITS.inc("sent")
+                    if first_change is not None:
+                        REACTION_TO_EDIT.observe(time.perf_counter() - first_change)
+                        log_event("lineup_edit", message_id=message_id, latency_ms=round((time.perf_counter() - first_change) * 1000, 1))
+                except Exception as e:
+                    LINEUP_EDITS.inc("failed")
+                    status = getattr(e, "status", 0)
+                    if status == 429:
+                        HTTP_429.inc("lineup_edit")
+                    failures += 1
+                    # Try again after the window (backing off) unless the message is gone
+                    if status != 404 and failures <= LINEUP_EDIT_RETRIES:
+                        self._dirty.add(message_id)
+                        if first_change is not None:
+                            self._first_change.setdefault(message_id, first_change)
+                    else:
+                        swallowed("lineup_edit", e)
+                        failures = 0
+                # Hold the slot for one window so a burst collapses into one trailing edit
+                await asyncio.sleep(self.window * 2 ** min(failures, LINEUP_EDIT_RETRIES))
+        finally:
+            self._dirty.discard(message_id)
+            self._first_change.pop(message_id, None)
+            self._pending.pop(message_id, None)
+
+lineup_edits = LineupEditCoalescer(LINEUP_EDIT_WINDOW)
+metrics.register(Gauge("bot_lineup_edits_saved", "Lineup edits avoided by coalescing", lambda: lineup_edits.saved))
+metrics.register(Gauge("bot_lineups_active", "Line-ups tracked in memory", lambda: len(lineups)))
+
+# Raw reaction events fire for every message, cached or not, so line-ups keep
+# tracking no matter how old they are or how small the message cache is.
+_REACTION_STATUS = {"✅": "join", "❌": "no"}
+
 @bot.event
-async def on_reaction_add(reaction: nextcord.Reaction, user: nextcord.User):
+async def on_raw_reaction_add(payload: nextcord.RawReactionActionEvent):
     # Only track messages we created for lineups, ignore bot reactions
     try:
-        if user.bot or reaction.message.id not in lineups:
+        lineup = lineups.get(payload.message_id)
+        if lineup is None or not payload.guild_id or lineup.locked():
             return
-        guild = reaction.message.guild
-        if not guild:
+        member = payload.member
+        if not member or member.bot:
             return
-        member = guild.get_member(user.id)
-        if not member:
+        display_names.put(payload.guild_id, member.id, member.display_name)
+        emoji = str(payload.emoji)
+        status = _REACTION_STATUS.get(emoji)
+        if status is None:
             return
-        state = lineups[reaction.message.id]
-        if str(reaction.emoji) == "✅":
-            state["no"].discard(user.id)
-            state["join"].add(user.id)
-        elif str(reaction.emoji) == "❌":
-            state["join"].discard(user.id)
-            state["no"].add(user.id)
-        else:
-            return
-        embed = _format_lineup_embed(
-            reaction.message.embeds[0].title.replace("⚔ ", "").replace(" ⚔", "") if reaction.message.embeds else "Line-Up",
-            guild,
-            state["join"],
-            state["no"],
-            state.get("text", "")
-        )
-        try:
-            await reaction.message.edit(embed=embed)
-        except Exception:
-            pass
-    except Exception:
-        pass
+        lineup.set(payload.user_id, status)
+        store.set_member(payload.message_id, payload.user_id, status)
+        lineup_edits.mark_dirty(payload.message_id)
+        log_event("reaction", action="add", message_id=payload.message_id, user_id=payload.user_id, emoji=emoji)
+    except Exception as e:
+        swallowed("reaction_add", e)
 
 @bot.event
-async def on_reaction_remove(reaction: nextcord.Reaction, user: nextcord.User):
+async def on_raw_reaction_remove(payload: nextcord.RawReactionActionEvent):
     # Update lists on reaction removal
     try:
-        if reaction.message.id not in lineups:
+        lineup = lineups.get(payload.message_id)
+        if lineup is None or not payload.guild_id or lineup.locked():
             return
-        guild = reaction.message.guild
-        if not guild:
+        if bot.user and payload.user_id == bot.user.id:
             return
-        state = lineups[reaction.message.id]
-        if str(reaction.emoji) == "✅":
-            state["join"].discard(user.id)
-        elif str(reaction.emoji) == "❌":
-            state["no"].discard(user.id)
-        else:
+        emoji = str(payload.emoji)
+        status = _REACTION_STATUS.get(emoji)
+        if status is None:
             return
-        embed = _format_lineup_embed(
-            reaction.message.embeds[0].title.replace("⚔ ", "").replace(" ⚔", "") if reaction.message.embeds else "Line-Up",
-            guild,
-            state["join"],
-            state["no"],
-            state.get("text", "")
+        lineup.remove(payload.user_id, status)
+        store.remove_member(payload.message_id, payload.user_id, status)
+        lineup_edits.mark_dirty(payload.message_id)
+        log_event("reaction", action="remove", message_id=payload.message_id, user_id=payload.user_id, emoji=emoji)
+    except Exception as e:
+        swallowed("reaction_remove", e)
+
+@bot.event
+async def on_member_update(before: nextcord.Member, after: nextcord.Member):
+    # Keep cached line-up names in sync with nickname changes
+    if before.display_name != after.display_name:
+        display_names.invalidate(after.guild.id, after.id)
+
+@bot.event
+async def on_user_update(before: nextcord.User, after: nextcord.User):
+    if before.display_name != after.display_name:
+        display_names.invalidate_user(after.id)
+
+# --- LINEUP RECOVERY ---
+# On startup, recent line-up messages in LINEUP_CHANNEL_IDS are found in
+# channel history and their ✅/❌ reactions are read back, so line-ups keep
+# updating after a restart (or STATE_DB loss) and reactions made while the
+# bot was down are picked up. Reaction pages are fetched in parallel with a
+# bounded number of line-ups in flight.
+LINEUP_CHANNEL_IDS = [int(x) for x in re.split(r"[,\s]+", os.getenv("LINEUP_CHANNEL_IDS", "").strip()) if x.isdigit()]
+LINEUP_RECOVERY_SCAN = int(os.getenv("LINEUP_RECOVERY_SCAN", "200"))
+LINEUP_RECOVERY_CONCURRENCY = max(1, int(os.getenv("LINEUP_RECOVERY_CONCURRENCY", "8")))
+LINEUP_TITLES = ("Siege Line-Up", "Secret Room Line-Up")
+DISCORD_PAGE_SIZE = 100  # messages per history page and users per reaction page
+
+class RecoveryReport:
+    __slots__ = ("scanned", "recovered", "reconciled", "changed", "failed", "api_calls", "elapsed")
+
+    def __init__(self):
+        self.scanned = 0
+        self.recovered = 0
+        self.reconciled = 0
+        self.changed = 0
+        self.failed = 0
+        self.api_calls = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        found = self.recovered + self.reconciled
+        per = self.api_calls / found if found else 0.0
+        return (
+            f"{self.recovered} recovered, {self.reconciled} reconciled ({self.changed} changed), "
+            f"{self.failed} failed from {self.scanned} message(s); {self.api_calls} API call(s), "
+            f"{per:.1f} per line-up, {self.elapsed * 1000:.0f} ms"
         )
-        try:
-            await reaction.message.edit(embed=embed)
-        except Exception:
-            pass
-    except Exception:
-        pass
 
-# Prefix command version (instant availability)
+async def _paged(fetch, cursor: str, limit: int | None, report: RecoveryReport):
+    """Yield from `fetch(limit=..., <cursor>=last item)` one page-sized call at a time.
+
+    Each call is a single request, so `report.api_calls` counts what was fetched.
+    """
+    last = None
+    while limit is None or limit > 0:
+        size = DISCORD_PAGE_SIZE if limit is None else min(DISCORD_PAGE_SIZE, limit)
+        report.api_calls += 1
+        page = [item async for item in fetch(limit=size, **({cursor: last} if last is not None else {}))]
+        for item in page:
+            yield item
+        if len(page) < size:
+            return
+        if limit is not None:
+            limit -= len(page)
+        last = page[-1]
+
+def _lineup_title(message) -> str | None:
+    """The line-up title of one of our messages (embed titled "⚔ <title> ⚔"), if it is one."""
+    if not message.embeds:
+        return None
+    title = (message.embeds[0].title or "").strip("⚔ ")
+    return title if title in LINEUP_TITLES else None
+
+async def _reaction_user_ids(message, emoji: str, report: RecoveryReport) -> list[int]:
+    reaction = next((r for r in message.reactions if str(r.emoji) == emoji), None)
+    if reaction is None:
+        return []
+    ids = []
+    guild = message.guild
+    async for user in _paged(reaction.users, "after", None, report):
+        if user.bot:
+            continue
+        ids.append(user.id)
+        # Only a Member carries the guild nickname the embed shows
+        member = user if isinstance(user, nextcord.Member) else (guild.get_member(user.id) if guild else None)
+        if member is not None:
+            display_names.put(guild.id, user.id, member.display_name)
+    return ids
+
+def _reconcile_lineup(message_id: int, lineup: Lineup, join_ids: list[int], no_ids: list[int]) -> bool:
+    """Make `lineup` match the reactions on Discord; returns True if anything changed.
+
+    Members already listed keep their place; newcomers are appended. Someone
+    with both reactions stays on the side they were stored on, else joins.
+    """
+    both = set(join_ids) & set(no_ids)
+    keep = {
+        "join": {u for u in join_ids if u not in both or lineup.status(u) != "no"},
+        "no": {u for u in no_ids if u not in both or lineup.status(u) == "no"},
+    }
+    changed = False
+    for status in ("join", "no"):
+        for uid in lineup.ids(status):
+            if uid not in keep[status]:
+                lineup.remove(uid, status)
+                store.remove_member(message_id, uid, status)
+                changed = True
+    for status, order in (("join", join_ids), ("no", no_ids)):
+        for uid in order:
+            if uid in keep[status] and lineup.set(uid, status):
+                store.set_member(message_id, uid, status)
+                changed = True
+    return changed
+
+async def recover_lineups(channel_ids=None, *, author_id: int | None = None, scan: int = LINEUP_RECOVERY_SCAN,
+                          concurrency: int = LINEUP_RECOVERY_CONCURRENCY) -> RecoveryReport:
+    """Rebuild line-ups from the bot's recent messages in `channel_ids` (default LINEUP_CHANNEL_IDS)."""
+    report = RecoveryReport()
+    started = time.perf_counter()
+    author_id = author_id if author_id is not None else bot.user.id
+    limit = asyncio.Semaphore(concurrency)
+
+    async def scan_channel(channel_id: int) -> list:
+        channel = await _resolve_channel(channel_id)
+        guild = getattr(channel, "guild", None)
+        if channel is None or guild is None or not _owns_guild(guild.id):
+            return []
+        found, seen = [], 0
+        async for message in _paged(channel.history, "before", scan, report):
+            seen += 1
+            if message.author.id == author_id:
+                title = _lineup_title(message)
+                if title:
+                    found.append((message, title))
+        report.scanned += seen
+        return found
+
+    async def recover_one(message, title: str) -> None:
+        lineup = lineups.get(message.id)
+        if lineup is not None and lineup.locked():
+            report.reconciled += 1  # reactions after the lock do not count
+            return
+        if lineup is None:
+            text = message.embeds[0].description or ""
+            posted = getattr(message, "created_at", None) or dt.datetime.now(dt.timezone.utc)
+            candidate = Lineup(title, text, message.channel.id, message.guild.id,
+                               _time_from_text(text, now=posted), posted.timestamp())
+            if candidate.locked(time.time() - LINEUP_ARCHIVE_AFTER):
+                return  # past its archive time already
+        async with limit:
+            try:
+                join_ids, no_ids = await asyncio.gather(
+                    _reaction_user_ids(message, "✅", report), _reaction_user_ids(message, "❌", report)
+                )
+            except Exception as e:
+                swallowed("lineup_recover", e)
+                report.failed += 1
+                return
+        if lineup is None:
+            lineup = lineups.setdefault(message.id, candidate)
+            store.put_lineup(message.id, lineup.channel_id, lineup.guild_id, title, lineup.text, lineup.event_at,
+                             posted.timestamp())
+            _schedule_lifecycle(message.id, lineup)
+            report.recovered += 1
+        else:
+            report.reconciled += 1
+        if _reconcile_lineup(message.id, lineup, join_ids, no_ids):
+            report.changed += 1
+            lineup_edits.mark_dirty(message.id)
+
+    channel_ids = LINEUP_CHANNEL_IDS if channel_ids is None else channel_ids
+    batches = await asyncio.gather(*(scan_channel(c) for c in channel_ids), return_exceptions=True)
+    await asyncio.gather(*(recover_one(m, t) for batch in batches if isinstance(batch, list) for m, t in batch))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+async def _lineup_command(inv: Invocation, title: str, event_name: str, text: str, ping_everyone: bool) -> None:
+    text = text or ""
+    await inv.defer()
+    ts = _time_from_text(text)
+    try:
+        msg = await _create_lineup_message(inv.channel, inv.guild, title, text, ping_everyone=ping_everyone, event_at=ts)
+    except Exception as e:
+        raise UsageError(f"Failed to create lineup: {e}")
+    if ts:
+        await _schedule_announcement(msg.id, inv.channel, ts, event_name)
+    # Remove the invoking command for cleanliness
+    await inv.cleanup()
+
+@core_command("siegelineup")
+async def siegelineup_core(inv: Invocation, text: str = "", ping_everyone: bool = False):
+    await _lineup_command(inv, "Siege Line-Up", "Guild Siege", text, ping_everyone)
+
+@core_command("secretroomlineup")
+async def secretroomlineup_core(inv: Invocation, text: str = "", ping_everyone: bool = False):
+    await _lineup_command(inv, "Secret Room Line-Up", "Secret Room", text, ping_everyone)
+
+# Prefix command versions (instant availability)
 @bot.command(name="siegelineup")
-@has_creator_role()
 @commands.guild_only()
 async def siegelineup_cmd(ctx: commands.Context, *, text: str = ""):
-    try:
-        msg = await _create_lineup_message(ctx.channel, ctx.guild, "Siege Line-Up", text, ping_everyone=("@everyone" in text))
-        ts = _extract_unix_timestamp(text)
-        if not ts:
-            ts = _infer_local_time_unix(text or "")
-        if ts:
-            await _schedule_announcement(msg.id, ctx.channel, ts, "Guild Siege")
-        # Try to delete invoking command for cleanliness
-        try:
-            await ctx.message.delete()
-        except Exception:
-            pass
-    except Exception as e:
-        await ctx.send(f"❌ Failed to create lineup: {e}")
+    await dispatch(Invocation.from_context(ctx), text=text, ping_everyone=("@everyone" in text))
 
-# Secret room lineup (prefix)
 @bot.command(name="secretroomlineup")
-@has_creator_role()
 @commands.guild_only()
 async def secretroomlineup_cmd(ctx: commands.Context, *, text: str = ""):
-    try:
-        msg = await _create_lineup_message(ctx.channel, ctx.guild, "Secret Room Line-Up", text, ping_everyone=("@everyone" in text))
-        ts = _extract_unix_timestamp(text)
-        if not ts:
-            ts = _infer_local_time_unix(text or "")
-        if ts:
-            await _schedule_announcement(msg.id, ctx.channel, ts, "Secret Room")
-        try:
-            await ctx.message.delete()
-        except Exception:
-            pass
-    except Exception as e:
-        await ctx.send(f"❌ Failed to create lineup: {e}")
+    await dispatch(Invocation.from_context(ctx), text=text, ping_everyone=("@everyone" in text))
 
 # --- STATUS ---
 def _format_uptime() -> str:
@@ -459,81 +2937,163 @@ def _format_uptime() -> str:
             parts.append(f"{m}m")
         parts.append(f"{r}s")
         return " ".join(parts)
-    except Exception:
+    except Exception as e:
+        swallowed("uptime_format", e)
         return "unknown"
 
+@core_command("status", creator_only=False)
+async def status_core(inv: Invocation):
+    embed = nextcord.Embed(title="Bot Status", color=0x3498db)
+    embed.add_field(name="Uptime", value=_format_uptime(), inline=True)
+    embed.add_field(name="Latency", value=f"{round(bot.latency*1000)} ms", inline=True)
+    embed.add_field(name="Servers", value=str(len(bot.guilds)), inline=True)
+    embed.add_field(name="Lineup edits", value=f"{lineup_edits.sent} sent, {lineup_edits.saved} saved", inline=True)
+    await inv.reply(embed=embed)
+
+@core_command("ping", aliases=("pingpong",), creator_only=False)
+async def ping_core(inv: Invocation):
+    await inv.reply(f"Pong {round(bot.latency*1000)} ms")
+
+@core_command("nextffa", creator_only=False)
+async def nextffa_core(inv: Invocation):
+    nt = _next_ffa_local()
+    unix = int(nt.astimezone(dt.timezone.utc).timestamp())
+    allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
+    await inv.reply(f"Next FFA: <t:{unix}:F> (<t:{unix}:R>) Asia/Manila", allowed_mentions=allowed)
+
+@core_command("upcoming", creator_only=False)
+async def upcoming_core(inv: Invocation, count: int = 5):
+    """Show the next <count> recurring event occurrences."""
+    count = max(1, min(count, 20))
+    now = dt.datetime.now(dt.timezone.utc)
+    merged = sorted(
+        (occ, ev.name) for ev in recurring_events.values() for occ in ev.next_n(count, now)
+    )[:count]
+    if not merged:
+        await inv.reply("No recurring events configured.")
+        return
+    lines = [f"**{name}** <t:{int(occ.timestamp())}:F> (<t:{int(occ.timestamp())}:R>)" for occ, name in merged]
+    allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
+    await inv.reply("\n".join(lines), allowed_mentions=allowed)
+
+@core_command("worldboss", aliases=("wb",))
+async def worldboss_core(inv: Invocation, duration: str | None = None):
+    """Start this channel's world boss timer (default WORLD_BOSS_DEFAULT), replacing any running one."""
+    text = (duration or WORLD_BOSS_DEFAULT).strip()
+    seconds = _parse_duration(text)
+    if not seconds or DURATION_RE.sub("", text).strip():
+        raise UsageError(f"Invalid duration `{text}`. Use e.g. 50m, 2h or 1h3m.")
+    if seconds > WORLD_BOSS_MAX_SECONDS:
+        raise UsageError("World boss timers can run for at most 24 hours.")
+    await inv.defer()  # the countdown post may wait in the outbound queue
+    previous = boss_timers.stop(inv.channel.id)
+    timer = boss_timers.start(inv.channel.id, seconds)
+    message = await outbound.run("reply", f"send:{inv.channel.id}", lambda: inv.channel.send(embed=_world_boss_embed(timer.ends_at)))
+    boss_timers.attach(inv.channel.id, message)
+    if previous is not None and previous.message is not None:
+        outbound.post("edit", f"edit:{inv.channel.id}",
+                      lambda: previous.message.edit(embed=_world_boss_embed(previous.ends_at, stopped=True)))
+    if inv.interaction is not None:
+        await inv.reply(f"⏱ World Boss timer started. Starts <t:{int(timer.ends_at)}:R>.")
+    else:
+        await inv.cleanup()
+
+@core_command("wbstop", aliases=("worldbossstop",))
+async def wbstop_core(inv: Invocation):
+    """Cancel this channel's world boss timer."""
+    timer = boss_timers.stop(inv.channel.id)
+    if timer is None:
+        raise UsageError("No world boss timer is running in this channel.")
+    if timer.message is not None:
+        outbound.post("edit", f"edit:{inv.channel.id}", lambda: timer.message.edit(embed=_world_boss_embed(timer.ends_at, stopped=True)))
+    await inv.reply("⏹ World Boss timer stopped.", transient=True)
+
+@core_command("reloadcmds")
+async def reloadcmds_core(inv: Invocation):
+    count = await _sync_guild_commands(inv.guild, force=True)
+    await inv.reply(f"✅ Synced {count} slash command(s).", transient=True)
+
+@core_command("cmds", creator_only=False)
+async def cmds_core(inv: Invocation):
+    items = []
+    try:
+        cmds = await bot.fetch_application_commands(guild_id=inv.guild.id)
+        items = [c.name for c in cmds] if cmds else []
+    except Exception as e:
+        swallowed("cmds_fetch", e)
+    await inv.reply(f"Commands: {', '.join(items) or 'none'}")
+
+@core_command("jobs")
+async def jobs_core(inv: Invocation):
+    """List pending scheduled jobs."""
+    jobs = scheduler.list()
+    if not jobs:
+        await inv.reply("No scheduled jobs.")
+        return
+    lines = [f"`{j.id}` <t:{int(j.when)}:F> (<t:{int(j.when)}:R>)" for j in jobs[:20]]
+    if len(jobs) > 20:
+        lines.append(f"…and {len(jobs) - 20} more")
+    allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
+    await inv.reply(f"⏱ {len(jobs)} scheduled job(s):\n" + "\n".join(lines), allowed_mentions=allowed)
+
+@core_command("canceljob")
+async def canceljob_core(inv: Invocation, job_id: str):
+    """Cancel a scheduled job by its ID."""
+    if not scheduler.cancel(job_id):
+        raise UsageError(f"No scheduled job `{job_id}`.")
+    if job_id.startswith("announce:"):
+        store.delete_announcement(int(job_id.split(":", 1)[1]))
+    elif job_id.startswith("worldboss:"):
+        boss_timers.stop(int(job_id.split(":", 1)[1]))
+    await inv.reply(f"✅ Cancelled `{job_id}`.")
+
 @bot.command(name="status")
 @commands.guild_only()
 async def status_cmd(ctx: commands.Context):
-    try:
-        embed = nextcord.Embed(title="Bot Status", color=0x3498db)
-        embed.add_field(name="Uptime", value=_format_uptime(), inline=True)
-        embed.add_field(name="Latency", value=f"{round(bot.latency*1000)} ms", inline=True)
-        embed.add_field(name="Servers", value=str(len(bot.guilds)), inline=True)
-        await ctx.send(embed=embed)
-    except Exception:
-        pass
+    await dispatch(Invocation.from_context(ctx))
 
 @bot.command(name="ping")
 @commands.guild_only()
 async def ping_cmd(ctx: commands.Context):
-    try:
-        await ctx.send(f"Pong {round(bot.latency*1000)} ms")
-    except Exception:
-        pass
+    await dispatch(Invocation.from_context(ctx))
 
 @bot.command(name="nextffa")
 @commands.guild_only()
 async def nextffa_cmd(ctx: commands.Context):
-    try:
-        nt = _next_ffa_local()
-        unix = int(nt.astimezone(dt.timezone.utc).timestamp())
-        msg = f"Next FFA: <t:{unix}:F> (<t:{unix}:R>) Asia/Manila"
-        allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
-        await ctx.send(msg, allowed_mentions=allowed)
-    except Exception:
-        pass
+    await dispatch(Invocation.from_context(ctx))
 
-@bot.command(name="worldboss")
-@has_creator_role()
+@bot.command(name="upcoming")
 @commands.guild_only()
-async def worldboss_cmd(ctx: commands.Context):
-    try:
-        now = dt.datetime.now(dt.timezone.utc)
-        end = now + dt.timedelta(hours=2)
-        unix_end = int(end.timestamp())
-        mins = int(((end - now).total_seconds() + 59) // 60)
-        await ctx.send(f"⏱ World Boss timer started. Starts in {mins} minutes. Ends at <t:{unix_end}:F> (<t:{unix_end}:R>)")
-        async def _task():
-            try:
-                await asyncio.sleep(2*60*60)
-                allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
-                await ctx.send(WORLD_BOSS_MESSAGE, allowed_mentions=allowed)
-            except Exception:
-                pass
-        asyncio.create_task(_task())
-    except Exception:
-        pass
+async def upcoming_cmd(ctx: commands.Context, count: int = 5):
+    """Show the next <count> recurring event occurrences."""
+    await dispatch(Invocation.from_context(ctx), count=count)
+
+@bot.command(name="worldboss", aliases=["wb"])
+@commands.guild_only()
+async def worldboss_cmd(ctx: commands.Context, duration: str = None):
+    await dispatch(Invocation.from_context(ctx), duration=duration)
+
+@bot.command(name="wbstop", aliases=["worldbossstop"])
+@commands.guild_only()
+async def wbstop_cmd(ctx: commands.Context):
+    await dispatch(Invocation.from_context(ctx))
 
 @bot.command(name="reloadcmds")
-@has_creator_role()
 @commands.guild_only()
 async def reloadcmds_cmd(ctx: commands.Context):
-    try:
-        synced = await bot.sync_application_commands(guild_id=ctx.guild.id)
-        try:
-            msg = await ctx.send(f"✅ Synced {len(synced) if hasattr(synced,'__len__') else 0} slash command(s).")
-            await asyncio.sleep(5)
-            await msg.delete()
-        except Exception:
-            pass
-    except Exception:
-        try:
-            err = await ctx.send("❌ Failed to sync commands.")
-            await asyncio.sleep(5)
-            await err.delete()
-        except Exception:
-            pass
+    await dispatch(Invocation.from_context(ctx))
+
+@bot.command(name="jobs")
+@commands.guild_only()
+async def jobs_cmd(ctx: commands.Context):
+    """List pending scheduled jobs (CREATOR only)."""
+    await dispatch(Invocation.from_context(ctx))
+
+@bot.command(name="canceljob")
+@commands.guild_only()
+async def canceljob_cmd(ctx: commands.Context, job_id: str):
+    """Cancel a scheduled job by its ID (see !jobs)."""
+    await dispatch(Invocation.from_context(ctx), job_id=job_id)
 
 # --- CREATOR PANEL (buttons) ---
 class LineupPanel(nextcord.ui.View):
@@ -542,110 +3102,390 @@ class LineupPanel(nextcord.ui.View):
 
     @nextcord.ui.button(label="Create Siege Line-Up", style=nextcord.ButtonStyle.success, custom_id="lineup_create_siege")
     async def create_siege(self, button: nextcord.ui.Button, interaction: nextcord.Interaction):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this.", ephemeral=True)
-            return
-        await interaction.response.defer(ephemeral=True)
-        await _create_lineup_message(interaction.channel, interaction.guild, "Siege Line-Up", "", ping_everyone=False)
-        await interaction.followup.send("✅ Siege line-up posted.", ephemeral=True)
+        await dispatch(Invocation.from_interaction(interaction, "siegelineup", "button"))
 
     @nextcord.ui.button(label="Create Secret Room Line-Up", style=nextcord.ButtonStyle.primary, custom_id="lineup_create_secret")
     async def create_secret(self, button: nextcord.ui.Button, interaction: nextcord.Interaction):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this.", ephemeral=True)
-            return
-        await interaction.response.defer(ephemeral=True)
-        await _create_lineup_message(interaction.channel, interaction.guild, "Secret Room Line-Up", "", ping_everyone=False)
-        await interaction.followup.send("✅ Secret room line-up posted.", ephemeral=True)
+        await dispatch(Invocation.from_interaction(interaction, "secretroomlineup", "button"))
+
+@core_command("setuplineuppanel")
+async def setuplineuppanel_core(inv: Invocation):
+    await outbound.run("reply", f"send:{inv.channel.id}", lambda: inv.channel.send("Creator Panel: use buttons to create line-ups.", view=LineupPanel()))
+    await inv.cleanup()
 
 @bot.command(name="setuplineuppanel")
-@has_creator_role()
 @commands.guild_only()
 async def setuplineuppanel(ctx: commands.Context):
-    try:
-        view = LineupPanel()
-        await ctx.send("Creator Panel: use buttons to create line-ups.", view=view)
-        try:
-            await ctx.message.delete()
-        except Exception:
-            pass
-    except Exception:
-        pass
+    await dispatch(Invocation.from_context(ctx))
+
+# --- Scheduling announcements based on time expressions ---
+# Announcements overdue by more than this at restore time are dropped rather than pinged late
+ANNOUNCE_GRACE_SECONDS = int(os.getenv("ANNOUNCE_GRACE_SECONDS", "600"))
 
-# --- Scheduling announcements based on Discord timestamp tags ---
-TIMESTAMP_RE = re.compile(r"<t:(\d+)(?::[dDtTfFR])?>")
+# --- MENTION FAN-OUT ---
+# Pings are packed into as few messages as fit Discord's 2,000-character
+# limit and sent a few at a time; 429s and 5xx are retried with backoff.
+DISCORD_MESSAGE_LIMIT = 2000
+FANOUT_CONCURRENCY = max(1, int(os.getenv("FANOUT_CONCURRENCY", "3")))
+FANOUT_MAX_RETRIES = 5
+
+class DeliveryReport:
+    """Who was pinged in which message, plus anything that could not be sent."""
+    __slots__ = ("delivered", "failed", "retries", "elapsed")
+
+    def __init__(self):
+        self.delivered: list[tuple[int, list[int]]] = []  # (message id, user ids)
+        self.failed: list[list[int]] = []
+        self.retries = 0
+        self.elapsed = 0.0
+
+    @property
+    def pinged(self) -> int:
+        return sum(len(ids) for _, ids in self.delivered)
+
+    def summary(self) -> str:
+        return (
+            f"{self.pinged} pinged in {len(self.delivered)} message(s), "
+            f"{sum(len(ids) for ids in self.failed)} failed, {self.retries} retr(ies), {self.elapsed:.2f}s"
+        )
+
+def _pack_mentions(user_ids, suffix: str, limit: int = DISCORD_MESSAGE_LIMIT) -> list[tuple[str, list[int]]]:
+    """Greedily pack `<@id>` mentions plus `suffix` into messages under `limit` characters."""
+    budget = limit - len(suffix) - 1
+    packed: list[tuple[str, list[int]]] = []
+    parts: list[str] = []
+    ids: list[int] = []
+    used = -1  # no leading space before the first mention
+    for uid in user_ids:
+        mention = f"<@{uid}>"
+        if parts and used + 1 + len(mention) > budget:
+            packed.append((" ".join(parts) + " " + suffix, ids))
+            parts, ids, used = [], [], -1
+        parts.append(mention)
+        ids.append(uid)
+        used += 1 + len(mention)
+    if parts:
+        packed.append((" ".join(parts) + " " + suffix, ids))
+    return packed
+
+def _retry_delay(error: Exception, attempt: int) -> float | None:
+    """Seconds to wait before retrying `error`, or None if it is not retryable."""
+    status = getattr(error, "status", 0)
+    if status != 429 and not (500 <= status < 600):
+        return None
+    retry_after = _retry_after(error)
+    backoff = min(30.0, 0.5 * (2 ** attempt)) * (0.5 + random.random())
+    return max(retry_after or 0.0, backoff)
+
+async def fan_out_mentions(channel: nextcord.abc.Messageable, user_ids, suffix: str, *, concurrency: int = FANOUT_CONCURRENCY) -> DeliveryReport:
+    """Ping `user_ids` in `channel`, returning a per-message delivery report."""
+    report = DeliveryReport()
+    started = time.perf_counter()
+    chunks = _pack_mentions(user_ids, suffix)
+    allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=True)
+    gate = asyncio.Semaphore(concurrency)
+    results: list[tuple[int, list[int]] | None] = [None] * len(chunks)
+
+    async def _send(index: int, content: str, ids: list[int]) -> None:
+        async with gate:
+            for attempt in range(FANOUT_MAX_RETRIES + 1):
+                try:
+                    msg = await outbound.run("announce", f"send:{channel.id}", lambda: channel.send(content, allowed_mentions=allowed))
+                    results[index] = (msg.id, ids)
+                    return
+                except Exception as e:
+                    delay = _retry_delay(e, attempt)
+                    if delay is None or attempt == FANOUT_MAX_RETRIES:
+                        report.failed.append(ids)
+                        return
+                    report.retries += 1
+                    if getattr(e, "status", 0) == 429:
+                        HTTP_429.inc("announce")
+                    await asyncio.sleep(delay)
+
+    await asyncio.gather(*(_send(i, content, ids) for i, (content, ids) in enumerate(chunks)))
+    report.delivered = [r for r in results if r is not None]
+    report.elapsed = time.perf_counter() - started
+    return report
+
+async def _announce_lineup(message_id: int, channel_id: int, event_name: str) -> None:
+    try:
+        channel = await _resolve_channel(channel_id)
+        if channel is None:
+            return
+        lineup = lineups.get(message_id)
+        ids = lineup.ids("join") if lineup is not None else []
+        if ids:
+            report = await fan_out_mentions(channel, ids, f"prepare your gear — {event_name} has started!")
+            log_event("announce", event_name=event_name, message_id=message_id, pinged=report.pinged,
+                      messages=len(report.delivered), failed=sum(len(ids) for ids in report.failed),
+                      retries=report.retries, ms=round(report.elapsed * 1000))
+        else:
+            await outbound.run("announce", f"send:{channel_id}", lambda: channel.send(f"{event_name} has started! Prepare your gear."))
+    except Exception as e:
+        swallowed("announce_lineup", e)
+    finally:
+        store.delete_announcement(message_id)
 
 async def _schedule_announcement(message_id: int, channel: nextcord.abc.Messageable, when_unix: int, event_name: str):
     try:
-        now = dt.datetime.now(dt.timezone.utc)
-        when = dt.datetime.fromtimestamp(int(when_unix), tz=dt.timezone.utc)
-        delay = (when - now).total_seconds()
-        async def _announce():
-            try:
-                state = lineups.get(message_id)
-                ids = (state.get("join") if state else set()) if isinstance(state, dict) else set()
-                ids_list = list(ids)
-                if ids_list:
-                    # Send mentions in safe chunks
-                    chunk_size = 50
-                    for i in range(0, len(ids_list), chunk_size):
-                        chunk = ids_list[i:i+chunk_size]
-                        mentions = " ".join(f"<@{uid}>" for uid in chunk)
-                        content = f"{mentions} prepare your gear — {event_name} has started!"
-                        allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=True)
-                        await channel.send(content, allowed_mentions=allowed)
-                else:
-                    await channel.send(f"{event_name} has started! Prepare your gear.")
-            except Exception:
-                pass
-        if delay <= 0:
-            await _announce()
+        if int(when_unix) <= time.time():
+            await _announce_lineup(message_id, channel.id, event_name)
             return
-        async def _task():
-            try:
-                await asyncio.sleep(delay)
-                await _announce()
-            except Exception:
-                pass
-        asyncio.create_task(_task())
-    except Exception:
-        pass
+        store.put_announcement(message_id, channel.id, when_unix, event_name)
+        scheduler.add(when_unix, _announce_lineup, message_id, channel.id, event_name, name="announce", job_id=f"announce:{message_id}")
+    except Exception as e:
+        swallowed("schedule_announcement", e)
+
+_PENDING_ANNOUNCEMENTS: list[tuple[int, int, int, str]] = []
 
-def _extract_unix_timestamp(text: str) -> int | None:
+async def _restore_state() -> None:
+    """Load persisted line-ups before connecting; announcements wait for on_ready."""
+    started = time.perf_counter()
     try:
-        m = TIMESTAMP_RE.search(text or "")
-        if not m:
+        with _phase("restore"):
+            restored, pending = await asyncio.to_thread(store.load, _owns_guild)
+            _synced_hashes.update(await asyncio.to_thread(store.load_sync_hashes, _owns_guild))
+    except Exception as e:
+        log_event("state_restore_failed", logging.ERROR, exc_info=e)
+        return
+    lineups.update(restored)
+    for message_id, lineup in restored.items():
+        _schedule_lifecycle(message_id, lineup)
+    _PENDING_ANNOUNCEMENTS.extend(pending)
+    log_event("state_restored", lineups=len(restored), announcements=len(pending),
+              ms=round((time.perf_counter() - started) * 1000))
+
+async def _reschedule_restored_announcements() -> None:
+    now = int(time.time())
+    while _PENDING_ANNOUNCEMENTS:
+        message_id, channel_id, when_unix, event_name = _PENDING_ANNOUNCEMENTS.pop()
+        if when_unix < now - ANNOUNCE_GRACE_SECONDS:
+            store.delete_announcement(message_id)
+            continue
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await bot.fetch_channel(channel_id)
+            except Exception as e:
+                swallowed("restore_announcement_channel", e)
+                continue
+        await _schedule_announcement(message_id, channel, when_unix, event_name)
+
+async def _on_promoted() -> None:
+    """Take over scheduled work after winning the leader lease."""
+    now = time.time()
+    # Whatever the previous leader already fired is gone from the store;
+    # rebuild line-up announcements from there and drop other overdue jobs.
+    restored, pending = await asyncio.to_thread(store.load, _owns_guild)
+    # Line-ups the previous leader created while we stood by
+    for message_id, lineup in restored.items():
+        if message_id not in lineups:
+            lineups[message_id] = lineup
+            _schedule_lifecycle(message_id, lineup)
+    for job in scheduler.list():
+        # Overdue line-up lifecycle steps still apply; they run as soon as we resume
+        if job.name == "announce" or (job.when <= now and job.name != "lineup"):
+            if job.name == "worldboss":
+                # The previous leader owned that alert; end the countdown with it
+                boss_timers.stop(int(job.id.split(":", 1)[1]))
+            else:
+                scheduler.cancel(job.id)
+    _PENDING_ANNOUNCEMENTS[:] = pending
+    await _reschedule_restored_announcements()
+    # Recurring jobs that went overdue were dropped above; arm their next occurrence
+    for key, event in recurring_events.items():
+        if SHARD_COUNT > 0 and bot.get_channel(event.channel_id) is None:
+            continue
+        if scheduler.get(f"recurring:{key}") is None:
+            _schedule_recurring(event)
+    scheduler.resume()
+    # Reactions since the previous leader went quiet were never shown
+    lineup_edits.release_held(now - 2 * leader.ttl - LINEUP_EDIT_WINDOW)
+
+async def _on_demoted() -> None:
+    scheduler.pause()
+
+def _prune_standby_lineups() -> None:
+    """Drop line-ups the leader has archived; archive jobs never run on a paused standby."""
+    cutoff = time.time() - LINEUP_ARCHIVE_AFTER
+    for message_id in [m for m, lineup in lineups.items() if lineup.closes_at <= cutoff]:
+        lineups.pop(message_id, None)
+        lineup_renderer.forget(message_id)
+        lineup_edits.forget(message_id)
+        scheduler.cancel(f"lineup:{message_id}")
+
+leader.on_elected = _on_promoted
+leader.on_demoted = _on_demoted
+leader.on_standby = _prune_standby_lineups
+
+# --- TIME EXPRESSIONS ---
+# Line-up text is split into words and read left to right, so only words
+# that look like times count: "Siege 5v5 at 8pm" is 20:00, not 05:00.
+# Understood (Asia/Manila): <t:...> tags, "8pm", "8:30 am", "20:00", "at 9",
+# "noon", "in 45m", "in 1h 30m", "in 2 hours", "today"/"tonight"/"tomorrow",
+# weekdays ("sat 9pm", "next friday 20:00"). Parsed shapes are cached per
+# text; the returned time is resolved against the current clock on each call.
+TIME_PARSE_CACHE = int(os.getenv("TIME_PARSE_CACHE", "1024"))
+TIME_TOKEN_RE = re.compile(r"<t:\d+(?::[a-z])?>|[\w:.]+|@", re.IGNORECASE)
+CLOCK_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?(am|pm)?")
+DURATION_TOKEN_RE = re.compile(r"(?:\d+(?:d|h|hr|hrs|m|min|mins|s|sec|secs))+")
+DURATION_PART_RE = re.compile(r"(\d+)([a-z]+)")
+TIME_UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+WEEKDAYS = {
+    name: i for i, names in enumerate((
+        ("mon", "monday"), ("tue", "tues", "tuesday"), ("wed", "wednesday"), ("thu", "thur", "thurs", "thursday"),
+        ("fri", "friday"), ("sat", "saturday"), ("sun", "sunday"),
+    )) for name in names
+}
+DAY_WORDS = {"today": 0, "tonight": 0, "tomorrow": 1, "tmr": 1, "tmrw": 1}
+
+class TimeExpression:
+    """The shape of a parsed time: a fixed instant, an offset from now, or a wall-clock time."""
+    __slots__ = ("unix", "seconds", "hour", "minute", "days", "weekday", "next_week")
+
+    def __init__(self, unix=None, seconds=None, hour=None, minute=0, days=None, weekday=None, next_week=False):
+        self.unix = unix
+        self.seconds = seconds
+        self.hour = hour
+        self.minute = minute
+        self.days = days
+        self.weekday = weekday
+        self.next_week = next_week
+
+    def resolve(self, now: dt.datetime | None = None) -> int | None:
+        """Unix time this expression refers to, relative to `now`."""
+        if self.unix is not None:
+            return self.unix
+        now = now or dt.datetime.now(dt.timezone.utc)
+        if self.seconds is not None:
+            return int(now.timestamp()) + self.seconds
+        now_local = now.astimezone(PH_TZ)
+        candidate = now_local.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if self.weekday is not None:
+            ahead = (self.weekday - now_local.weekday()) % 7
+            if self.next_week and ahead == 0:
+                ahead = 7
+            candidate += dt.timedelta(days=ahead)
+            if candidate <= now_local:
+                candidate += dt.timedelta(days=7)
+        elif self.days is not None:
+            candidate += dt.timedelta(days=self.days)
+        elif candidate <= now_local:
+            candidate += dt.timedelta(days=1)
+        return int(candidate.astimezone(dt.timezone.utc).timestamp())
+
+def _tokenize_time(text: str) -> list[str]:
+    tokens = []
+    for raw in TIME_TOKEN_RE.findall(text.lower()):
+        if raw.startswith("<t:"):
+            tokens.append(raw)
+            continue
+        word = raw.replace("a.m.", "am").replace("p.m.", "pm").strip(".:")
+        if word:
+            tokens.append(word)
+    return tokens
+
+def _clock(token: str, following: str | None, bare_ok: bool) -> tuple[int, int, bool] | None:
+    """(hour, minute, consumed_following) if `token` reads as a time of day."""
+    m = CLOCK_RE.fullmatch(token)
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    ampm = m.group(3)
+    consumed = False
+    if ampm is None and following in ("am", "pm"):
+        ampm, consumed = following, True
+    if ampm is None and m.group(2) is None and not bare_ok:
+        return None  # a lone number ("5", "top 10") is not a time
+    if ampm:
+        if not 1 <= hour <= 12:
             return None
-        return int(m.group(1))
-    except Exception:
+        hour = hour % 12 + (12 if ampm == "pm" else 0)
+    if hour > 23 or minute > 59:
         return None
+    return hour, minute, consumed
+
+def _duration(tokens: list[str], i: int) -> tuple[int, int]:
+    """Sum durations starting at tokens[i] ("45m", "1h 30m", "2 hours", "an hour"); returns (seconds, next index)."""
+    total = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if DURATION_TOKEN_RE.fullmatch(token):
+            total += sum(int(n) * TIME_UNITS[u] for n, u in DURATION_PART_RE.findall(token))
+            i += 1
+        elif (token.isdigit() or token in ("a", "an")) and i + 1 < len(tokens) and tokens[i + 1] in TIME_UNITS:
+            total += (int(token) if token.isdigit() else 1) * TIME_UNITS[tokens[i + 1]]
+            i += 2
+        elif token == "and" and total:
+            i += 1
+        else:
+            break
+    return total, i
+
+@lru_cache(maxsize=TIME_PARSE_CACHE)
+def parse_time_expression(text: str) -> TimeExpression | None:
+    """Find the time a line-up text refers to; Discord tags win over everything else."""
+    tokens = _tokenize_time(text or "")
+    days = weekday = clock = seconds = None
+    next_week = tonight = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token.startswith("<t:"):
+            return TimeExpression(unix=int(token[3:].split(":")[0].rstrip(">")))
+        if token == "in" and seconds is None:
+            total, end = _duration(tokens, i + 1)
+            if total:
+                seconds, i = total, end
+                continue
+        elif token in DAY_WORDS and days is None and weekday is None:
+            days = DAY_WORDS[token]
+            tonight = token == "tonight"
+        elif token == "next" and following in WEEKDAYS:
+            next_week = True
+        elif token in WEEKDAYS and weekday is None and days is None:
+            weekday = WEEKDAYS[token]
+        elif token in ("noon", "midnight") and clock is None:
+            clock = (12, 0) if token == "noon" else (0, 0)
+        elif token in ("at", "@") and following is not None and clock is None:
+            after = tokens[i + 2] if i + 2 < len(tokens) else None
+            parsed = _clock(following, after, bare_ok=True)
+            if parsed:
+                clock = parsed[:2]
+                i += 3 if parsed[2] else 2
+                continue
+        elif clock is None:
+            # A bare number only counts straight after a day ("tonight 8", "sat 9")
+            previous = tokens[i - 1] if i else None
+            parsed = _clock(token, following, bare_ok=previous in DAY_WORDS or previous in WEEKDAYS)
+            if parsed:
+                clock = parsed[:2]
+                i += 2 if parsed[2] else 1
+                continue
+        i += 1
+    if seconds is not None:
+        return TimeExpression(seconds=seconds)
+    if clock is None:
+        return None
+    hour, minute = clock
+    if tonight and hour < 12:
+        hour += 12
+    return TimeExpression(hour=hour, minute=minute, days=days, weekday=weekday, next_week=next_week)
 
-# Natural time parsing: "11am", "2 pm", "20:00", "8:30am" (Asia/Manila)
-TIME_SIMPLE_RE = re.compile(r"\b(?:(?:at|@)\s*)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
-
-def _infer_local_time_unix(text: str) -> int | None:
+def _time_from_text(text: str, now: dt.datetime | None = None) -> int | None:
+    """Unix time referred to by `text`, or None."""
     try:
-        t = text or ""
-        m = TIME_SIMPLE_RE.search(t)
-        if not m:
-            return None
-        hour = int(m.group(1))
-        minute = int(m.group(2) or "0")
-        ampm = (m.group(3) or "").lower()
-        if ampm:
-            hour = hour % 12
-            if ampm == "pm":
-                hour += 12
-        if hour < 0 or hour > 23 or minute < 0 or minute > 59:
-            return None
-        now_local = dt.datetime.now(PH_TZ)
-        candidate = now_local.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if candidate <= now_local:
-            candidate = candidate + dt.timedelta(days=1)
-        return int(candidate.astimezone(dt.timezone.utc).timestamp())
-    except Exception:
+        expr = parse_time_expression((text or "").strip())
+        return expr.resolve(now) if expr is not None else None
+    except Exception as e:
+        swallowed("time_parse", e)
         return None
 
 # Slash command versions (may take time globally; prefix commands work instantly)
@@ -673,280 +3513,94 @@ try:
             self.add_item(self.ping)
 
         async def callback(self, interaction: nextcord.Interaction):
-            member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-            if not member or not _member_has_creator_role(member):
-                await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-                return
-            text = (self.text.value or "").strip()
             ping_input = (self.ping.value or "").strip().lower()
             ping_everyone = ping_input in ("true","yes","y","1","on","enable","enabled")
-            infer_everyone = text.startswith("@everyone")
-            do_ping_everyone = ping_everyone or infer_everyone
-            allowed = nextcord.AllowedMentions(everyone=do_ping_everyone, roles=True, users=True)
-            content = ("@everyone " + text) if (do_ping_everyone and not infer_everyone) else text
-            try:
-                await interaction.channel.send(content, allowed_mentions=allowed)
-                await interaction.response.send_message("✅ Posted.", ephemeral=True)
-            except Exception:
-                await interaction.response.send_message("❌ Failed to post message. Check channel permissions.", ephemeral=True)
+            await dispatch(Invocation.from_interaction(interaction, "postmessage"), text=(self.text.value or "").strip(), ping_everyone=ping_everyone)
 
-    @bot.slash_command(name="siegelineup", description="Create a siege participation lineup", guild_ids=[GUILD_ID])
+    @bot.slash_command(name="siegelineup", description="Create a siege participation lineup", guild_ids=SLASH_GUILD_IDS)
     async def siegelineup(interaction: nextcord.Interaction, text: str = SlashOption(required=False, description="Extra text or rules"), ping_everyone: bool = SlashOption(required=False, default=False, description="Ping @everyone")):
-        # Permission check
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        # Defer ephemerally and post a regular channel message (no command header)
-        await interaction.response.defer(ephemeral=True)
-        msg = await _create_lineup_message(interaction.channel, interaction.guild, "Siege Line-Up", text or "", ping_everyone=ping_everyone)
-        ts = _extract_unix_timestamp(text or "")
-        if not ts:
-            ts = _infer_local_time_unix(text or "")
-        if ts:
-            await _schedule_announcement(msg.id, interaction.channel, ts, "Guild Siege")
-        try:
-            await interaction.delete_original_message()
-        except Exception:
-            pass
+        await dispatch(Invocation.from_interaction(interaction, "siegelineup"), text=text or "", ping_everyone=ping_everyone)
 
-    @bot.slash_command(name="secretroomlineup", description="Create a secret room participation lineup", guild_ids=[GUILD_ID])
+    @bot.slash_command(name="secretroomlineup", description="Create a secret room participation lineup", guild_ids=SLASH_GUILD_IDS)
     async def secretroomlineup(interaction: nextcord.Interaction, text: str = SlashOption(required=False, description="Extra text or rules"), ping_everyone: bool = SlashOption(required=False, default=False, description="Ping @everyone")):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        await interaction.response.defer(ephemeral=True)
-        msg = await _create_lineup_message(interaction.channel, interaction.guild, "Secret Room Line-Up", text or "", ping_everyone=ping_everyone)
-        ts = _extract_unix_timestamp(text or "")
-        if not ts:
-            ts = _infer_local_time_unix(text or "")
-        if ts:
-            await _schedule_announcement(msg.id, interaction.channel, ts, "Secret Room")
-        try:
-            await interaction.delete_original_message()
-        except Exception:
-            pass
+        await dispatch(Invocation.from_interaction(interaction, "secretroomlineup"), text=text or "", ping_everyone=ping_everyone)
 
-    @bot.slash_command(name="postmessage", description="Post a message in the current channel", guild_ids=[GUILD_ID])
+    @bot.slash_command(name="postmessage", description="Post a message in the current channel", guild_ids=SLASH_GUILD_IDS)
     async def postmessage_slash(
         interaction: nextcord.Interaction,
         text: str = SlashOption(required=False, description="Message to post (leave empty for modal)"),
         ping_everyone: bool = SlashOption(required=False, default=False, description="Ping @everyone")
     ):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        # If no text provided, open a modal for multi-line input
+        # If no text provided, open a modal for multi-line input (permission is checked on submit)
         if not (text or "").strip():
             await interaction.response.send_modal(PostMessageModal())
             return
-        await interaction.response.defer(ephemeral=True)
-        # Allow users to type literal '\n' to create line breaks in slash field
-        try:
-            text = (text or "").replace("\\n", "\n")
-        except Exception:
-            pass
-        infer_everyone = (text or "").strip().startswith("@everyone")
-        do_ping_everyone = ping_everyone or infer_everyone
-        allowed = nextcord.AllowedMentions(everyone=do_ping_everyone, roles=True, users=True)
-        content = ("@everyone " + text) if (do_ping_everyone and not infer_everyone) else text
-        try:
-            await interaction.channel.send(content, allowed_mentions=allowed)
-        except Exception:
-            await interaction.followup.send("❌ Failed to post message. Check channel permissions.", ephemeral=True)
-            return
-        try:
-            await interaction.delete_original_message()
-        except Exception:
-            pass
-
-    @bot.slash_command(name="delete", description="Delete recent messages", guild_ids=[GUILD_ID])
-    async def delete_slash(
-        interaction: nextcord.Interaction,
-        count: int = SlashOption(required=True, description="Number of messages to delete (1-100)")
-    ):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        if count < 1:
-            await interaction.response.send_message("❌ Provide a positive number.", ephemeral=True)
-            return
-        if count > 100:
-            count = 100
-        bot_member = interaction.guild.me if interaction.guild else None
-        perms = interaction.channel.permissions_for(bot_member) if bot_member else None
-        if not perms or not perms.manage_messages or not perms.read_message_history:
-            await interaction.response.send_message("❌ I need 'Manage Messages' and 'Read Message History' here.", ephemeral=True)
-            return
-        await interaction.response.defer(ephemeral=True)
-        try:
-            deleted = await interaction.channel.purge(limit=count, check=lambda m: not m.pinned)
-            await interaction.followup.send(f"🧹 Deleted {len(deleted)} messages in this channel.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ Failed to delete messages: {e}", ephemeral=True)
-
-    @bot.slash_command(name="del", description="Delete recent messages", guild_ids=[GUILD_ID])
-    async def del_slash(
-        interaction: nextcord.Interaction,
-        count: int = SlashOption(required=True, description="Number of messages to delete (1-100)")
+        await dispatch(Invocation.from_interaction(interaction, "postmessage"), text=text, ping_everyone=ping_everyone)
+
+    # Slash aliases share one adapter per command; the name is bound per registration
+    def _delete_slash(name: str):
+        async def delete_slash(
+            interaction: nextcord.Interaction,
+            count: int = SlashOption(required=True, description=f"Number of matching messages to delete (1-{PURGE_MAX})"),
+            user: nextcord.Member = SlashOption(required=False, default=None, description="Only messages from this member"),
+            pattern: str = SlashOption(required=False, default=None, description="Only messages matching this regex"),
+            files: bool = SlashOption(required=False, default=False, description="Only messages with attachments"),
+            older: str = SlashOption(required=False, default=None, description="Only messages older than e.g. 2h"),
+            newer: str = SlashOption(required=False, default=None, description="Only messages newer than e.g. 1d"),
+        ):
+            await dispatch(Invocation.from_interaction(interaction, name), count=count, author_ids=[user.id] if user else (),
+                           pattern=pattern, older=older, newer=newer, files=bool(files))
+        return delete_slash
+
+    def _worldboss_slash(name: str):
+        async def worldboss_slash(
+            interaction: nextcord.Interaction,
+            duration: str = SlashOption(name="time", required=False, default=None, description=f"Duration like 50m, 2h or 1h3m (default {WORLD_BOSS_DEFAULT})"),
+        ):
+            await dispatch(Invocation.from_interaction(interaction, name), duration=duration)
+        return worldboss_slash
+
+    def _plain_slash(name: str):
+        async def plain_slash(interaction: nextcord.Interaction):
+            await dispatch(Invocation.from_interaction(interaction, name))
+        return plain_slash
+
+    for _name in ("delete", "del"):
+        bot.slash_command(name=_name, description="Delete recent messages", guild_ids=SLASH_GUILD_IDS)(_delete_slash(_name))
+    for _name in ("worldboss", "wb"):
+        bot.slash_command(name=_name, description="Start a world boss timer", guild_ids=SLASH_GUILD_IDS)(_worldboss_slash(_name))
+    for _name, _description in (
+        ("purgestop", "Stop a running purge in this channel"),
+        ("wbstop", "Stop the world boss timer in this channel"),
+        ("status", "Show bot status"),
+        ("pingpong", "Latency pingpong"),
+        ("nextffa", "Show next FFA announcement time (PH)"),
+        ("cmds", "List registered commands"),
+        ("reloadcmds", "Reload slash commands for this guild"),
     ):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        if count < 1:
-            await interaction.response.send_message("❌ Provide a positive number.", ephemeral=True)
-            return
-        if count > 100:
-            count = 100
-        bot_member = interaction.guild.me if interaction.guild else None
-        perms = interaction.channel.permissions_for(bot_member) if bot_member else None
-        if not perms or not perms.manage_messages or not perms.read_message_history:
-            await interaction.response.send_message("❌ I need 'Manage Messages' and 'Read Message History' here.", ephemeral=True)
-            return
-        await interaction.response.defer(ephemeral=True)
-        try:
-            deleted = await interaction.channel.purge(limit=count, check=lambda m: not m.pinned)
-            await interaction.followup.send(f"🧹 Deleted {len(deleted)} messages in this channel.", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ Failed to delete messages: {e}", ephemeral=True)
-
-    @bot.slash_command(name="worldboss", description="Start a 2-hour world boss timer", guild_ids=[GUILD_ID])
-    async def worldboss_slash(interaction: nextcord.Interaction):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        now = dt.datetime.now(dt.timezone.utc)
-        end = now + dt.timedelta(hours=2)
-        unix_end = int(end.timestamp())
-        mins = int(((end - now).total_seconds() + 59) // 60)
-        await interaction.response.send_message(f"⏱ World Boss timer started. Starts in {mins} minutes. Ends at <t:{unix_end}:F> (<t:{unix_end}:R>)", ephemeral=True)
-        async def _task():
-            try:
-                await asyncio.sleep(2*60*60)
-                allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
-                await interaction.channel.send(WORLD_BOSS_MESSAGE, allowed_mentions=allowed)
-            except Exception:
-                pass
-        asyncio.create_task(_task())
-
-    @bot.slash_command(name="wb", description="Start a 2-hour world boss timer", guild_ids=[GUILD_ID])
-    async def wb_slash(interaction: nextcord.Interaction):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        now = dt.datetime.now(dt.timezone.utc)
-        end = now + dt.timedelta(hours=2)
-        unix_end = int(end.timestamp())
-        mins = int(((end - now).total_seconds() + 59) // 60)
-        await interaction.response.send_message(f"⏱ World Boss timer started. Starts in {mins} minutes. Ends at <t:{unix_end}:F> (<t:{unix_end}:R>)", ephemeral=True)
-        async def _task():
-            try:
-                await asyncio.sleep(2*60*60)
-                allowed = nextcord.AllowedMentions(everyone=False, roles=False, users=False)
-                await interaction.channel.send(WORLD_BOSS_MESSAGE, allowed_mentions=allowed)
-            except Exception:
-                pass
-        asyncio.create_task(_task())
-
-    @bot.slash_command(name="status", description="Show bot status", guild_ids=[GUILD_ID])
-    async def status_slash(interaction: nextcord.Interaction):
-        try:
-            embed = nextcord.Embed(title="Bot Status", color=0x3498db)
-            embed.add_field(name="Uptime", value=_format_uptime(), inline=True)
-            embed.add_field(name="Latency", value=f"{round(bot.latency*1000)} ms", inline=True)
-            embed.add_field(name="Servers", value=str(len(bot.guilds)), inline=True)
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-        except Exception:
-            try:
-                await interaction.response.send_message("Failed to show status.", ephemeral=True)
-            except Exception:
-                pass
-
-    @bot.slash_command(name="pingpong", description="Latency pingpong", guild_ids=[GUILD_ID])
-    async def ping_slash(interaction: nextcord.Interaction):
-        try:
-            await interaction.response.send_message(f"PingPong {round(bot.latency*1000)} ms", ephemeral=True)
-        except Exception:
-            try:
-                await interaction.response.send_message("PingPong failed.", ephemeral=True)
-            except Exception:
-                pass
-
-    @bot.slash_command(name="nextffa", description="Show next FFA announcement time (PH)", guild_ids=[GUILD_ID])
-    async def nextffa_slash(interaction: nextcord.Interaction):
-        try:
-            nt = _next_ffa_local()
-            unix = int(nt.astimezone(dt.timezone.utc).timestamp())
-            msg = f"Next FFA: <t:{unix}:F> (<t:{unix}:R>) Asia/Manila"
-            await interaction.response.send_message(msg, ephemeral=True)
-        except Exception:
-            try:
-                await interaction.response.send_message("Failed to calculate next FFA.", ephemeral=True)
-            except Exception:
-                pass
-
-    @bot.slash_command(name="cmds", description="List registered commands", guild_ids=[GUILD_ID])
-    async def cmds_slash(interaction: nextcord.Interaction):
-        try:
-            items = []
-            try:
-                cmds = await bot.fetch_application_commands(guild_id=interaction.guild.id)
-                items = [c.name for c in cmds] if cmds else []
-            except Exception:
-                pass
-            text = (", ".join(items) or "none")
-            await interaction.response.send_message(f"Commands: {text}", ephemeral=True)
-        except Exception:
-            try:
-                await interaction.response.send_message("Failed to list commands.", ephemeral=True)
-            except Exception:
-                pass
-
-    @bot.slash_command(name="reloadcmds", description="Reload slash commands for this guild", guild_ids=[GUILD_ID])
-    async def reloadcmds_slash(interaction: nextcord.Interaction):
-        member = interaction.user if isinstance(interaction.user, nextcord.Member) else interaction.guild.get_member(interaction.user.id)
-        if not member or not _member_has_creator_role(member):
-            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
-            return
-        try:
-            synced = await bot.sync_application_commands(guild_id=interaction.guild.id)
-            count = (len(synced) if hasattr(synced, "__len__") else 0)
-            await interaction.response.send_message(f"✅ Synced {count} slash command(s).", ephemeral=True)
-        except Exception:
-            try:
-                await interaction.response.send_message("❌ Failed to sync commands.", ephemeral=True)
-            except Exception:
-                pass
-except Exception:
+        bot.slash_command(name=_name, description=_description, guild_ids=SLASH_GUILD_IDS)(_plain_slash(_name))
+except Exception as e:
     # If slash support isn't available, prefix commands still work.
-    pass
+    swallowed("slash_register", e)
 
 # --- RUN BOT ---
 if __name__ == "__main__":
-    print("\n" + "="*50, flush=True)
-    print("[STARTING] Initializing Enhanced Event Bot...", flush=True)
-    print("[INFO] Press Ctrl+C to stop the bot", flush=True)
-    print(f"[DEBUG] Token source: {TOKEN_SOURCE}", flush=True)
-    print(f"[DEBUG] Token present: {bool(TOKEN)}", flush=True)
-    print("[INFO] Connecting to Discord...", flush=True)
-    print("="*50 + "\n", flush=True)
+    log_event("starting", token_source=TOKEN_SOURCE, token_present=bool(TOKEN), pid=os.getpid(), profile=RUNTIME_PROFILE)
     
     # Single-instance lock (made less strict for smoother restarts)
-    LOCK_FILE = os.path.join(os.path.dirname(__file__), "bot_instance.lock")
+    # Shard workers each hold their own lock so one launcher can run many of them
+    LOCK_FILE = os.path.join(
+        os.path.dirname(__file__),
+        f"bot_instance.{WORKER_INDEX}.lock" if SHARD_IDS is not None else "bot_instance.lock",
+    )
     STRICT_SINGLE_INSTANCE = (os.getenv("STRICT_SINGLE_INSTANCE", "0").strip().lower() in {"1","true","yes"})
     
     def _cleanup_lock():
         try:
             if os.path.exists(LOCK_FILE):
                 os.remove(LOCK_FILE)
-        except Exception:
-            pass
+        except Exception as e:
+            swallowed("lock_cleanup", e)
     atexit.register(_cleanup_lock)
 
     try:
@@ -957,8 +3611,8 @@ if __name__ == "__main__":
                 with open(LOCK_FILE, 'x') as f:
                     f.write(str(os.getpid()))
             except FileExistsError:
-                print("\n[ERROR] ❌ Another bot instance appears to be running (lock file present).", flush=True)
-                print(f"[HELP] If no other instance is running, delete: {LOCK_FILE}", flush=True)
+                log_event("instance_locked", logging.ERROR, lock_file=LOCK_FILE,
+                          hint="Another bot instance appears to be running; if not, delete the lock file.")
                 try:
                     if sys.stdin and getattr(sys.stdin, "isatty", lambda: False)():
                         input("\nPress Enter to exit...")
@@ -970,22 +3624,19 @@ if __name__ == "__main__":
             try:
                 if os.path.exists(LOCK_FILE):
                     os.remove(LOCK_FILE)
-            except Exception:
-                pass
+            except Exception as e:
+                swallowed("lock_cleanup", e)
             try:
                 with open(LOCK_FILE, 'w') as f:
                     f.write(str(os.getpid()))
-            except Exception:
+            except Exception as e:
                 # If writing fails, continue without lock to avoid blocking startup
-                pass
+                swallowed("lock_write", e)
 
         if not TOKEN:
-            print("[ERROR] ❌ Bot token is not set!", flush=True)
-            print("[HELP] Options:", flush=True)
-            print("  • Set environment variable 'DISCORD_TOKEN'", flush=True)
-            print("  • Create a .env file with: DISCORD_TOKEN=your_token", flush=True)
-            print("  • Or create 'bot_token.txt' beside bot.py containing only your token", flush=True)
-            print("[HELP] Get your token from: https://discord.com/developers/applications", flush=True)
+            log_event("token_missing", logging.ERROR,
+                      hint="Set DISCORD_TOKEN in the environment or a .env file, or create bot_token.txt beside bot.py "
+                           "containing only your token. Get one from https://discord.com/developers/applications")
             try:
                 if sys.stdin and getattr(sys.stdin, "isatty", lambda: False)():
                     input("\nPress Enter to exit...")
@@ -993,72 +3644,131 @@ if __name__ == "__main__":
                 pass
             sys.exit(1)
         
+        def _run_shard_launcher():
+            """Spread SHARD_COUNT shards over SHARD_PROCESSES workers and keep them running."""
+            import subprocess
+            processes = min(SHARD_PROCESSES, SHARD_COUNT)
+            groups = [list(range(i, SHARD_COUNT, processes)) for i in range(processes)]
+            base_port = int((os.getenv("PORT") or os.getenv("KEEP_ALIVE_PORT") or "10000").strip())
+
+            def _spawn(index: int):
+                env = dict(
+                    os.environ,
+                    SHARD_COUNT=str(SHARD_COUNT),
+                    SHARD_IDS=",".join(str(i) for i in groups[index]),
+                    SHARD_PROCESSES="1",
+                    WORKER_INDEX=str(index),
+                    PORT=str(base_port + index),
+                )
+                log_event("shard_worker_spawned", worker=index, shards=groups[index], port=base_port + index)
+                return subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env)
+
+            workers = [_spawn(i) for i in range(processes)]
+            restarts = [0.0] * processes
+            try:
+                while True:
+                    time.sleep(2)
+                    for i, proc in enumerate(workers):
+                        code = proc.poll()
+                        if code is None:
+                            continue
+                        # Back off if a worker keeps dying right after start
+                        if time.monotonic() - restarts[i] < 30:
+                            time.sleep(5)
+                        log_event("shard_worker_exited", logging.WARNING, worker=i, code=code)
+                        restarts[i] = time.monotonic()
+                        workers[i] = _spawn(i)
+            finally:
+                for proc in workers:
+                    if proc.poll() is None:
+                        proc.terminate()
+                for proc in workers:
+                    try:
+                        proc.wait(timeout=15)
+                    except Exception:
+                        proc.kill()
+
+        if SHARD_PROCESSES > 1 and SHARD_IDS is None:
+            log_event("shard_launcher", shards=SHARD_COUNT, processes=min(SHARD_PROCESSES, SHARD_COUNT))
+            _run_shard_launcher()
+            sys.exit(0)
+        if SHARD_COUNT > 0:
+            log_event("shard_worker", worker=WORKER_INDEX, shards=SHARD_IDS or "all", shard_count=SHARD_COUNT)
+
         async def _start_keepalive():
             try:
                 port_env = (os.getenv("PORT") or os.getenv("KEEP_ALIVE_PORT") or "10000").strip()
                 app = web.Application()
                 async def _root(_request):
                     return web.Response(text="OK")
+                async def _livez(_request):
+                    ok = health.live_ok and health.fresh()
+                    return web.Response(body=health.live_body, status=200 if ok else 503, content_type="application/json")
+                async def _readyz(_request):
+                    ok = health.ready_ok and health.fresh()
+                    return web.Response(body=health.ready_body, status=200 if ok else 503, content_type="application/json")
                 app.router.add_get("/", _root)
                 app.router.add_route("HEAD", "/", _root)
-                app.router.add_get("/healthz", _root)
-                app.router.add_route("HEAD", "/healthz", _root)
+                app.router.add_get("/livez", _livez)
+                app.router.add_get("/readyz", _readyz)
+                # /healthz keeps its path for existing probes but now means "ready"
+                app.router.add_get("/healthz", _readyz)
+                app.router.add_route("HEAD", "/healthz", _readyz)
+                async def _metrics(_request):
+                    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                                        headers={"X-Prometheus-Exposition": "0.0.4"})
+                app.router.add_get("/metrics", _metrics)
                 runner = web.AppRunner(app)
                 await runner.setup()
                 site = web.TCPSite(runner, "0.0.0.0", int(port_env))
                 await site.start()
-                try:
-                    print(f"[HEALTH] Keepalive listening on 0.0.0.0:{port_env} (/, /healthz)", flush=True)
-                except Exception:
-                    pass
-            except Exception:
-                try:
-                    import traceback
-                    print("[HEALTH] Failed to start keepalive server", flush=True)
-                    traceback.print_exc()
-                except Exception:
-                    pass
+                log_event("keepalive_listening", port=int(port_env), paths=["/", "/livez", "/readyz", "/healthz", "/metrics"])
+            except Exception as e:
+                log_event("keepalive_failed", logging.ERROR, exc_info=e)
 
         async def _main():
+            log_event("event_loop", loop=loop_impl, slow_callback_monitor=loop_monitor.install())
             await _start_keepalive()
-            while True:
-                try:
-                    await bot.start(TOKEN)
-                    break
-                except nextcord.errors.LoginFailure:
-                    try:
-                        print("[ERROR] Invalid bot token; retrying in 300s", flush=True)
-                    except Exception:
-                        pass
-                    await asyncio.sleep(300)
-                except Exception as e:
+            lag_probe = asyncio.create_task(_loop_lag_probe())
+            health.start()
+            store.start()
+            await _restore_state()
+            try:
+                while True:
                     try:
-                        print(f"[ERROR] Bot start failed: {e}; retrying in 30s", flush=True)
-                    except Exception:
-                        pass
-                    await asyncio.sleep(30)
-
+                        await bot.start(TOKEN)
+                        break
+                    except nextcord.errors.LoginFailure:
+                        health.gateway_connected = False
+                        health.start_failures += 1
+                        health.last_start_error = "LoginFailure"
+                        log_event("login_failed", logging.ERROR, retry_in=300)
+                        await asyncio.sleep(300)
+                    except Exception as e:
+                        health.gateway_connected = False
+                        health.start_failures += 1
+                        health.last_start_error = type(e).__name__
+                        log_event("start_failed", logging.ERROR, error=repr(e), retry_in=30)
+                        await asyncio.sleep(30)
+            finally:
+                lag_probe.cancel()
+
+        loop_impl = _install_fast_loop()
         asyncio.run(_main())
     except KeyboardInterrupt:
-        print("\n[STOP] Bot stopped by user", flush=True)
+        log_event("stopped")
     except nextcord.errors.LoginFailure:
-        print("\n[ERROR] ❌ Login failed! Invalid bot token.", flush=True)
-        print("[HELP] Your token is incorrect or has been reset.", flush=True)
-        print("[HELP] Get a new token from: https://discord.com/developers/applications", flush=True)
+        log_event("login_failed", logging.ERROR,
+                  hint="Your token is incorrect or has been reset. Get a new one from https://discord.com/developers/applications")
         try:
             if sys.stdin and getattr(sys.stdin, "isatty", lambda: False)():
                 input("\nPress Enter to exit...")
         except Exception:
             pass
     except Exception as e:
-        print(f"\n[ERROR] ❌ Failed to start bot: {e}", flush=True)
-        print(f"[ERROR] Error type: {type(e).__name__}", flush=True)
-        import traceback
-        traceback.print_exc()
-        print("\n[HELP] Common issues:", flush=True)
-        print("  1. Invalid bot token", flush=True)
-        print("  2. Bot not invited to server", flush=True)
-        print("  3. Missing intents enabled in Discord Developer Portal", flush=True)
+        log_event("start_failed", logging.CRITICAL, exc_info=e,
+                  hint="Common issues: invalid bot token, bot not invited to the server, "
+                       "intents not enabled in the Discord Developer Portal")
         try:
             if sys.stdin and getattr(sys.stdin, "isatty", lambda: False)():
                 input("\nPress Enter to exit...")